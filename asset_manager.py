@@ -0,0 +1,161 @@
+"""Background asset loading for gacha_game_gui.
+
+Images are decoded and scaled on a small thread pool so big sprite sets never
+stall the render loop. Scaled variants are written to a disk cache, so the next
+start loads the small file directly. Finished loads are handed to the main thread
+by `pump()`, which converts each surface to the display format exactly once
+(pygame surfaces must only be converted where the display lives). Loaded surfaces
+are kept in LRU order and evicted once they exceed the memory budget; until an
+asset arrives (or if the file does not exist) callers get a placeholder.
+"""
+import hashlib
+import os
+import queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Set, Tuple
+
+import pygame
+
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".asset_cache")
+MEMORY_BUDGET = 64 * 1024 * 1024  # Bytes of decoded pixels kept in memory
+MAX_CONVERTS_PER_FRAME = 4
+
+_PLACEHOLDER = object()  # Sentinel: serve the generic placeholder surface
+
+AssetKey = Tuple[str, Optional[Tuple[int, int]]]
+
+
+def surface_bytes(surface: pygame.Surface) -> int:
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+class AssetManager:
+    def __init__(self, root: str = ASSET_DIR, cache_dir: Optional[str] = CACHE_DIR, workers: int = 2,
+                 memory_budget: int = MEMORY_BUDGET, max_converts_per_frame: int = MAX_CONVERTS_PER_FRAME):
+        self.root = root
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.memory_budget = memory_budget
+        self.max_converts_per_frame = max_converts_per_frame
+        self.executor: Optional[ThreadPoolExecutor] = None  # Started on the first request
+        self.surfaces: "OrderedDict[AssetKey, pygame.Surface]" = OrderedDict()
+        self.memory = 0
+        self.pending: Set[AssetKey] = set()
+        self.missing: Set[AssetKey] = set()
+        self.done: "queue.SimpleQueue[Tuple[AssetKey, Optional[pygame.Surface]]]" = queue.SimpleQueue()
+        self.placeholders: Dict[Optional[Tuple[int, int]], pygame.Surface] = {}
+        self.generation = 0  # Bumped whenever new assets become available
+        self.stats = {"loaded": 0, "disk_cache_hits": 0, "missing": 0, "evicted": 0}
+
+    def get(self, path: str, size: Optional[Tuple[int, int]] = None, default=_PLACEHOLDER):
+        """The asset at `path` (relative to the asset dir) scaled to `size`.
+
+        Starts a background load on first use and returns `default` (the generic
+        placeholder unless given) until the asset has arrived.
+        """
+        key = (path, size)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        if key not in self.missing and key not in self.pending:
+            self.request(key)
+        return self.placeholder(size) if default is _PLACEHOLDER else default
+
+    def is_loaded(self, path: str, size: Optional[Tuple[int, int]] = None) -> bool:
+        return (path, size) in self.surfaces
+
+    def request(self, key: AssetKey):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="assets")
+        self.pending.add(key)
+        future = self.executor.submit(self.load, key)
+        future.add_done_callback(lambda f, key=key: self.done.put((key, None if f.exception() else f.result())))
+
+    def load(self, key: AssetKey) -> Optional[pygame.Surface]:
+        # Runs on a worker thread: decode and scale only, never convert
+        path, size = key
+        full_path = os.path.join(self.root, path)
+        if not os.path.exists(full_path):
+            return None
+        if size is None:
+            return pygame.image.load(full_path)
+
+        cache_path = self.cache_path(full_path, size)
+        if cache_path and os.path.exists(cache_path):
+            self.stats["disk_cache_hits"] += 1
+            return pygame.image.load(cache_path)
+
+        image = pygame.image.load(full_path)
+        if image.get_bitsize() >= 24:
+            scaled = pygame.transform.smoothscale(image, size)
+        else:
+            scaled = pygame.transform.scale(image, size)
+        if cache_path:
+            self.write_cache(scaled, cache_path)
+        return scaled
+
+    def cache_path(self, full_path: str, size: Tuple[int, int]) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        # The source's mtime is part of the key, so edited art is re-scaled
+        stamp = f"{full_path}|{os.path.getmtime(full_path)}|{size[0]}x{size[1]}"
+        return os.path.join(self.cache_dir, hashlib.sha1(stamp.encode("utf-8")).hexdigest() + ".png")
+
+    def write_cache(self, surface: pygame.Surface, cache_path: str):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp.png"
+            pygame.image.save(surface, tmp_path)
+            os.replace(tmp_path, cache_path)
+        except (OSError, pygame.error):
+            pass  # The cache is only an optimization
+
+    def pump(self) -> int:
+        """Adopt finished loads on the main thread; call once per frame. Returns how many arrived."""
+        arrived = 0
+        while arrived < self.max_converts_per_frame:
+            try:
+                key, surface = self.done.get_nowait()
+            except queue.Empty:
+                break
+            self.pending.discard(key)
+            if surface is None:
+                self.missing.add(key)
+                self.stats["missing"] += 1
+                continue
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert_alpha()
+            self.surfaces[key] = surface
+            self.memory += surface_bytes(surface)
+            self.stats["loaded"] += 1
+            self.evict(keep=key)
+            arrived += 1
+        if arrived:
+            self.generation += 1
+        return arrived
+
+    def evict(self, keep: Optional[AssetKey] = None):
+        while self.memory > self.memory_budget and len(self.surfaces) > 1:
+            key, surface = next(iter(self.surfaces.items()))
+            if key == keep:
+                break
+            del self.surfaces[key]
+            self.memory -= surface_bytes(surface)
+            self.stats["evicted"] += 1
+
+    def placeholder(self, size: Optional[Tuple[int, int]]) -> pygame.Surface:
+        surface = self.placeholders.get(size)
+        if surface is None:
+            surface = pygame.Surface(size or (64, 64), pygame.SRCALPHA)
+            surface.fill((60, 60, 70, 200))
+            pygame.draw.rect(surface, (120, 120, 130), surface.get_rect(), 2)
+            self.placeholders[size] = surface
+        return surface
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
@@ -0,0 +1,86 @@
+"""Micro-benchmark for gacha_game_gui.Button.draw.
+
+Times a single button draw in the states a menu actually goes through: idle,
+fully hovered (steady glow) and fading in/out. For comparison it also times the
+old per-frame glow loop, which rebuilt the glow surface from up to 20 rounded
+rects on every draw.
+
+    python bench_button.py --iterations 2000
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+
+import argparse
+import statistics
+import sys
+import time
+from typing import Callable, Dict
+
+import pygame
+import gacha_game_gui as gui
+
+
+def make_button() -> gui.Button:
+    return gui.Button(pygame.Rect(540, 300, 200, 50), "Summon", gui.BLUE, gui.PURPLE, gui.NORMAL_FONT, lambda: None)
+
+
+def draw_glow_loop(screen: pygame.Surface, button: gui.Button, strength: int):
+    # The glow as Button.draw used to render it every frame
+    glow_surface = pygame.Surface((button.rect.width + 40, button.rect.height + 40), pygame.SRCALPHA)
+    for i in range(strength):
+        alpha = int(255 * (1 - i / strength))
+        pygame.draw.rect(glow_surface, (*button.glow_color, alpha),
+                         (i, i, button.rect.width + 40 - 2*i, button.rect.height + 40 - 2*i),
+                         border_radius=15)
+    screen.blit(glow_surface, (button.rect.x - 20, button.rect.y - 20))
+
+
+def time_calls(call: Callable[[], None], iterations: int, repeats: int = 5) -> float:
+    """Median over `repeats` batches of the mean µs per call."""
+    batches = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            call()
+        batches.append((time.perf_counter() - start) / iterations * 1e6)
+    return statistics.median(batches)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmark for Button.draw")
+    parser.add_argument("--iterations", type=int, default=1000, help="draw calls per timed batch")
+    args = parser.parse_args(argv)
+
+    gui.init_display()
+    screen = gui.screen
+    inside = (640, 325)
+    outside = (0, 0)
+
+    idle = make_button()
+    hovered = make_button()
+    hovered.glow_level = gui.BUTTON_GLOW_LEVELS
+    fading = make_button()
+    fade_positions = [inside] * 20 + [outside] * 20
+    fade_step = [0]
+
+    def draw_fading():
+        fading.draw(screen, fade_positions[fade_step[0] % len(fade_positions)])
+        fade_step[0] += 1
+
+    cases: Dict[str, Callable[[], None]] = {
+        "idle": lambda: idle.draw(screen, outside),
+        "hovered (full glow)": lambda: hovered.draw(screen, inside),
+        "fading in/out": draw_fading,
+        "old glow loop only (level 20)": lambda: draw_glow_loop(screen, hovered, gui.BUTTON_GLOW_LEVELS),
+    }
+
+    print(f"{'case':<32}{'µs/draw':>10}")
+    for name, call in cases.items():
+        print(f"{name:<32}{time_calls(call, args.iterations):>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
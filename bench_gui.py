@@ -0,0 +1,219 @@
+"""Headless rendering benchmark for gacha_game_gui.
+
+Runs every screen of the pygame client against the SDL dummy video driver so it
+can run in CI without a display, and compares ms/frame against a stored baseline.
+The baseline records the machine and Python/pygame versions it was measured on;
+on any other setup the comparison is only reported, never failed, so record a
+baseline of your own with --update-baseline first.
+
+    python bench_gui.py                      # run and check against the baseline
+    python bench_gui.py --update-baseline    # run and store the results as baseline
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+import pygame
+import gacha_game_gui as gui
+from ledger import Ledger
+
+DEFAULT_SIZES = [10, 1000, 100000]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_gui_baseline.json")
+
+RARITY_STATS = {
+    "6★": (50, 235),
+    "5★": (40, 200),
+    "4★": (30, 160),
+    "3★": (22, 120),
+    "2★": (15, 90)
+}
+
+
+def make_roster(size: int, seed: int = 1234) -> List[gui.Character]:
+    """Build a deterministic synthetic roster of `size` characters."""
+    rng = random.Random(seed)
+    rarities = list(RARITY_STATS.keys())
+    classes = ["Warrior", "Mage", "Archer", "Knight", "Assassin", "Healer"]
+    roster = []
+    for i in range(size):
+        rarity = rng.choice(rarities)
+        attack, health = RARITY_STATS[rarity]
+        char = gui.Character(f"Bench {rng.choice(classes)} {i}", rarity, attack, health)
+        char.level = rng.randint(1, 60)
+        char.exp = rng.randint(0, char.exp_to_level - 1)
+        roster.append(char)
+    return roster
+
+
+def make_game(size: int) -> gui.GachaGame:
+    game = gui.GachaGame(ledger=Ledger(None))
+    game.characters = make_roster(size)
+    game.selected_character = game.characters[0] if game.characters else None
+    game.ledger.transact(game.account, {"gems": 10 ** 9, "coins": 10 ** 9}, reason="bench")
+    return game
+
+
+# Each scenario puts the game into a state and optionally returns a hook that
+# runs before every frame (e.g. to restart an animation that finished).
+def setup_main_menu(game: gui.GachaGame):
+    game.set_state("main_menu")
+
+
+def setup_character_select(game: gui.GachaGame):
+    game.set_state("character_select")
+
+
+def setup_summon_animation(game: gui.GachaGame):
+    game.set_state("summon")
+    game.perform_summon(True)
+
+    def keep_animating():
+        if not game.summon_animation["active"]:
+            game.perform_summon(True)
+    return keep_animating
+
+
+def setup_battle_prep(game: gui.GachaGame):
+    game.set_state("battle_prep")
+
+
+def setup_shop(game: gui.GachaGame):
+    game.set_state("shop")
+
+
+def setup_battle(game: gui.GachaGame):
+    game.set_state("battle_prep")
+    game.start_battle(game.boss_data[0])
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "main_menu": setup_main_menu,
+    "character_select": setup_character_select,
+    "summon_animation": setup_summon_animation,
+    "battle_prep": setup_battle_prep,
+    "shop": setup_shop,
+    "battle": setup_battle
+}
+
+
+def run_scenario(game: gui.GachaGame, name: str, frames: int, warmup: int = 5) -> float:
+    """Drive one scenario for `frames` frames and return the median ms/frame."""
+    before_frame = SCENARIOS[name](game)
+
+    def frame():
+        if before_frame:
+            before_frame()
+        game.update()
+        game.draw()
+        pygame.display.flip()
+
+    for _ in range(warmup):
+        frame()
+
+    # The median is far less sensitive to scheduler noise on shared CI machines than the mean
+    timings = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        frame()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def machine_info() -> Dict[str, str]:
+    """What the ms/frame numbers depend on besides the code."""
+    cpu = platform.processor()
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+    except OSError:
+        pass
+    return {
+        "cpu": cpu,
+        "cores": str(os.cpu_count()),
+        "system": platform.system(),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver
+    }
+
+
+def load_baseline(path: str) -> tuple:
+    """(machine info, results); files from before machine info was recorded have no machine."""
+    if not os.path.exists(path):
+        return {}, {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if "results" not in data:
+        return {}, data
+    return data["machine"], data["results"]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Headless rendering benchmark for gacha_game_gui")
+    parser.add_argument("--frames", type=int, default=120, help="frames measured per scenario")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="roster sizes to benchmark")
+    parser.add_argument("--states", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed slowdown relative to the baseline (0.5 = 50%%)")
+    parser.add_argument("--min-delta", type=float, default=0.25,
+                        help="ignore regressions smaller than this many ms/frame")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    machine = machine_info()
+    baseline_machine, baseline = load_baseline(args.baseline)
+    mismatched = [f"{name}: baseline {baseline_machine.get(name, 'unknown')}, here {value}"
+                  for name, value in machine.items() if baseline_machine.get(name) != value]
+    if baseline and mismatched:
+        print("Warning: the baseline was measured on a different setup, so regressions are only reported")
+        for line in mismatched:
+            print(f"  {line}")
+        print("Run with --update-baseline to record a baseline for this machine.\n")
+    results: Dict[str, float] = {}
+    regressions = []
+
+    print(f"{'scenario':<32}{'ms/frame':>10}{'baseline':>10}{'change':>9}")
+    for size in args.sizes:
+        game = make_game(size)
+        for state in args.states:
+            key = f"{state}/{size}"
+            ms = run_scenario(game, state, args.frames)
+            results[key] = round(ms, 3)
+
+            base = baseline.get(key)
+            if base:
+                change = (ms - base) / base
+                print(f"{key:<32}{ms:>10.3f}{base:>10.3f}{change:>+9.1%}")
+                if change > args.tolerance and ms - base > args.min_delta:
+                    regressions.append(key)
+            else:
+                print(f"{key:<32}{ms:>10.3f}{'-':>10}{'':>9}")
+
+    if args.update_baseline:
+        if mismatched:
+            baseline = {}  # Don't mix in another machine's numbers
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"machine": machine, "results": baseline}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"\nRegressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 0 if mismatched else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Throughput benchmark for the gem/coin ledger.
+
+Runs the same random mix of debits and credits (5% of them resent with an
+idempotency key already used) against ledgers that commit differently:
+in memory only, buffered, durable with one writer (an fsync per transaction)
+and durable with many concurrent writers, as threads and as asyncio tasks,
+which share group commits. Every on-disk run is reconciled afterwards against
+the ledger's own balances.
+
+    python bench_ledger.py
+    python bench_ledger.py --transactions 200000 --writers 64
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from ledger import Ledger, reconcile
+
+ACCOUNTS = 1000
+START_BALANCE = {"gems": 1000, "coins": 1000}
+
+
+def make_workload(count: int, accounts: int, seed: int = 1) -> List[tuple]:
+    """(account, changes, key) triples; some keys repeat an earlier one, as client retries would."""
+    rng = random.Random(seed)
+    work = []
+    for i in range(count):
+        if work and rng.random() < 0.05:
+            work.append(rng.choice(work))
+            continue
+        account = f"player{rng.randrange(accounts)}"
+        if rng.random() < 0.6:
+            changes = {rng.choice(("gems", "coins")): -rng.choice((100, 500, 1000))}
+        else:
+            changes = {"gems": rng.randint(10, 300), "coins": rng.randint(50, 500)}
+        work.append((account, changes, f"tx{i}"))
+    return work
+
+
+def open_ledger(path, accounts: int) -> Ledger:
+    ledger = Ledger(path)
+    for i in range(accounts):
+        ledger.transact(f"player{i}", START_BALANCE, key=f"player{i}:start")
+    ledger.sync()
+    return ledger
+
+
+def run_buffered(ledger: Ledger, work: List[tuple], writers: int):
+    for account, changes, key in work:
+        ledger.transact(account, changes, key)
+    ledger.sync()
+
+
+def run_durable(ledger: Ledger, work: List[tuple], writers: int):
+    for account, changes, key in work:
+        tx = ledger.transact(account, changes, key)
+        if tx is not None:
+            ledger.sync(tx.seq)
+
+
+def run_threads(ledger: Ledger, work: List[tuple], writers: int):
+    threads = [threading.Thread(target=run_durable, args=(ledger, work[i::writers], 1)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_asyncio(ledger: Ledger, work: List[tuple], writers: int):
+    async def writer(share: List[tuple]):
+        for account, changes, key in share:
+            tx = ledger.transact(account, changes, key)
+            if tx is not None:
+                await ledger.commit(tx.seq)
+
+    async def main():
+        await asyncio.gather(*(writer(work[i::writers]) for i in range(writers)))
+    asyncio.run(main())
+
+
+# name -> (runner, writes to disk, uses `writers` concurrent writers)
+SCENARIOS: Dict[str, tuple] = {
+    "memory": (run_buffered, False, False),
+    "buffered": (run_buffered, True, False),
+    "durable, 1 writer": (run_durable, True, False),
+    "durable, threads": (run_threads, True, True),
+    "durable, asyncio": (run_asyncio, True, True),
+}
+
+
+def run_scenario(name: str, work: List[tuple], accounts: int, writers: int) -> dict:
+    runner, on_disk, concurrent = SCENARIOS[name]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ledger.jsonl") if on_disk else None
+        ledger = open_ledger(path, accounts)
+        seq, flushes = ledger.seq, ledger.flushes
+        start = time.perf_counter()
+        runner(ledger, work, writers if concurrent else 1)
+        elapsed = time.perf_counter() - start
+        ledger.close()
+
+        applied = ledger.seq - seq
+        problems = reconcile(path, ledger.balances)["problems"] if on_disk else []
+        return {
+            "writers": writers if concurrent else 1,
+            "elapsed": elapsed,
+            "tx_per_s": len(work) / elapsed,
+            "applied": applied,
+            "per_fsync": applied / (ledger.flushes - flushes) if ledger.flushes > flushes else 0.0,
+            "problems": problems
+        }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Throughput benchmark for the gem/coin ledger")
+    parser.add_argument("--transactions", type=int, default=50000)
+    parser.add_argument("--accounts", type=int, default=ACCOUNTS)
+    parser.add_argument("--writers", type=int, default=32, help="concurrent writers in the threads/asyncio runs")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    args = parser.parse_args(argv)
+
+    work = make_workload(args.transactions, args.accounts)
+    print(f"{len(work)} transactions over {args.accounts} accounts\n")
+    print(f"{'scenario':<22}{'writers':>8}{'tx/s':>10}{'applied':>9}{'tx/fsync':>10}  reconciled")
+    failed = False
+    for name in args.scenarios:
+        result = run_scenario(name, work, args.accounts, args.writers)
+        ok = "yes" if not result["problems"] else f"NO: {result['problems'][0]}"
+        failed = failed or bool(result["problems"])
+        print(f"{name:<22}{result['writers']:>8}{result['tx_per_s']:>10.0f}{result['applied']:>9}"
+              f"{result['per_fsync']:>10.1f}  {ok}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Cold-start benchmark for gacha_game_gui.
+
+Each run starts a fresh interpreter (so imports and pygame initialization are
+really cold), then times importing the module, constructing GachaGame and
+drawing the first frame under the SDL dummy video driver.
+
+    python bench_startup.py --runs 10
+"""
+import os
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+CHILD_SCRIPT = r"""
+import json, os, time
+start = time.perf_counter()
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+import pygame
+pygame_imported = time.perf_counter()
+import gacha_game_gui as gui
+from ledger import Ledger
+imported = time.perf_counter()
+game = gui.GachaGame(ledger=Ledger(None))
+constructed = time.perf_counter()
+game.update()
+game.draw()
+pygame.display.flip()
+first_frame = time.perf_counter()
+print(json.dumps({
+    "import_pygame": (pygame_imported - start) * 1000,
+    "import_module": (imported - pygame_imported) * 1000,
+    "construct": (constructed - imported) * 1000,
+    "first_frame": (first_frame - constructed) * 1000,
+    "total": (first_frame - start) * 1000
+}))
+"""
+
+PHASES = ["import_pygame", "import_module", "construct", "first_frame", "total", "process"]
+
+
+def run_once() -> dict:
+    env = dict(os.environ)
+    env.setdefault("SDL_VIDEODRIVER", "dummy")
+    env.setdefault("SDL_AUDIODRIVER", "dummy")
+    cwd = os.path.dirname(os.path.abspath(__file__))
+
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT],
+        cwd=cwd, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    process_ms = (time.perf_counter() - start) * 1000
+
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings["process"] = process_ms
+    return timings
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for gacha_game_gui")
+    parser.add_argument("--runs", type=int, default=5, help="number of fresh processes to time")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="fail if the median time to first frame exceeds this many ms")
+    args = parser.parse_args(argv)
+
+    runs = [run_once() for _ in range(args.runs)]
+
+    print(f"{'phase':<16}{'median ms':>10}{'min ms':>10}{'max ms':>10}")
+    for phase in PHASES:
+        values = [run[phase] for run in runs]
+        print(f"{phase:<16}{statistics.median(values):>10.1f}{min(values):>10.1f}{max(values):>10.1f}")
+
+    median_total = statistics.median(run["total"] for run in runs)
+    if args.max_ms is not None and median_total > args.max_ms:
+        print(f"\nCold start to first frame took {median_total:.1f} ms (limit {args.max_ms:.1f} ms)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""Benchmark for storage.py with a 1M-character roster.
+
+Fills one player's roster the way the game server does, one transaction per
+10-pull summon with a single executemany, and compares that with one
+transaction per character and with the statement cache turned off. Then times
+every roster menu query (first and middle page, each sort, with and without a
+rarity filter), the rarity counts, a character update and a material save.
+--no-indexes builds the same database without the roster indexes.
+
+    python bench_storage.py
+    python bench_storage.py --rows 200000 --no-indexes
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+import storage
+from storage import CharacterRow, Storage
+
+RARITY_WEIGHTS = {"2★": 50, "3★": 30, "4★": 15, "5★": 4, "6★": 1}
+CLASSES = ["Warrior", "Mage", "Archer", "Knight", "Assassin", "Healer"]
+MULTI_SUMMON = 10
+
+
+def make_rows(count: int, start: int = 0, seed: int = 1) -> List[CharacterRow]:
+    rng = random.Random(seed)
+    rarities = rng.choices(list(RARITY_WEIGHTS), list(RARITY_WEIGHTS.values()), k=count)
+    return [CharacterRow(start + i, f"Bench {rng.choice(CLASSES)}", rarity, rng.randint(1, 60),
+                         rng.randint(0, 99), rng.randint(12, 55), rng.randint(80, 250), {"exp_to_level": 100})
+            for i, rarity in enumerate(rarities)]
+
+
+def timed(fn: Callable, repeat: int = 1) -> float:
+    """Median milliseconds per call."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def bench_inserts(db: Storage, rows: List[CharacterRow]) -> float:
+    """Rows/s inserting 10-pull batches, one transaction and one executemany each."""
+    player = db.player_id("bench", "whale")
+    start = time.perf_counter()
+    for i in range(0, len(rows), MULTI_SUMMON):
+        db.add_characters(player, rows[i:i + MULTI_SUMMON], banner="standard")
+    return len(rows) / (time.perf_counter() - start)
+
+
+def bench_single_inserts(db: Storage, rows: List[CharacterRow]) -> float:
+    """Rows/s with one transaction per character."""
+    player = db.player_id("bench", "single")
+    start = time.perf_counter()
+    for row in rows:
+        db.add_characters(player, [row])
+    return len(rows) / (time.perf_counter() - start)
+
+
+def bench_bulk_inserts(db: Storage, rows: List[CharacterRow]) -> float:
+    """Rows/s in one transaction and one executemany: the statement is prepared once."""
+    player = db.player_id("bench", "bulk")
+    start = time.perf_counter()
+    db.add_characters(player, rows)
+    return len(rows) / (time.perf_counter() - start)
+
+
+def bench_unprepared_inserts(path: str, rows: List[CharacterRow]) -> float:
+    """Rows/s in one transaction with sqlite3's statement cache off, so every insert is prepared again."""
+    db = sqlite3.connect(path, cached_statements=0)
+    db.execute("INSERT INTO players (game, name, created) VALUES ('bench', 'unprepared', 0)")
+    player = db.execute("SELECT id FROM players WHERE name = 'unprepared'").fetchone()[0]
+    start = time.perf_counter()
+    for r in rows:
+        db.execute(storage.INSERT_CHARACTER, (player, r.slot, r.name, r.rarity, storage.RARITY_RANK[r.rarity],
+                                              r.level, r.exp, r.attack, r.health, "{}"))
+    db.commit()
+    elapsed = time.perf_counter() - start
+    db.close()
+    return len(rows) / elapsed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark storage.py with a large roster")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="characters in the big roster")
+    parser.add_argument("--single-rows", type=int, default=20000,
+                        help="characters inserted one transaction at a time for comparison")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per query (median is reported)")
+    parser.add_argument("--no-indexes", action="store_true", help="leave out the roster indexes")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite")
+        db = Storage(path, indexes=not args.no_indexes)
+        rows = make_rows(args.rows)
+        print(f"Roster of {args.rows:,} characters ({'no indexes' if args.no_indexes else 'indexed'})\n")
+
+        print(f"{'inserts':<40}{'rows/s':>12}")
+        print(f"{'10-pull summons (executemany)':<40}{bench_inserts(db, rows):>12,.0f}")
+        sample = make_rows(args.single_rows, seed=2)
+        print(f"{'one transaction per character':<40}{bench_single_inserts(db, sample):>12,.0f}")
+        print(f"{'one transaction, executemany':<40}{bench_bulk_inserts(db, sample):>12,.0f}")
+        print(f"{'one transaction, statement cache off':<40}{bench_unprepared_inserts(path, sample):>12,.0f}")
+        db.db.execute("PRAGMA optimize")  # Gather the statistics a long-running server would have
+
+        player = db.player_id("bench", "whale")
+        size = db.roster_size(player)
+        print(f"\n{'roster menu query':<40}{'page 1 ms':>12}{'middle ms':>12}")
+        for sort in storage.ROSTER_ORDER:
+            for rarity in (None, "5★"):
+                total = size if rarity is None else db.rarity_counts(player)[storage.RARITY_RANK[rarity]]
+                first = timed(lambda: db.roster(player, sort, rarity), args.repeat)
+                middle = timed(lambda: db.roster(player, sort, rarity, offset=total // 2), max(args.repeat // 4, 1))
+                label = f"{sort}{' + ' + rarity if rarity else ''}"
+                print(f"{label:<40}{first:>12.3f}{middle:>12.3f}")
+
+        print(f"\n{'other':<40}{'ms':>12}")
+        print(f"{'rarity counts':<40}{timed(lambda: db.rarity_counts(player), args.repeat):>12.3f}")
+        print(f"{'roster size':<40}{timed(lambda: db.roster_size(player), args.repeat):>12.3f}")
+        middle_row = db.roster(player, offset=size // 2, limit=1)[0]
+        levelled = middle_row._replace(level=middle_row.level + 1)
+        print(f"{'update one character':<40}{timed(lambda: db.update_characters(player, [levelled]), args.repeat):>12.3f}")
+        materials = {"Dragon Scale": 3, "Phoenix Feather": 1}
+        print(f"{'save materials':<40}{timed(lambda: db.save_materials(player, size // 2, materials), args.repeat):>12.3f}")
+
+        print("\nQuery plans:")
+        for name, plan in db.query_plans().items():
+            print(f"  {name:<24}{plan}")
+        db.close()
+        megabytes = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp)) / 1024 ** 2
+        print(f"\nDatabase size: {megabytes:.0f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Texture atlas of pre-rendered character cards for gacha_game_gui.
+
+Every card has the same size, so the atlas is a grid of equal slots on one
+large surface. A card is rendered into its slot once and re-rendered only when
+the owner's version counter changes; drawing it is a single sub-rect blit. The
+atlas grows (repacking the existing cards into a larger surface) until it
+reaches its capacity, after which the least recently drawn card is evicted and
+its slot is reused for the incoming one.
+"""
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+
+import pygame
+
+DEFAULT_CAPACITY = 128
+DEFAULT_COLUMNS = 8
+
+
+class CardAtlas:
+    def __init__(self, card_size: Tuple[int, int], capacity: int = DEFAULT_CAPACITY,
+                 columns: int = DEFAULT_COLUMNS):
+        self.card_width, self.card_height = card_size
+        self.capacity = capacity
+        self.columns = min(columns, capacity)
+        self.rows = 0
+        self.surface = pygame.Surface((0, 0), pygame.SRCALPHA)
+        self.entries: "OrderedDict[object, Tuple[int, int]]" = OrderedDict()  # key -> (version, slot), LRU order
+        self.free: List[int] = []
+        self.next_slot = 0
+        self.stats: Dict[str, int] = {"hits": 0, "renders": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def slot_rect(self, slot: int) -> pygame.Rect:
+        row, col = divmod(slot, self.columns)
+        return pygame.Rect(col * self.card_width, row * self.card_height, self.card_width, self.card_height)
+
+    def get(self, key, version: int, render: Callable[[pygame.Surface], None]) -> Tuple[pygame.Surface, pygame.Rect]:
+        """(atlas surface, area) holding the card for `key` at `version`.
+
+        `render` draws the card into the blank surface it is given, and is only
+        called when the card is missing or its version changed.
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            if entry[0] == version:
+                self.stats["hits"] += 1
+                return self.surface, self.slot_rect(entry[1])
+            slot = entry[1]
+        else:
+            slot = self.allocate()
+
+        area = self.slot_rect(slot)
+        self.surface.fill((0, 0, 0, 0), area)
+        render(self.surface.subsurface(area))
+        self.entries[key] = (version, slot)
+        self.stats["renders"] += 1
+        return self.surface, area
+
+    def allocate(self) -> int:
+        if self.free:
+            return self.free.pop()
+        if self.next_slot >= self.rows * self.columns:
+            if self.rows * self.columns < self.capacity:
+                self.grow()
+            else:
+                # Full: the least recently drawn card gives up its slot
+                _, (_, slot) = self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+                return slot
+        slot = self.next_slot
+        self.next_slot += 1
+        return slot
+
+    def grow(self):
+        max_rows = (self.capacity + self.columns - 1) // self.columns
+        self.rows = min(max(self.rows * 2, 1), max_rows)
+        surface = pygame.Surface((self.columns * self.card_width, self.rows * self.card_height), pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+            surface.fill((0, 0, 0, 0))
+        # Existing cards keep their slots, so a straight copy repacks them
+        surface.blit(self.surface, (0, 0))
+        self.surface = surface
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.free.append(entry[1])
+
+    def clear(self):
+        self.entries.clear()
+        self.free = []
+        self.next_slot = 0
@@ -0,0 +1,180 @@
+"""Turn-based combat core shared by the pygame client and headless simulations.
+
+Everything here is a pure function over a small immutable BattleState: a turn
+takes a state, an action and a random.Random, and returns the next state plus
+the events that happened in order. Nothing touches pygame, characters or the
+UI, so the GUI can animate the events at its own pace while AI opponents and
+balance sims run thousands of battles per second.
+"""
+import random
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+SKILL_COOLDOWN_TURNS = 3
+CRIT_MULTIPLIER = 1.5
+MAX_TURNS = 200
+
+ATTACK = "attack"
+SKILL = "skill"
+ACTIONS = (ATTACK, SKILL)
+
+
+class Skill(NamedTuple):
+    name: str
+    description: str = ""
+    damage: float = 0.0         # Multiplier of a normal attack (0 = no damage)
+    heal: float = 0.0           # Fraction of max HP restored
+    crit: bool = False          # Guaranteed critical hit
+    defense: float = 0.0        # Fraction of boss damage blocked while the buff lasts
+    defense_turns: int = 0
+    cooldown: int = SKILL_COOLDOWN_TURNS
+    animation: str = ""         # Effect the GUI plays; ignored by the core
+
+
+class BattleState(NamedTuple):
+    player_hp: int
+    player_max_hp: int
+    player_attack: int
+    boss_hp: int
+    boss_attack: int
+    skill: Optional[Skill] = None
+    skill_cooldown: int = 0     # Turns until the skill can be used again
+    defense: float = 0.0
+    defense_turns: int = 0      # Boss attacks the defense buff still applies to
+    turn: int = 0
+    result: Optional[str] = None  # "victory" or "defeat" once the battle is over
+
+
+class Event(NamedTuple):
+    kind: str       # "attack", "skill", "heal", "buff", "boss_attack", "cooldown", "no_skill", "victory", "defeat"
+    amount: int = 0
+    name: str = ""  # Skill name for skill events
+
+
+def start(player_hp: int, player_max_hp: int, player_attack: int, boss_hp: int, boss_attack: int,
+          skill: Optional[Skill] = None) -> BattleState:
+    return BattleState(player_hp, player_max_hp, player_attack, boss_hp, boss_attack, skill)
+
+
+def skill_ready(state: BattleState) -> bool:
+    return state.skill is not None and state.skill_cooldown == 0 and state.result is None
+
+
+def roll_attack(state: BattleState, rng: random.Random) -> int:
+    return rng.randint(state.player_attack - 5, state.player_attack + 12)
+
+
+def roll_boss_attack(state: BattleState, rng: random.Random) -> int:
+    damage = rng.randint(state.boss_attack - 3, state.boss_attack + 8)
+    if state.defense_turns > 0:
+        damage = int(damage * (1 - state.defense))
+    return damage
+
+
+def resolve_turn(state: BattleState, action: str, rng: random.Random) -> Tuple[BattleState, List[Event]]:
+    """Player action followed by the boss counter-attack."""
+    if state.result is not None:
+        return state, []
+
+    events: List[Event] = []
+    skill = state.skill
+    cooldown = state.skill_cooldown
+    defense, defense_turns = state.defense, state.defense_turns
+    player_hp, boss_hp = state.player_hp, state.boss_hp
+
+    if action == SKILL:
+        if skill is None:
+            return state, [Event("no_skill")]
+        if cooldown > 0:
+            return state, [Event("cooldown", cooldown)]
+
+        if skill.heal:
+            healed = min(int(state.player_max_hp * skill.heal), state.player_max_hp - player_hp)
+            player_hp += healed
+            events.append(Event("heal", healed, skill.name))
+        if skill.damage:
+            damage = int(roll_attack(state, rng) * skill.damage)
+            if skill.crit:
+                damage = int(damage * CRIT_MULTIPLIER)
+            boss_hp -= damage
+            events.append(Event("skill", damage, skill.name))
+        if skill.defense_turns:
+            defense, defense_turns = skill.defense, skill.defense_turns
+            events.append(Event("buff", skill.defense_turns, skill.name))
+        cooldown = skill.cooldown
+    else:
+        damage = roll_attack(state, rng)
+        boss_hp -= damage
+        events.append(Event("attack", damage))
+        cooldown = max(cooldown - 1, 0)
+
+    state = state._replace(player_hp=player_hp, boss_hp=boss_hp, skill_cooldown=cooldown,
+                           defense=defense, defense_turns=defense_turns, turn=state.turn + 1)
+    if boss_hp <= 0:
+        events.append(Event("victory"))
+        return state._replace(result="victory"), events
+
+    # Boss counter-attack
+    damage = roll_boss_attack(state, rng)
+    player_hp -= damage
+    events.append(Event("boss_attack", damage))
+    state = state._replace(player_hp=player_hp, defense_turns=max(defense_turns - 1, 0))
+    if player_hp <= 0:
+        events.append(Event("defeat"))
+        return state._replace(result="defeat"), events
+    return state, events
+
+
+Policy = Callable[[BattleState], str]
+
+
+def attack_only(state: BattleState) -> str:
+    return ATTACK
+
+
+def greedy_policy(state: BattleState) -> str:
+    """Use the skill whenever it is ready, but save heals for when HP is below half."""
+    if not skill_ready(state):
+        return ATTACK
+    if state.skill.heal and not state.skill.damage:
+        return SKILL if state.player_hp * 2 < state.player_max_hp else ATTACK
+    return SKILL
+
+
+def simulate(state: BattleState, policy: Policy = greedy_policy, rng: Optional[random.Random] = None,
+             max_turns: int = MAX_TURNS) -> BattleState:
+    """Play a battle to the end without recording events (headless fast path)."""
+    rng = rng or random.Random()
+    while state.result is None and state.turn < max_turns:
+        state, _ = resolve_turn(state, policy(state), rng)
+    if state.result is None:
+        state = state._replace(result="defeat")  # Timed out
+    return state
+
+
+def simulate_batch(state: BattleState, count: int, policy: Policy = greedy_policy,
+                   rng: Optional[random.Random] = None) -> Dict[str, int]:
+    """Play `count` independent battles from the same start; returns {"victory": n, "defeat": n}."""
+    rng = rng or random.Random()
+    results = {"victory": 0, "defeat": 0}
+    for _ in range(count):
+        results[simulate(state, policy, rng).result] += 1
+    return results
+
+
+def victory_rewards(boss_level: int) -> Dict[str, int]:
+    base_exp = boss_level * 50
+    base_coins = boss_level * 30
+    base_gems = max(1, boss_level // 5)  # 1 gem per 5 boss levels, minimum 1
+
+    # Bonus rewards for higher level bosses
+    if boss_level >= 20:
+        base_exp *= 1.5
+        base_coins *= 1.5
+        base_gems *= 2
+
+    return {"exp": int(base_exp), "coins": int(base_coins), "gems": int(base_gems)}
+
+
+def defeat_exp(boss_level: int) -> int:
+    # Some consolation exp for trying
+    return max(10, boss_level * 10)
@@ -0,0 +1,67 @@
+"""Read-only access to the pre-generated lore pack used by the games.
+
+The pack is a JSON file written offline by content_pipeline.py; games only ever
+read it from disk, so a missing or stale pack just means no lore is shown and
+gameplay never waits on the network. Entries are keyed by entity id, e.g.
+"boss:dragon-emperor" or "character:fire-mage".
+"""
+import json
+import os
+import re
+from typing import Dict, Optional
+
+PACK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "content_pack.json")
+PACK_VERSION = 1
+
+
+def slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def entity_id(kind: str, name: str) -> str:
+    return f"{kind}:{slug(name)}"
+
+
+class ContentPack:
+    def __init__(self, entries: Optional[Dict[str, dict]] = None, path: str = PACK_PATH):
+        self.entries: Dict[str, dict] = entries or {}
+        self.path = path
+
+    @classmethod
+    def load(cls, path: str = PACK_PATH) -> "ContentPack":
+        """Load the pack from disk; a missing or unreadable pack is simply empty."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path=path)
+        if data.get("version") != PACK_VERSION:
+            return cls(path=path)
+        return cls(data.get("entries", {}), path)
+
+    def lore(self, kind: str, name: str, default: str = "") -> str:
+        entry = self.entries.get(entity_id(kind, name))
+        return entry["text"] if entry else default
+
+    def save(self):
+        # Write to a temporary file first so a crash never leaves a half-written pack
+        data = {"version": PACK_VERSION, "entries": dict(sorted(self.entries.items()))}
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, self.path)
+
+
+_pack: Optional[ContentPack] = None
+
+
+def get_pack() -> ContentPack:
+    """The shared pack, loaded from disk on first use."""
+    global _pack
+    if _pack is None:
+        _pack = ContentPack.load()
+    return _pack
+
+
+def lore(kind: str, name: str, default: str = "") -> str:
+    return get_pack().lore(kind, name, default)
@@ -0,0 +1,163 @@
+"""Offline lore generation for every character template and boss in the games.
+
+Collects the entities the games can show (hello_world's character pool and
+bosses, the pygame client's bosses and generated summon names), asks the chat
+model for a short piece of lore for each one, and stores the answers in the
+content pack read by content_pack.py. Only entities that are missing, or whose
+prompt changed, are generated, and the pack is saved after every batch so an
+interrupted run keeps its progress.
+
+    python stub_openai_server.py --port 8765 &
+    python content_pipeline.py --base-url http://127.0.0.1:8765/v1
+"""
+import argparse
+import asyncio
+import hashlib
+import sys
+import time
+from typing import Dict, List, NamedTuple
+
+import gacha_game_gui
+import hello_world
+import request_metrics
+import skills
+from content_pack import PACK_PATH, ContentPack, entity_id
+from openai_script import (DEFAULT_CONCURRENCY, DEFAULT_MODEL, ask_with_retry, build_messages,
+                           make_async_client)
+
+BATCH_SIZE = 50
+SYSTEM_PROMPT = "You write short, vivid lore for a fantasy gacha game. Answer with the lore only."
+
+
+class Entity(NamedTuple):
+    kind: str      # "character" or "boss"
+    name: str
+    context: str   # Facts the lore has to agree with
+
+    @property
+    def id(self) -> str:
+        return entity_id(self.kind, self.name)
+
+
+def hello_world_entities() -> List[Entity]:
+    entities = []
+    for rarity, templates in hello_world.GachaGame().characters_pool.items():
+        for name, attack, health in templates:
+            entities.append(Entity("character", name, f"A {rarity} hero with {attack} attack and {health} health."))
+    for boss in hello_world.create_boss_list(1):
+        drops = ", ".join(material.name for material in boss.materials)
+        entities.append(Entity("boss", boss.name, f"Rules {boss.domain}. {boss.description} Drops: {drops}."))
+    return entities
+
+
+def gui_entities() -> List[Entity]:
+    entities = []
+    for boss in gacha_game_gui.BOSS_DATA:
+        entities.append(Entity("boss", boss["name"], f"A {boss['rarity']} level {boss['level']} boss."))
+    for prefix in skills.NAME_PREFIXES:
+        for char_class in skills.CLASSES:
+            skill = skills.CLASS_SKILLS[char_class]
+            entities.append(Entity("character", f"{prefix} {char_class}",
+                                   f"A {prefix.lower()}-aligned {char_class.lower()} whose signature skill is "
+                                   f"{skill.name}: {skill.description}."))
+    return entities
+
+
+def all_entities() -> List[Entity]:
+    # Names shared between the games (e.g. "Fire Mage") get one entry
+    unique: Dict[str, Entity] = {}
+    for entity in hello_world_entities() + gui_entities():
+        unique.setdefault(entity.id, entity)
+    return list(unique.values())
+
+
+def lore_prompt(entity: Entity) -> str:
+    return (f"Write two or three sentences of lore for the {entity.kind} \"{entity.name}\". "
+            f"{entity.context}")
+
+
+def prompt_hash(entity: Entity, model: str) -> str:
+    return hashlib.sha256(f"{model}\n{SYSTEM_PROMPT}\n{lore_prompt(entity)}".encode("utf-8")).hexdigest()[:16]
+
+
+def pending(pack: ContentPack, entities: List[Entity], model: str, force: bool = False) -> List[Entity]:
+    """Entities without lore, or whose lore was generated from a different prompt or model."""
+    if force:
+        return list(entities)
+    return [e for e in entities
+            if pack.entries.get(e.id, {}).get("source") != prompt_hash(e, model)]
+
+
+async def generate(client, pack: ContentPack, entities: List[Entity], model: str = DEFAULT_MODEL,
+                   concurrency: int = DEFAULT_CONCURRENCY, batch_size: int = BATCH_SIZE) -> dict:
+    limit = asyncio.Semaphore(concurrency)
+    totals = {"generated": 0, "failed": 0, "tokens": 0}
+
+    async def generate_one(entity: Entity):
+        messages = build_messages(lore_prompt(entity), SYSTEM_PROMPT)
+        try:
+            stats = await ask_with_retry(client, messages, model, limit)
+        except Exception as e:
+            totals["failed"] += 1
+            print(f"  {entity.id}: {type(e).__name__}: {e}", file=sys.stderr)
+            return
+        pack.entries[entity.id] = {
+            "kind": entity.kind,
+            "name": entity.name,
+            "text": stats["text"].strip(),
+            "model": model,
+            "source": prompt_hash(entity, model)
+        }
+        totals["generated"] += 1
+        totals["tokens"] += (stats["prompt_tokens"] or 0) + (stats["completion_tokens"] or 0)
+
+    for start in range(0, len(entities), batch_size):
+        batch = entities[start:start + batch_size]
+        await asyncio.gather(*(generate_one(entity) for entity in batch))
+        pack.save()  # Checkpoint so an interrupted run keeps finished batches
+        print(f"  {min(start + batch_size, len(entities))}/{len(entities)} done", file=sys.stderr)
+    return totals
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Pre-generate character and boss lore into the content pack")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--base-url", default=None,
+                        help="API base URL, e.g. http://127.0.0.1:8765/v1 for stub_openai_server.py")
+    parser.add_argument("--pack", default=PACK_PATH, help="content pack to update")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="entities generated between saves")
+    parser.add_argument("--force", action="store_true", help="regenerate lore that is already up to date")
+    parser.add_argument("--dry-run", action="store_true", help="list what would be generated and exit")
+    args = parser.parse_args(argv)
+
+    request_metrics.source = "content_pipeline"
+    pack = ContentPack.load(args.pack)
+    entities = all_entities()
+    todo = pending(pack, entities, args.model, args.force)
+    print(f"{len(entities)} entities, {len(todo)} need lore")
+    if args.dry_run:
+        for entity in todo:
+            print(f"  {entity.id}")
+        return 0
+    if not todo:
+        return 0
+
+    client = make_async_client(args.base_url)
+
+    async def run():
+        try:
+            return await generate(client, pack, todo, args.model, args.concurrency, args.batch_size)
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    totals = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    print(f"[{totals['generated']} generated, {totals['failed']} failed in {elapsed:.1f} s | "
+          f"{totals['tokens']} tokens | pack: {args.pack}]")
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,13 +2,16 @@ import random
 import time
 from colorama import init, Fore, Style
 
+from ledger import Ledger
+
 # Initialize colorama for colored output
 init()
 
 class Character:
-    def __init__(self, name, rarity, is_special=False):
+    def __init__(self, name, rarity, is_special=False, verbose=True):
         self.name = name
         self.rarity = rarity
+        self.verbose = verbose  # Print level-ups (off for server-hosted games)
         self.level = 1
         self.exp = 0
         self.exp_to_next_level = 100
@@ -46,9 +49,10 @@ class Character:
         self.exp -= self.exp_to_next_level
         self.level += 1
         self.exp_to_next_level = int(self.exp_to_next_level * 1.2)  # Each level requires more exp
-        stats = self.get_stats()
-        print(f"{Fore.GREEN}🎉 {self.name} leveled up to level {self.level}!")
-        print(f"New stats - Attack: {stats['attack']}, HP: {stats['hp']}{Style.RESET_ALL}")
+        if self.verbose:
+            stats = self.get_stats()
+            print(f"{Fore.GREEN}🎉 {self.name} leveled up to level {self.level}!")
+            print(f"New stats - Attack: {stats['attack']}, HP: {stats['hp']}{Style.RESET_ALL}")
         
     def __str__(self):
         color = {
@@ -74,22 +78,49 @@ class Enemy:
         hp_percent = (self.hp / self.max_hp) * 100
         return f"{self.name} Lv.{self.level} (HP: {self.hp}/{self.max_hp} - {hp_percent:.1f}%) ATK:{self.attack}"
 
+# Coin shop (same prices as the pygame client's shop)
+SHOP_ITEMS = [
+    {"name": "100 Gems", "cost": 1000, "amount": 100, "type": "gems"},
+    {"name": "500 Gems", "cost": 4500, "amount": 500, "type": "gems"},
+    {"name": "EXP Potion", "cost": 500, "amount": 100, "type": "exp"},
+    {"name": "Super EXP Potion", "cost": 1000, "amount": 250, "type": "exp"}
+]
+
+STARTING_BALANCE = {"gems": 1000, "coins": 1000}
+RECENT_BATTLES = 16  # Outcomes kept for battles resent with the same key
+
 class GachaGame:
-    def __init__(self):
+    def __init__(self, verbose=True, ledger=None, account=None):
+        # verbose=False keeps the game silent, for hosting many games in one process (see game_server.py)
+        self.verbose = verbose
         self.characters = []
-        self.player_gems = 1000
+        # Gems and coins live in the ledger; every game is one account there. The characters aren't
+        # saved, so a standalone game keeps its ledger in memory too (the game server passes its own)
+        self.ledger = ledger if ledger is not None else Ledger(None)
+        self.account = account or "gacha_game"
+        self.ledger.transact(self.account, STARTING_BALANCE, key=f"{self.account}:start", reason="starting balance")
         self.summon_cost = 100
         self.inventory = []
+        self.battles = {}  # Idempotency key -> outcome of the most recent keyed battles
         self.selected_character = None
         
         # Initialize character pool
         self.initialize_characters()
         
         # Add special starter character
-        starter_char = Character("The Chosen One", "MYTHIC", is_special=True)
+        starter_char = Character("The Chosen One", "MYTHIC", is_special=True, verbose=verbose)
         self.inventory.append(starter_char)
         self.selected_character = starter_char  # Auto-select the starter character
-        print(f"\n{Fore.LIGHTCYAN_EX}✨ Special Character Unlocked: {starter_char}{Style.RESET_ALL}")
+        if verbose:
+            print(f"\n{Fore.LIGHTCYAN_EX}✨ Special Character Unlocked: {starter_char}{Style.RESET_ALL}")
+    
+    @property
+    def player_gems(self):
+        return self.ledger.balance(self.account, "gems")
+    
+    @property
+    def player_coins(self):
+        return self.ledger.balance(self.account, "coins")
         
     def initialize_characters(self):
         # Normal Characters (N)
@@ -126,12 +157,18 @@ class GachaGame:
             "LR": 1     # 1% chance
         }
     
-    def summon(self):
-        if self.player_gems < self.summon_cost:
-            print(f"{Fore.RED}Not enough gems! You need {self.summon_cost} gems to summon.{Style.RESET_ALL}")
+    def summon(self, key=None):
+        # `key` is the action's idempotency key: a summon already paid for under it is not repeated
+        paid = self.ledger.debit(self.account, "gems", self.summon_cost, key, "summon")
+        if paid is None:
+            if self.verbose:
+                print(f"{Fore.RED}Not enough gems! You need {self.summon_cost} gems to summon.{Style.RESET_ALL}")
             return None
-            
-        self.player_gems -= self.summon_cost
+        if paid.replayed:
+            return None
+        return self.roll_character()
+    
+    def roll_character(self):
         rates = self.get_summon_rates()
         rarity = random.choices(
             list(rates.keys()),
@@ -141,21 +178,20 @@ class GachaGame:
         
         possible_chars = [char for char in self.characters if char.rarity == rarity]
         summoned_char = random.choice(possible_chars)
-        new_char = Character(summoned_char.name, summoned_char.rarity)
+        new_char = Character(summoned_char.name, summoned_char.rarity, verbose=self.verbose)
         self.inventory.append(new_char)
         return new_char
     
-    def multi_summon(self, count=10):
-        if self.player_gems < self.summon_cost * count:
-            print(f"{Fore.RED}Not enough gems! You need {self.summon_cost * count} gems for {count} summons.{Style.RESET_ALL}")
+    def multi_summon(self, count=10, key=None):
+        # One debit for the whole batch, so it is paid for entirely or not at all
+        paid = self.ledger.debit(self.account, "gems", self.summon_cost * count, key, "multi_summon")
+        if paid is None:
+            if self.verbose:
+                print(f"{Fore.RED}Not enough gems! You need {self.summon_cost * count} gems for {count} summons.{Style.RESET_ALL}")
             return []
-            
-        results = []
-        for _ in range(count):
-            result = self.summon()
-            if result:
-                results.append(result)
-        return results
+        if paid.replayed:
+            return []
+        return [self.roll_character() for _ in range(count)]
     
     def show_inventory(self):
         if not self.inventory:
@@ -186,59 +222,148 @@ class GachaGame:
             except ValueError:
                 print(f"{Fore.RED}Please enter a valid number!{Style.RESET_ALL}")
                 
-    def battle(self):
+    def fight(self, key=None):
+        """Resolve a battle for the selected character at once, without printing or pausing.
+
+        Returns the enemy, every turn as (attacker, damage, defender's HP left) and the rewards,
+        or None if no character is selected. `key` is the battle's idempotency key: a battle
+        already fought under it is reported again (marked replayed) instead of being fought and
+        rewarded twice; if its outcome is no longer kept, only {"replayed": True} is returned.
+        """
         if not self.selected_character:
-            print(f"{Fore.RED}No character selected! Please select a character first.{Style.RESET_ALL}")
-            return
+            return None
+        if key is not None and self.ledger.applied(key) is not None:
+            outcome = self.battles.get(key)
+            return dict(outcome, replayed=True) if outcome else {"replayed": True}
             
         # Create an enemy with level close to player's level
         level_range = max(1, self.selected_character.level - 2), self.selected_character.level + 2
         enemy_level = random.randint(*level_range)
         enemy = Enemy(enemy_level)
-        
-        print(f"\n{Fore.YELLOW}=== Battle Start ==={Style.RESET_ALL}")
-        print(f"Your character: {self.selected_character}")
-        print(f"Enemy: {enemy}")
-        
         char_stats = self.selected_character.get_stats()
         char_hp = char_stats['hp']
+        enemy_hp = enemy.hp
+        turns = []
         
         while True:
             # Player turn
-            damage = char_stats['attack']
-            enemy.hp -= damage
-            print(f"\n{Fore.CYAN}Your {self.selected_character.name} attacks for {damage} damage!{Style.RESET_ALL}")
-            print(f"Enemy {enemy}")
-            
-            if enemy.hp <= 0:
+            enemy_hp -= char_stats['attack']
+            turns.append(("player", char_stats['attack'], enemy_hp))
+            if enemy_hp <= 0:
+                victory = True
                 exp_gain = int(50 * (1 + (enemy_level - 1) * 0.2))
                 gems_gain = int(10 * (1 + (enemy_level - 1) * 0.1))
-                print(f"\n{Fore.GREEN}Victory! Gained {exp_gain} EXP and {gems_gain} gems!{Style.RESET_ALL}")
-                self.selected_character.gain_exp(exp_gain)
-                self.player_gems += gems_gain
+                coins_gain = int(50 * (1 + (enemy_level - 1) * 0.2))
                 break
                 
-            time.sleep(1)
-            
             # Enemy turn
             char_hp -= enemy.attack
-            print(f"\n{Fore.RED}{enemy.name} attacks for {enemy.attack} damage!{Style.RESET_ALL}")
-            print(f"Your HP: {char_hp}/{char_stats['hp']}")
-            
+            turns.append(("enemy", enemy.attack, char_hp))
             if char_hp <= 0:
+                victory = False
                 exp_gain = int(20 * (1 + (enemy_level - 1) * 0.2))
-                print(f"\n{Fore.RED}Defeat! Gained {exp_gain} EXP for trying.{Style.RESET_ALL}")
-                self.selected_character.gain_exp(exp_gain)
+                gems_gain = coins_gain = 0
                 break
+        
+        # Defeats pay nothing, but a keyed one is still recorded so the key can't be fought again
+        if victory or key is not None:
+            paid = self.ledger.transact(self.account, {"gems": gems_gain, "coins": coins_gain}, key, "battle")
+            if paid.replayed:
+                return {"replayed": True}
+        self.selected_character.gain_exp(exp_gain)
+        outcome = {"enemy": enemy, "victory": victory, "turns": turns, "replayed": False,
+                   "exp": exp_gain, "gems": gems_gain, "coins": coins_gain, "hp": char_stats['hp']}
+        if key is not None:
+            self.battles[key] = outcome
+            if len(self.battles) > RECENT_BATTLES:
+                del self.battles[next(iter(self.battles))]
+        return outcome
                 
-            time.sleep(1)
+    def battle(self):
+        if not self.selected_character:
+            print(f"{Fore.RED}No character selected! Please select a character first.{Style.RESET_ALL}")
+            return
+        
+        character = self.selected_character
+        stats_before = str(character)
+        level_before = character.level
+        
+        # Resolve first, then narrate; level-ups are announced after the result instead of up front
+        verbose, character.verbose = character.verbose, False
+        result = self.fight()
+        character.verbose = verbose
+        enemy = result["enemy"]
+        
+        print(f"\n{Fore.YELLOW}=== Battle Start ==={Style.RESET_ALL}")
+        print(f"Your character: {stats_before}")
+        print(f"Enemy: {enemy}")
+        
+        # Replay the resolved turns at reading pace
+        for i, (attacker, damage, hp_left) in enumerate(result["turns"]):
+            if i > 0:
+                time.sleep(1)
+            if attacker == "player":
+                enemy.hp = hp_left
+                print(f"\n{Fore.CYAN}Your {character.name} attacks for {damage} damage!{Style.RESET_ALL}")
+                print(f"Enemy {enemy}")
+            else:
+                print(f"\n{Fore.RED}{enemy.name} attacks for {damage} damage!{Style.RESET_ALL}")
+                print(f"Your HP: {hp_left}/{result['hp']}")
+        
+        if result["victory"]:
+            print(f"\n{Fore.GREEN}Victory! Gained {result['exp']} EXP, {result['gems']} gems and {result['coins']} coins!{Style.RESET_ALL}")
+        else:
+            print(f"\n{Fore.RED}Defeat! Gained {result['exp']} EXP for trying.{Style.RESET_ALL}")
+        if character.level > level_before:
+            stats = character.get_stats()
+            print(f"{Fore.GREEN}🎉 {character.name} leveled up to level {character.level}!")
+            print(f"New stats - Attack: {stats['attack']}, HP: {stats['hp']}{Style.RESET_ALL}")
+
+    def purchase(self, item_name, key=None):
+        """Buy a shop item with coins. Returns the item, or None if it doesn't exist or can't be afforded."""
+        item = next((it for it in SHOP_ITEMS if it["name"] == item_name), None)
+        if item is None:
+            return None
+        if item["type"] == "exp" and not self.selected_character:
+            return None
+        
+        # Coins out and gems in are one transaction
+        changes = {"coins": -item["cost"]}
+        if item["type"] == "gems":
+            changes["gems"] = item["amount"]
+        paid = self.ledger.transact(self.account, changes, key, f"buy {item_name}")
+        if paid is None or paid.replayed:
+            return None
+        if item["type"] == "exp":
+            self.selected_character.gain_exp(item["amount"])
+        return item
+    
+    def shop(self):
+        print(f"\n{Fore.CYAN}=== Shop === (Coins: {self.player_coins}){Style.RESET_ALL}")
+        for i, item in enumerate(SHOP_ITEMS, 1):
+            print(f"{i}. {item['name']} - {item['cost']} coins")
+        try:
+            choice = int(input("\nBuy which item? (0 to cancel): "))
+        except ValueError:
+            print(f"{Fore.RED}Please enter a valid number!{Style.RESET_ALL}")
+            return
+        if not 1 <= choice <= len(SHOP_ITEMS):
+            return
+        
+        item = SHOP_ITEMS[choice - 1]
+        if self.purchase(item["name"]):
+            print(f"{Fore.GREEN}Bought {item['name']}!{Style.RESET_ALL}")
+        elif self.player_coins < item["cost"]:
+            print(f"{Fore.RED}Not enough coins!{Style.RESET_ALL}")
+        else:
+            print(f"{Fore.RED}No character selected! Please select a character first.{Style.RESET_ALL}")
 
 def main():
     print(f"{Fore.CYAN}Welcome to Python Gacha Game!{Style.RESET_ALL}")
     game = GachaGame()
     
     while True:
-        print(f"\n{Fore.YELLOW}Your Gems: {game.player_gems}{Style.RESET_ALL}")
+        print(f"\n{Fore.YELLOW}Your Gems: {game.player_gems} | Coins: {game.player_coins}{Style.RESET_ALL}")
         if game.selected_character:
             print(f"Selected Character: {game.selected_character}")
             
@@ -248,9 +373,10 @@ def main():
         print("3. View/Select Character")
         print("4. Battle")
         print("5. View Summon Rates")
-        print("6. Exit")
+        print("6. Shop")
+        print("7. Exit")
         
-        choice = input("\nEnter your choice (1-6): ")
+        choice = input("\nEnter your choice (1-7): ")
         
         if choice == "1":
             print("\n=== Single Summon ===")
@@ -281,6 +407,9 @@ def main():
                 print(f"{rarity}: {rate}%")
                 
         elif choice == "6":
+            game.shop()
+            
+        elif choice == "7":
             print(f"\n{Fore.CYAN}Thanks for playing! Goodbye!{Style.RESET_ALL}")
             break
             
@@ -6,17 +6,85 @@ import sys
 import time
 import random
 import math
+import itertools
+from collections import deque
 from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
-# Initialize Pygame
-pygame.init()
+import combat
+import content_pack
+import skills
+from asset_manager import AssetManager
+from card_atlas import CardAtlas
+from ledger import Ledger
+from particle_pool import ParticlePool
+from roster_index import RosterIndex, RosterView, SORTS
+from ui_layout import Layout, UINode
 
 # Constants
 WINDOW_WIDTH = 1280
 WINDOW_HEIGHT = 720
 FPS = 60
 
+# Game logic runs at a fixed rate, independent of how fast frames are rendered
+SIM_HZ = 60
+SIM_DT = 1.0 / SIM_HZ
+MAX_FRAME_TIME = 0.25  # Clamp long stalls so the simulation can't spiral trying to catch up
+
+# Timings in seconds
+MESSAGE_DURATION = 1.0
+RESULT_MESSAGE_DURATION = 2.0
+SKILL_ANIMATION_DURATION = 0.75
+BATTLE_EVENT_DURATION = 0.6  # Time each queued combat event stays on screen before the next one plays
+AUTO_BATTLE_SPEED = 4.0  # Playback speed-up while auto-battle is on
+SWEEP_COUNT = 10  # Battles resolved by one sweep of a cleared boss
+TITLE_GLOW_SPEED = 120  # Glow layers per second
+TITLE_GLOW_LAYERS = 50
+TITLE_GLOW_FRAMES = 26  # Pre-composited frames spanning 0..TITLE_GLOW_LAYERS layers
+BUTTON_GLOW_SPEED = 60  # Glow levels per second
+BUTTON_GLOW_LEVELS = 20
+BUTTON_GLOW_MARGIN = 20
+
+# Character grid on the character select screen
+CARD_WIDTH = 350
+CARD_HEIGHT = 200
+GRID_COLUMNS = 3
+GRID_GAP = 40
+GRID_ROW_HEIGHT = CARD_HEIGHT + 30
+GRID_VIEWPORT = pygame.Rect(0, 90, WINDOW_WIDTH, WINDOW_HEIGHT - 170)
+SCROLL_SMOOTHING = 12  # Fraction of the remaining distance covered per second (higher is snappier)
+CARD_ATLAS_CAPACITY = 128  # Pre-rendered cards kept in the atlas
+ROSTER_FILTERS = [None, "6★", "5★", "4★", "3★", "2★"]
+
+# Character art (loaded in the background from assets/, see asset_manager.py)
+CARD_SPRITE_SIZE = (80, 80)
+BATTLE_SPRITE_SIZE = (100, 100)
+CHARACTER_ANIMATION_FRAMES = 4  # assets/characters/<class>_<n>.png
+CHARACTER_ANIMATION_FPS = 8
+
+# Summon animation timeline (seconds)
+SUMMON_CONVERGE_END = 1.0
+SUMMON_FLASH_END = 1.5
+SUMMON_RESULT_HOLD = 1.0  # How long the last result (or the full grid) stays up
+SUMMON_MULTI_STEP = 0.5
+SUMMON_GRID_STAGGER = 0.1  # Delay between tiles appearing in "show all" mode
+SUMMON_GRID_HOLD = 2.0
+SUMMON_FAST_FORWARD = 4.0
+SUMMON_PARTICLES = 50
+SUMMON_PARTICLE_CAPACITY = 256
+LORE_WIDTH = 640  # Wrap width for lore text from the content pack
+LORE_COLOR = (200, 200, 220)
+
+BOSS_DATA = [
+    {"name": "Dragon King", "level": 10, "attack": 15, "health": 200, "rarity": "5★"},
+    {"name": "Dark Overlord", "level": 15, "attack": 20, "health": 250, "rarity": "5★"},
+    {"name": "Ancient Golem", "level": 20, "attack": 25, "health": 300, "rarity": "5★"},
+    {"name": "Demon Lord", "level": 25, "attack": 30, "health": 350, "rarity": "6★"}
+]
+
+# Events that trigger a game action (used for input latency reporting)
+ACTION_EVENTS = (pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN)
+
 # Colors
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -27,16 +95,94 @@ GOLD = (255, 215, 0)
 PURPLE = (128, 0, 128)
 GRAY = (128, 128, 128)
 
-# Create display
-screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-pygame.display.set_caption("Gacha Fantasy World")
+# Display is created on first use; only the display and font modules are initialized
+screen = None
+
+def init_display() -> pygame.Surface:
+    global screen
+    if screen is None:
+        pygame.display.init()
+        pygame.font.init()
+        screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        pygame.display.set_caption("Gacha Fantasy World")
+    return screen
+
+# Fonts are loaded the first time they are used
+class LazyFont:
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        self._font = None
+
+    def __getattr__(self, name):
+        # Only called for attributes LazyFont doesn't have itself, i.e. Font methods
+        if self._font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            self._font = pygame.font.Font(self.path, self.size)
+        return getattr(self._font, name)
 
-# Fonts
 FONT_PATH = pygame.font.get_default_font()
-TITLE_FONT = pygame.font.Font(FONT_PATH, 48)
-HEADER_FONT = pygame.font.Font(FONT_PATH, 32)
-NORMAL_FONT = pygame.font.Font(FONT_PATH, 24)
-SMALL_FONT = pygame.font.Font(FONT_PATH, 18)
+TITLE_FONT = LazyFont(FONT_PATH, 48)
+HEADER_FONT = LazyFont(FONT_PATH, 32)
+NORMAL_FONT = LazyFont(FONT_PATH, 24)
+SMALL_FONT = LazyFont(FONT_PATH, 18)
+
+# Gradient backgrounds shared by every GachaGame instance
+_background_cache: Dict[Tuple[int, int], pygame.Surface] = {}
+
+# Composited title glow frames: text -> (frames, offset of the title inside each frame)
+_title_glow_cache: Dict[str, Tuple[List[pygame.Surface], int]] = {}
+
+def title_glow_frames(text: str) -> Tuple[List[pygame.Surface], int]:
+    """The title with 0..TITLE_GLOW_LAYERS fading gold layers stacked above it, one surface per frame."""
+    cached = _title_glow_cache.get(text)
+    if cached is not None:
+        return cached
+    
+    # The glyphs are rendered once; each layer is the same surface blitted with its own alpha
+    glyphs = TITLE_FONT.render(text, True, GOLD)
+    rise = TITLE_GLOW_LAYERS // 2  # Layer i sits i//2 pixels above the title
+    size = (glyphs.get_width(), glyphs.get_height() + rise)
+    frames = []
+    for f in range(TITLE_GLOW_FRAMES):
+        layers = round(f * TITLE_GLOW_LAYERS / (TITLE_GLOW_FRAMES - 1))
+        frame = pygame.Surface(size, pygame.SRCALPHA)
+        # Faintest (highest) layers first so brighter ones composite over them
+        for i in reversed(range(layers)):
+            glyphs.set_alpha(int(255 * (1 - i / layers)))
+            frame.blit(glyphs, (0, rise - i // 2))
+        glyphs.set_alpha(None)
+        frame.blit(glyphs, (0, rise))
+        if pygame.display.get_surface() is not None:
+            frame = frame.convert_alpha()
+        frames.append(frame)
+    
+    _title_glow_cache[text] = (frames, rise)
+    return frames, rise
+
+# Wrapped lore lines from the content pack: (kind, name) -> rendered lines (empty if there is no lore)
+_lore_cache: Dict[Tuple[str, str], List[pygame.Surface]] = {}
+
+def lore_lines(kind: str, name: str) -> List[pygame.Surface]:
+    key = (kind, name)
+    cached = _lore_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    lines = []
+    line = ""
+    for word in content_pack.lore(kind, name).split():
+        candidate = f"{line} {word}" if line else word
+        if line and SMALL_FONT.render(candidate, True, LORE_COLOR).get_width() > LORE_WIDTH:
+            lines.append(SMALL_FONT.render(line, True, LORE_COLOR))
+            candidate = word
+        line = candidate
+    if line:
+        lines.append(SMALL_FONT.render(line, True, LORE_COLOR))
+    
+    _lore_cache[key] = lines
+    return lines
 
 # Particle system
 class Particle:
@@ -47,17 +193,48 @@ class Particle:
         self.speed = random.uniform(0.5, 2)
         self.color = (random.randint(100, 255), random.randint(100, 255), 255)
         self.alpha = random.randint(50, 150)
+        self.prev_y = self.y
 
-    def update(self):
-        self.y -= self.speed
+    def update(self, dt: float):
+        self.prev_y = self.y
+        self.y -= self.speed * SIM_HZ * dt  # speed is in pixels per 60 Hz tick
         if self.y < 0:
             self.y = WINDOW_HEIGHT
+            self.prev_y = self.y
             self.x = random.randint(0, WINDOW_WIDTH)
 
-    def draw(self, screen):
+    def draw(self, screen, alpha: float = 1.0):
+        # Interpolate between the last two simulation steps
+        y = self.prev_y + (self.y - self.prev_y) * alpha
         surface = pygame.Surface((self.size * 2, self.size * 2), pygame.SRCALPHA)
         pygame.draw.circle(surface, (*self.color, self.alpha), (self.size, self.size), self.size)
-        screen.blit(surface, (self.x - self.size, self.y - self.size))
+        screen.blit(surface, (self.x - self.size, y - self.size))
+
+# Pre-baked button glow sprites: (width, height, color) -> one surface per glow level
+_glow_cache: Dict[Tuple[int, int, Tuple[int, int, int]], List[Optional[pygame.Surface]]] = {}
+
+def glow_sprites(width: int, height: int, color: Tuple[int, int, int]) -> List[Optional[pygame.Surface]]:
+    """Glow surfaces for every level 0..BUTTON_GLOW_LEVELS of a button size and color (level 0 is None)."""
+    key = (width, height, color)
+    sprites = _glow_cache.get(key)
+    if sprites is not None:
+        return sprites
+    
+    sprites = [None]
+    size = (width + 2 * BUTTON_GLOW_MARGIN, height + 2 * BUTTON_GLOW_MARGIN)
+    for strength in range(1, BUTTON_GLOW_LEVELS + 1):
+        glow_surface = pygame.Surface(size, pygame.SRCALPHA)
+        for i in range(strength):
+            alpha = int(255 * (1 - i / strength))
+            pygame.draw.rect(glow_surface, (*color, alpha),
+                           (i, i, size[0] - 2*i, size[1] - 2*i),
+                           border_radius=15)
+        if pygame.display.get_surface() is not None:
+            glow_surface = glow_surface.convert_alpha()
+        sprites.append(glow_surface)
+    
+    _glow_cache[key] = sprites
+    return sprites
 
 # Enhanced button class with glowing effect
 @dataclass
@@ -71,40 +248,50 @@ class Button:
     enabled: bool = True
     glow_color: Tuple[int, int, int] = GOLD
     glow_strength: int = 0
+    glow_level: float = field(default=0.0, repr=False)
+    last_draw: float = field(default=0.0, repr=False)
+    text_cache: Optional[tuple] = field(default=None, repr=False)  # (text, shadow surface, text surface)
 
     def draw(self, screen: pygame.Surface, mouse_pos: Tuple[int, int]):
+        # Glow fades in and out by elapsed time, not per drawn frame
+        now = time.perf_counter()
+        step = min(now - self.last_draw, 0.1) * BUTTON_GLOW_SPEED if self.last_draw else 1
+        self.last_draw = now
+        
         color = self.color
         if self.enabled and self.rect.collidepoint(mouse_pos):
             color = self.hover_color
-            self.glow_strength = min(self.glow_strength + 1, 20)
+            self.glow_level = min(self.glow_level + step, BUTTON_GLOW_LEVELS)
         else:
-            self.glow_strength = max(self.glow_strength - 1, 0)
+            self.glow_level = max(self.glow_level - step, 0)
+        self.glow_strength = int(self.glow_level)
 
-        # Draw glow effect
+        # Draw glow effect (one pre-baked sprite per level)
         if self.glow_strength > 0:
-            glow_surface = pygame.Surface((self.rect.width + 40, self.rect.height + 40), pygame.SRCALPHA)
-            for i in range(self.glow_strength):
-                alpha = int(255 * (1 - i / self.glow_strength))
-                pygame.draw.rect(glow_surface, (*self.glow_color, alpha),
-                               (i, i, self.rect.width + 40 - 2*i, self.rect.height + 40 - 2*i),
-                               border_radius=15)
-            screen.blit(glow_surface, (self.rect.x - 20, self.rect.y - 20))
+            glow_surface = glow_sprites(self.rect.width, self.rect.height, self.glow_color)[self.glow_strength]
+            screen.blit(glow_surface, (self.rect.x - BUTTON_GLOW_MARGIN, self.rect.y - BUTTON_GLOW_MARGIN))
         
         # Draw button
         pygame.draw.rect(screen, color, self.rect, border_radius=10)
         pygame.draw.rect(screen, WHITE, self.rect, 2, border_radius=10)
         
-        # Draw text with shadow
-        shadow_surface = self.font.render(self.text, True, BLACK)
-        text_surface = self.font.render(self.text, True, WHITE)
+        # Draw text with shadow (rendered again only when the label changes)
+        if self.text_cache is None or self.text_cache[0] != self.text:
+            self.text_cache = (self.text, self.font.render(self.text, True, BLACK), self.font.render(self.text, True, WHITE))
+        _, shadow_surface, text_surface = self.text_cache
         shadow_rect = shadow_surface.get_rect(center=(self.rect.centerx + 2, self.rect.centery + 2))
         text_rect = text_surface.get_rect(center=self.rect.center)
         screen.blit(shadow_surface, shadow_rect)
         screen.blit(text_surface, text_rect)
 
+_character_ids = itertools.count(1)
+
 class Character:
     def __init__(self, name: str, rarity: str, attack: int, health: int):
+        self.uid = next(_character_ids)
         self.name = name
+        self.char_class = skills.class_of(name)  # Resolved once; None for bosses and unknown names
+        self.skill = skills.skill_of(self.char_class)
         self.rarity = rarity
         self.attack = attack
         self.health = health
@@ -116,6 +303,7 @@ class Character:
         self.sprite = None  # Will hold character sprite
         self.animation_frames = []  # Will hold animation frames
         self.current_frame = 0
+        self.version = 0  # Bumped whenever something shown on the character's card changes
         
         # Add special stats based on rarity
         if rarity == "6★":
@@ -138,14 +326,28 @@ class Character:
         bonus_exp = material.exp_bonus if material else 0
         total_exp = amount + bonus_exp
         self.exp += total_exp
+        self.version += 1
         
-        if self.exp >= self.exp_to_level:
+        # Large grants (e.g. sweep rewards) can be worth several levels
+        leveled = False
+        while self.exp >= self.exp_to_level:
             self.level_up()
-            return True
-        return False
+            leveled = True
+        return leveled
+
+    def heal(self, amount: int) -> int:
+        healed = max(0, min(amount, self.max_health - self.health))
+        self.health += healed
+        self.version += 1
+        return healed
+
+    def take_damage(self, amount: int):
+        self.health -= amount
+        self.version += 1
 
     def level_up(self):
         self.level += 1
+        self.version += 1
         rarity_multiplier = {
             "6★": 2.0,  # Increased multipliers
             "5★": 1.8,
@@ -175,9 +377,15 @@ class Character:
             self.crit_damage = min(self.crit_damage + 0.05, 3.0)  # Cap at 300%
 
 class GachaGame:
-    def __init__(self):
+    def __init__(self, screen: Optional[pygame.Surface] = None, headless: bool = False,
+                 ledger: Optional[Ledger] = None):
+        # Headless games simulate (and can draw) into an offscreen surface without opening a window
+        if screen is None:
+            screen = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)) if headless else init_display()
         self.screen = screen
+        self.headless = headless
         self.clock = pygame.time.Clock()
+        self.render_alpha = 1.0  # Fraction of a simulation step to interpolate by when drawing
         
         # Initialize particles
         self.particles = [Particle() for _ in range(50)]
@@ -209,35 +417,51 @@ class GachaGame:
             "2★": (192, 192, 192, 128)   # N - Silver
         }
 
-        # Title animation
-        self.title_glow = 0
-        self.title_glow_increasing = True
+        # Title animation (glow layers, a function of elapsed time)
+        self.title_glow = 0.0
+        self.title_glow_time = 0.0
         
         # Game state
         self.state = "main_menu"
+        self.running = True  # Cleared by quit_game(); run() exits at the end of the frame
         self.characters = []
         self.selected_character = None
-        self.gems = 1000
-        self.coins = 2000
+        # Gems and coins live in the ledger. The roster isn't saved between runs, so neither are they:
+        # the default ledger is in memory only
+        self.ledger = ledger if ledger is not None else Ledger(None)
+        self.account = "gui"
+        self.ledger.transact(self.account, {"gems": 1000, "coins": 2000}, key=f"{self.account}:start",
+                             reason="starting balance")
         
         # Additional game state
-        self.current_page = 0  # For character list pagination
-        self.chars_per_page = 4
+        # Character list: sorted/filtered views, smooth scrolling and pre-rendered cards
+        self.roster_index = RosterIndex()
+        self.roster_sort = "obtained"
+        self.roster_filter: Optional[str] = None
+        self.roster_scroll = 0.0
+        self.roster_scroll_target = 0.0
+        self.card_atlas = CardAtlas((CARD_WIDTH, CARD_HEIGHT), CARD_ATLAS_CAPACITY)
+        self.battle_prep_slots = 4
         self.current_boss = None
         self.battle_animation_frame = 0
         self.battle_message = ""
-        self.battle_message_timer = 0
+        self.battle_message_timer = 0.0
         
         # Summon animation state
         self.summon_animation = {
             "active": False,
-            "frame": 0,
-            "particles": [],
+            "time": 0.0,
+            "particles": ParticlePool(SUMMON_PARTICLE_CAPACITY),
             "result": None,
             "is_multi": False,
             "results": [],
-            "current_multi_index": 0
+            "current_multi_index": 0,
+            "grid": False,  # Show all results at once instead of one by one
+            "speed": 1.0,
+            "hold_start": 0.0,
+            "end": 0.0
         }
+        self.summon_show_all = False
         
         # Initialize shop items
         self.shop_items = [
@@ -252,12 +476,42 @@ class GachaGame:
         ]
         
         # Initialize boss data
-        self.boss_data = [
-            {"name": "Dragon King", "level": 10, "attack": 15, "health": 200, "rarity": "5★"},
-            {"name": "Dark Overlord", "level": 15, "attack": 20, "health": 250, "rarity": "5★"},
-            {"name": "Ancient Golem", "level": 20, "attack": 25, "health": 300, "rarity": "5★"},
-            {"name": "Demon Lord", "level": 25, "attack": 30, "health": 350, "rarity": "6★"}
-        ]
+        self.boss_data = [dict(boss) for boss in BOSS_DATA]
+        
+        # Input state, updated from the event queue instead of polling the mouse
+        self.mouse_pos = (0, 0)
+        self.last_event_drain = time.perf_counter()
+        self.input_latencies = deque(maxlen=240)
+        
+        # Per-state dispatch tables
+        self.draw_handlers = {
+            "main_menu": self.draw_main_menu,
+            "character_select": self.draw_character_select,
+            "battle": self.draw_battle,
+            "summon": self.draw_summon,
+            "battle_prep": self.draw_battle_prep,
+            "shop": self.draw_shop
+        }
+        self.input_handlers = {
+            "main_menu": self.handle_main_menu_input,
+            "character_select": self.handle_character_select_input,
+            "battle": self.handle_battle_input,
+            "summon": self.handle_summon_input,
+            "battle_prep": self.handle_battle_prep_input,
+            "shop": self.handle_shop_input
+        }
+        
+        # Retained layouts per state, rebuilt only when their layout key changes
+        self.layouts: Dict[str, Layout] = {}
+        self.layout_builders = {
+            "main_menu": self.build_main_menu_layout,
+            "character_select": self.build_character_select_layout,
+            "battle": self.build_battle_layout,
+            "summon": self.build_summon_layout,
+            "battle_prep": self.build_battle_prep_layout,
+            "shop": self.build_shop_layout
+        }
+        self.hovered_node: Optional[UINode] = None
         
         # Load assets
         self.load_assets()
@@ -267,57 +521,46 @@ class GachaGame:
         self.create_character_buttons()
         self.create_battle_buttons()
         
-        # Add skill cooldown and active skill state
+        # Combat: the core resolves whole turns, the GUI plays back the queued events
+        self.battle_state: Optional[combat.BattleState] = None
+        self.battle_queue: deque = deque()
+        self.battle_event_timer = 0.0
+        self.battle_rng = random.Random()
+        self.auto_battle = False
+        self.cleared_bosses = set()  # Names of bosses beaten at least once (these can be swept)
+        
+        # Add skill cooldown (in turns) and active skill state
         self.skill_cooldown = 0
         self.skill_active = False
-        self.skill_animation_frame = 0
-        
-        # Add skill effects dictionary
-        self.skill_effects = {
-            "Warrior": {
-                "name": "Mighty Slash",
-                "damage": 2.0,  # 200% damage
-                "description": "Powerful attack dealing 200% damage"
-            },
-            "Mage": {
-                "name": "Arcane Burst",
-                "damage": 2.5,  # 250% damage
-                "description": "Magical burst dealing 250% damage"
-            },
-            "Archer": {
-                "name": "Precise Shot",
-                "damage": 1.8,  # 180% damage + guaranteed crit
-                "description": "Guaranteed critical hit dealing 180% damage"
-            },
-            "Knight": {
-                "name": "Shield Bash",
-                "damage": 1.5,  # 150% damage + defense buff
-                "description": "Attack and gain 30% defense for 2 turns"
-            },
-            "Assassin": {
-                "name": "Shadow Strike",
-                "damage": 2.2,  # 220% damage
-                "description": "Strike from shadows dealing 220% damage"
-            },
-            "Healer": {
-                "name": "Healing Light",
-                "heal": 0.3,  # Heal 30% max HP
-                "description": "Restore 30% of max HP"
-            }
+        self.skill_animation_time = 0.0
+        
+        # Skill animations by Skill.animation key (skills themselves live in skills.py)
+        self.skill_animations = {
+            "slash": self.draw_slash_skill,
+            "magic_circle": self.draw_magic_circle_skill,
+            "arrow": self.draw_arrow_skill,
+            "shadow": self.draw_shadow_skill,
+            "heal": self.draw_heal_skill,
+            "holy": self.draw_holy_skill,
+            "rage": self.draw_rage_skill,
+            "spirits": self.draw_spirits_skill,
+            "drain": self.draw_drain_skill,
+            "vines": self.draw_vines_skill,
+            "flurry": self.draw_flurry_skill
         }
         
     def load_assets(self):
-        # Load background images
+        # Real art streams in through the asset manager; the surfaces below are the placeholders
+        self.assets = AssetManager()
+        
+        # Load background images (placeholder gradients, all three screens share one surface)
+        gradient = self.create_gradient_background(WINDOW_WIDTH, WINDOW_HEIGHT)
         self.backgrounds = {
-            "main_menu": pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)),  # Placeholder
-            "battle": pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)),     # Placeholder
-            "summon": pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))      # Placeholder
+            "main_menu": gradient,
+            "battle": gradient,
+            "summon": gradient
         }
         
-        # Fill placeholders with gradients
-        for bg in self.backgrounds.values():
-            self.create_gradient_background(bg)
-        
         # Load character sprites (placeholder)
         self.character_sprites = {
             "warrior": pygame.Surface((100, 100)),
@@ -330,15 +573,51 @@ class GachaGame:
         self.character_sprites["mage"].fill(BLUE)
         self.character_sprites["archer"].fill(GREEN)
 
-    def create_gradient_background(self, surface: pygame.Surface):
-        for y in range(WINDOW_HEIGHT):
+    def background(self, name: str) -> pygame.Surface:
+        return self.assets.get(f"backgrounds/{name}.png", (WINDOW_WIDTH, WINDOW_HEIGHT), default=self.backgrounds[name])
+
+    def character_art(self, char: Character, size: Tuple[int, int]) -> Optional[pygame.Surface]:
+        """Current sprite (or animation frame) for a character, or None while its art is loading or missing."""
+        frames = char.animation_frames or self.character_frames(char, size)
+        if frames:
+            return frames[int(char.current_frame) % len(frames)]
+        if char.sprite is not None:
+            return char.sprite
+        if char.char_class is None:
+            return None
+        return self.assets.get(f"characters/{char.char_class.lower()}.png", size, default=None)
+
+    def character_frames(self, char: Character, size: Tuple[int, int]) -> List[pygame.Surface]:
+        if char.char_class is None:
+            return []
+        frames = [
+            self.assets.get(f"characters/{char.char_class.lower()}_{i}.png", size, default=None)
+            for i in range(CHARACTER_ANIMATION_FRAMES)
+        ]
+        # Only animate once every frame has arrived
+        return frames if all(frame is not None for frame in frames) else []
+
+    def create_gradient_background(self, width: int, height: int) -> pygame.Surface:
+        cached = _background_cache.get((width, height))
+        if cached is not None:
+            return cached
+        
+        # Build a single 1px wide column and stretch it to full width in one scaled blit
+        column = pygame.Surface((1, height))
+        for y in range(height):
             # Create a more vibrant gradient
             color = (
-                int(40 + (y / WINDOW_HEIGHT) * 60),  # More red
-                int(0 + (y / WINDOW_HEIGHT) * 40),   # More blue
-                int(80 + (y / WINDOW_HEIGHT) * 100)  # More purple
+                int(40 + (y / height) * 60),  # More red
+                int(0 + (y / height) * 40),   # More blue
+                int(80 + (y / height) * 100)  # More purple
             )
-            pygame.draw.line(surface, color, (0, y), (WINDOW_WIDTH, y))
+            column.set_at((0, y), color)
+        background = pygame.transform.scale(column, (width, height))
+        if pygame.display.get_surface() is not None:
+            background = background.convert()
+        
+        _background_cache[(width, height)] = background
+        return background
 
     def create_buttons(self):
         button_width = 200
@@ -390,29 +669,75 @@ class GachaGame:
                 ("Back", lambda: self.set_state("main_menu"))
             ])
         ]
+        
+        # Controls shown while a summon animation plays
+        self.summon_animation_buttons = [
+            Button(pygame.Rect(20, WINDOW_HEIGHT - 60, 200, 40), "Show All: Off", BLUE, PURPLE,
+                   NORMAL_FONT, self.toggle_summon_show_all),
+            Button(pygame.Rect(WINDOW_WIDTH - 330, WINDOW_HEIGHT - 60, 170, 40), "Speed x1", BLUE, PURPLE,
+                   NORMAL_FONT, self.toggle_summon_fast_forward),
+            Button(pygame.Rect(WINDOW_WIDTH - 140, WINDOW_HEIGHT - 60, 120, 40), "Skip", RED, PURPLE,
+                   NORMAL_FONT, self.skip_summon_animation)
+        ]
 
-    def create_character_buttons(self):
-        button_width = 150
-        button_height = 40
-        spacing = 10
+        # Sweep buttons under each boss card; only shown once the boss has been beaten
+        self.sweep_buttons = []
+        for boss, rect in zip(self.boss_data, self.boss_card_rects()):
+            button = Button(
+                pygame.Rect(rect.x, rect.bottom + 10, rect.width, 40),
+                f"Sweep x{SWEEP_COUNT}",
+                GREEN,
+                PURPLE,
+                NORMAL_FONT,
+                lambda b=boss: self.sweep_boss(b),
+                enabled=False
+            )
+            self.sweep_buttons.append(button)
         
-        # Navigation buttons
+        # Back buttons for the battle prep and shop screens
+        self.battle_prep_back_button = Button(
+            pygame.Rect(20, 20, 100, 40),
+            "Back",
+            RED,
+            PURPLE,
+            NORMAL_FONT,
+            lambda: self.set_state("main_menu")
+        )
+        self.shop_back_button = Button(
+            pygame.Rect(20, WINDOW_HEIGHT - 60, 100, 40),
+            "Back",
+            RED,
+            PURPLE,
+            NORMAL_FONT,
+            lambda: self.set_state("main_menu")
+        )
+
+    def create_character_buttons(self):
+        # Sort, filter and jump controls
         self.character_nav_buttons = [
             Button(
-                pygame.Rect(20, WINDOW_HEIGHT - 60, 100, 40),
-                "Previous",
+                pygame.Rect(20, WINDOW_HEIGHT - 60, 200, 40),
+                "Sort: Obtained",
                 BLUE,
                 PURPLE,
                 NORMAL_FONT,
-                lambda: self.change_page(-1)
+                self.cycle_roster_sort
             ),
             Button(
-                pygame.Rect(WINDOW_WIDTH - 120, WINDOW_HEIGHT - 60, 100, 40),
-                "Next",
+                pygame.Rect(240, WINDOW_HEIGHT - 60, 200, 40),
+                "Filter: All",
                 BLUE,
                 PURPLE,
                 NORMAL_FONT,
-                lambda: self.change_page(1)
+                self.cycle_roster_filter
+            ),
+            Button(
+                pygame.Rect(WINDOW_WIDTH - 240, WINDOW_HEIGHT - 60, 220, 40),
+                "Jump to Selected",
+                BLUE,
+                PURPLE,
+                NORMAL_FONT,
+                self.jump_to_selected
             ),
             Button(
                 pygame.Rect(20, 20, 100, 40),
@@ -450,6 +775,14 @@ class GachaGame:
                 NORMAL_FONT,
                 self.use_item
             ),
+            Button(
+                pygame.Rect(350, WINDOW_HEIGHT - 60, 130, 40),
+                "Auto: Off",
+                BLUE,
+                PURPLE,
+                NORMAL_FONT,
+                self.toggle_auto_battle
+            ),
             Button(
                 pygame.Rect(20, 20, 100, 40),
                 "Retreat",
@@ -460,6 +793,14 @@ class GachaGame:
             )
         ]
 
+    @property
+    def gems(self) -> int:
+        return self.ledger.balance(self.account, "gems")
+
+    @property
+    def coins(self) -> int:
+        return self.ledger.balance(self.account, "coins")
+
     def set_state(self, new_state: str):
         # Reset battle state when leaving battle
         if self.state == "battle" and new_state != "battle":
@@ -469,45 +810,209 @@ class GachaGame:
             self.skill_cooldown = 0
             self.skill_active = False
             self.battle_message = ""
-            self.battle_message_timer = 0
+            self.battle_message_timer = 0.0
+            self.battle_state = None
+            self.battle_queue.clear()
+            self.battle_event_timer = 0.0
         
         self.state = new_state
         # Additional state initialization can be done here
 
     def quit_game(self):
-        pygame.quit()
-        sys.exit()
+        # run() finishes the frame, prints the latency summary and shuts the asset loader down
+        self.running = False
+
+    def layout_key(self, state: str):
+        # Screens showing part of the roster depend on the roster view and, for the grid, the scroll
+        if state in ("character_select", "battle_prep"):
+            view = self.roster_view()
+            key = (self.roster_sort, self.roster_filter, self.roster_index.version, len(view))
+            if state == "character_select":
+                key += (int(self.roster_scroll),)
+            return key
+        if state == "summon":
+            return self.summon_animation["active"]
+        return None
+
+    def get_layout(self, state: Optional[str] = None) -> Optional[Layout]:
+        state = state or self.state
+        builder = self.layout_builders.get(state)
+        if builder is None:
+            return None
+        
+        key = self.layout_key(state)
+        layout = self.layouts.get(state)
+        if layout is None or layout.key != key:
+            root = UINode(state, self.screen.get_rect(), children=builder())
+            layout = Layout(root, key, (WINDOW_WIDTH, WINDOW_HEIGHT))
+            self.layouts[state] = layout
+        return layout
+
+    def click_layout(self, pos: Tuple[int, int]) -> Optional[UINode]:
+        node = self.get_layout().hit(pos)
+        if node and node.action:
+            node.action()
+        return node
+
+    def roster_view(self) -> RosterView:
+        """The roster in the current sort order and filter, without copying it."""
+        self.roster_index.sync(self.characters)
+        return self.roster_index.view(self.roster_sort, self.roster_filter)
+
+    def on_character_changed(self, char: "Character"):
+        # Levels feed the sort order, so re-position the character in the sorted views
+        self.roster_index.update(char)
+
+    def visible_characters(self) -> List[Tuple[int, "Character"]]:
+        # Battle prep offers the top of the current character list
+        view = self.roster_view()
+        return [(i, view[i]) for i in range(min(self.battle_prep_slots, len(view)))]
+
+    def visible_roster_cards(self, count: int) -> List[Tuple[int, pygame.Rect]]:
+        """(view index, card rect) for every card intersecting the scrolled grid viewport."""
+        scroll = int(self.roster_scroll)
+        first_row = scroll // GRID_ROW_HEIGHT
+        last_row = (scroll + GRID_VIEWPORT.height) // GRID_ROW_HEIGHT
+        left = (WINDOW_WIDTH - (GRID_COLUMNS * CARD_WIDTH + (GRID_COLUMNS - 1) * GRID_GAP)) // 2
+        
+        cards = []
+        for row in range(first_row, last_row + 1):
+            for col in range(GRID_COLUMNS):
+                index = row * GRID_COLUMNS + col
+                if index >= count:
+                    return cards
+                card_rect = pygame.Rect(
+                    left + col * (CARD_WIDTH + GRID_GAP),
+                    GRID_VIEWPORT.y + row * GRID_ROW_HEIGHT - scroll,
+                    CARD_WIDTH,
+                    CARD_HEIGHT
+                )
+                if card_rect.colliderect(GRID_VIEWPORT):
+                    cards.append((index, card_rect))
+        return cards
+
+    def max_roster_scroll(self, count: int) -> float:
+        rows = (count + GRID_COLUMNS - 1) // GRID_COLUMNS
+        return max(0.0, float(rows * GRID_ROW_HEIGHT - GRID_VIEWPORT.height))
+
+    def scroll_roster(self, delta: float):
+        max_scroll = self.max_roster_scroll(len(self.roster_view()))
+        self.roster_scroll_target = min(max(self.roster_scroll_target + delta, 0.0), max_scroll)
+
+    def jump_to_index(self, index: int, smooth: bool = True):
+        """Scroll the character grid so the card at `index` of the current view is centered."""
+        max_scroll = self.max_roster_scroll(len(self.roster_view()))
+        row = index // GRID_COLUMNS
+        target = row * GRID_ROW_HEIGHT - (GRID_VIEWPORT.height - GRID_ROW_HEIGHT) / 2
+        self.roster_scroll_target = min(max(target, 0.0), max_scroll)
+        if not smooth:
+            self.roster_scroll = self.roster_scroll_target
+
+    def jump_to_selected(self):
+        if not self.selected_character:
+            return
+        self.roster_view()
+        index = self.roster_index.position(self.selected_character, self.roster_sort, self.roster_filter)
+        if index is not None:
+            self.jump_to_index(index)
+
+    def cycle_roster_sort(self):
+        self.roster_sort = SORTS[(SORTS.index(self.roster_sort) + 1) % len(SORTS)]
+        self.character_nav_buttons[0].text = f"Sort: {self.roster_sort.title()}"
+        self.jump_to_index(0, smooth=False)
+
+    def cycle_roster_filter(self):
+        self.roster_filter = ROSTER_FILTERS[(ROSTER_FILTERS.index(self.roster_filter) + 1) % len(ROSTER_FILTERS)]
+        self.character_nav_buttons[1].text = f"Filter: {self.roster_filter or 'All'}"
+        self.jump_to_index(0, smooth=False)
+
+    def select_character(self, char: "Character"):
+        self.selected_character = char
+
+    def select_boss(self, boss: dict):
+        # Bosses can only be picked once a character is selected
+        if self.selected_character:
+            self.start_battle(boss)
+
+    def build_main_menu_layout(self) -> List[UINode]:
+        return [UINode.from_button(button) for button in self.main_menu_buttons]
+
+    def build_summon_layout(self) -> List[UINode]:
+        buttons = self.summon_animation_buttons if self.summon_animation["active"] else self.summon_buttons
+        return [UINode.from_button(button) for button in buttons]
+
+    def build_battle_layout(self) -> List[UINode]:
+        return [UINode.from_button(button) for button in self.battle_buttons]
+
+    def build_character_select_layout(self) -> List[UINode]:
+        # Only cards inside the viewport exist; their hit rects are clipped to it
+        view = self.roster_view()
+        nodes = []
+        for index, card_rect in self.visible_roster_cards(len(view)):
+            char = view[index]
+            nodes.append(UINode(f"card{index}", card_rect.clip(GRID_VIEWPORT), "roster_card",
+                                lambda c=char: self.select_character(c), payload=(char, card_rect)))
+        
+        # Navigation buttons sit on top of the cards
+        nodes.extend(UINode.from_button(button) for button in self.character_nav_buttons)
+        return nodes
+
+    def boss_card_rects(self) -> List[pygame.Rect]:
+        boss_spacing = 20
+        total_boss_width = sum(250 for _ in self.boss_data) + boss_spacing * (len(self.boss_data) - 1)
+        start_x = (WINDOW_WIDTH - total_boss_width) // 2
+        return [pygame.Rect(start_x + i * (250 + boss_spacing), 550, 230, 100) for i in range(len(self.boss_data))]
+
+    def build_battle_prep_layout(self) -> List[UINode]:
+        nodes = [UINode.from_button(self.battle_prep_back_button)]
+        
+        for i, (boss, rect) in enumerate(zip(self.boss_data, self.boss_card_rects())):
+            nodes.append(UINode(f"boss{i}", rect, "boss",
+                                lambda b=boss: self.select_boss(b), payload=boss))
+        nodes.extend(UINode.from_button(button) for button in self.sweep_buttons)
+        
+        # Cards come last so they take click priority where they overlap the boss row
+        for i, char in self.visible_characters():
+            x = 50 + (i % 2) * 400
+            y = 180 + (i // 2) * 250
+            nodes.append(UINode(f"card{i}", pygame.Rect(x, y, 350, 200), "card",
+                                lambda c=char: self.select_character(c), payload=char))
+        return nodes
+
+    def build_shop_layout(self) -> List[UINode]:
+        items_per_row = 4
+        item_width = 250
+        item_height = 150
+        spacing = 30
+        start_y = 120
+        
+        nodes = []
+        for i, item in enumerate(self.shop_items):
+            row = i // items_per_row
+            col = i % items_per_row
+            
+            x = (WINDOW_WIDTH - (items_per_row * item_width + (items_per_row - 1) * spacing)) // 2 + col * (item_width + spacing)
+            y = start_y + row * (item_height + spacing)
+            nodes.append(UINode(item["name"], pygame.Rect(x, y, item_width, item_height), "item",
+                                lambda it=item: self.purchase_item(it), payload=item))
+        
+        nodes.append(UINode.from_button(self.shop_back_button))
+        return nodes
 
     def draw_main_menu(self):
         # Draw background
-        self.screen.blit(self.backgrounds["main_menu"], (0, 0))
+        self.screen.blit(self.background("main_menu"), (0, 0))
         
-        # Update and draw particles
+        # Draw particles
         for particle in self.particles:
-            particle.update()
-            particle.draw(self.screen)
-        
-        # Animate title glow
-        if self.title_glow_increasing:
-            self.title_glow = min(self.title_glow + 2, 50)
-            if self.title_glow >= 50:
-                self.title_glow_increasing = False
-        else:
-            self.title_glow = max(self.title_glow - 2, 0)
-            if self.title_glow <= 0:
-                self.title_glow_increasing = True
-        
-        # Draw title with glow effect
-        title_text = "Gacha Fantasy World"
-        for i in range(self.title_glow):
-            alpha = int(255 * (1 - i / self.title_glow))
-            title_glow = TITLE_FONT.render(title_text, True, (*GOLD, alpha))
-            title_rect = title_glow.get_rect(center=(WINDOW_WIDTH // 2, 100 - i//2))
-            self.screen.blit(title_glow, title_rect)
-        
-        title = TITLE_FONT.render(title_text, True, GOLD)
-        title_rect = title.get_rect(center=(WINDOW_WIDTH // 2, 100))
-        self.screen.blit(title, title_rect)
+            particle.draw(self.screen, self.render_alpha)
+        
+        # Draw title with glow effect (pre-composited frame)
+        frames, rise = title_glow_frames("Gacha Fantasy World")
+        frame = frames[round(self.title_glow / TITLE_GLOW_LAYERS * (len(frames) - 1))]
+        title_rect = frame.get_rect(centerx=WINDOW_WIDTH // 2)
+        title_rect.centery = 100 - rise // 2
+        self.screen.blit(frame, title_rect)
         
         # Draw currency with icons and formatting
         gem_icon = "💎"
@@ -525,51 +1030,76 @@ class GachaGame:
             self.screen.blit(text, text_rect)
         
         # Draw buttons
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = self.mouse_pos
         for button in self.main_menu_buttons:
             button.draw(self.screen, mouse_pos)
 
     def handle_main_menu_input(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            mouse_pos = pygame.mouse.get_pos()
-            for button in self.main_menu_buttons:
-                if button.enabled and button.rect.collidepoint(mouse_pos):
-                    button.action()
+            self.click_layout(event.pos)
 
     def draw_character_select(self):
         # Draw background
-        self.screen.blit(self.backgrounds["main_menu"], (0, 0))
+        self.screen.blit(self.background("main_menu"), (0, 0))
         
         # Draw title
         title = HEADER_FONT.render("Character Selection", True, GOLD)
         title_rect = title.get_rect(center=(WINDOW_WIDTH // 2, 50))
         self.screen.blit(title, title_rect)
         
-        # Draw character slots
-        start_idx = self.current_page * self.chars_per_page
-        end_idx = min(start_idx + self.chars_per_page, len(self.characters))
-        
-        for i, char in enumerate(self.characters[start_idx:end_idx]):
-            # Calculate position
-            x = (WINDOW_WIDTH // 2) - 400 + (i % 2) * 400
-            y = 150 + (i // 2) * 250
-            
-            # Draw character card
-            self.draw_character_card(char, x, y, char == self.selected_character)
+        view = self.roster_view()
+        count_text = SMALL_FONT.render(f"{len(view):,} characters", True, WHITE)
+        self.screen.blit(count_text, count_text.get_rect(topright=(WINDOW_WIDTH - 20, 40)))
+        
+        # Draw only the character cards inside the scrolled viewport
+        self.screen.set_clip(GRID_VIEWPORT)
+        for node in self.get_layout().nodes("roster_card"):
+            char, card_rect = node.payload
+            self.draw_character_card(char, card_rect.x, card_rect.y, char == self.selected_character)
+        self.screen.set_clip(None)
+        
+        if not view:
+            msg = NORMAL_FONT.render("No characters to show.", True, WHITE)
+            self.screen.blit(msg, msg.get_rect(center=GRID_VIEWPORT.center))
+        
+        # Draw scrollbar
+        max_scroll = self.max_roster_scroll(len(view))
+        if max_scroll > 0:
+            track = pygame.Rect(WINDOW_WIDTH - 14, GRID_VIEWPORT.y, 6, GRID_VIEWPORT.height)
+            thumb_height = max(30, int(track.height * GRID_VIEWPORT.height / (max_scroll + GRID_VIEWPORT.height)))
+            thumb_y = track.y + int((track.height - thumb_height) * min(self.roster_scroll / max_scroll, 1.0))
+            pygame.draw.rect(self.screen, (40, 20, 60), track, border_radius=3)
+            pygame.draw.rect(self.screen, GOLD, (track.x, thumb_y, track.width, thumb_height), border_radius=3)
         
         # Draw navigation buttons
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = self.mouse_pos
         for button in self.character_nav_buttons:
-            button.enabled = (
-                (button.text != "Previous" or self.current_page > 0) and
-                (button.text != "Next" or (self.current_page + 1) * self.chars_per_page < len(self.characters))
-            )
+            if button.action == self.jump_to_selected:
+                button.enabled = self.selected_character is not None
             button.draw(self.screen, mouse_pos)
 
     def draw_character_card(self, char: Character, x: int, y: int, selected: bool):
+        # Cards are pre-rendered into the atlas; only the selection glow (which extends past the card) is drawn live
+        # Newly loaded art (assets.generation) also invalidates the card
+        version = (char.version, self.assets.generation)
+        atlas, area = self.card_atlas.get(char.uid, version, lambda surface: self.render_character_card(char, surface))
+        self.screen.blit(atlas, (x, y), area)
+        
+        # Draw glowing border for selected cards
+        if selected:
+            bg_color = self.rarity_colors.get(char.rarity, GRAY)
+            card_rect = pygame.Rect(x, y, CARD_WIDTH, CARD_HEIGHT)
+            for i in range(3):
+                alpha = 255 - i * 60
+                border_rect = card_rect.inflate(i * 4, i * 4)
+                pygame.draw.rect(self.screen, (*bg_color, alpha), border_rect, 2, border_radius=15)
+
+    def render_character_card(self, char: Character, surface: pygame.Surface):
+        x, y = 0, 0
+        
         # Draw card background with enhanced gradient
-        card_width = 350
-        card_height = 200
+        card_width = CARD_WIDTH
+        card_height = CARD_HEIGHT
         card_rect = pygame.Rect(x, y, card_width, card_height)
         
         # Get rarity color
@@ -589,17 +1119,11 @@ class GachaGame:
             pygame.draw.line(gradient_surface, gradient_color, (0, i), (card_width, i))
         
         # Draw base card with rounded corners
-        pygame.draw.rect(self.screen, (20, 10, 30), card_rect, border_radius=15)
-        self.screen.blit(gradient_surface, card_rect, special_flags=pygame.BLEND_ALPHA_SDL2)
+        pygame.draw.rect(surface, (20, 10, 30), card_rect, border_radius=15)
+        surface.blit(gradient_surface, card_rect, special_flags=pygame.BLEND_ALPHA_SDL2)
         
-        # Draw glowing border for selected cards
-        if selected:
-            for i in range(3):
-                alpha = 255 - i * 60
-                border_rect = card_rect.inflate(i * 4, i * 4)
-                pygame.draw.rect(self.screen, (*bg_color, alpha), border_rect, 2, border_radius=15)
-        else:
-            pygame.draw.rect(self.screen, (*bg_color, 255), card_rect, 2, border_radius=15)
+        # Draw border
+        pygame.draw.rect(surface, (*bg_color, 255), card_rect, 2, border_radius=15)
         
         # Draw rarity badge with glow
         rarity_width = 60
@@ -609,25 +1133,26 @@ class GachaGame:
         # Draw rarity badge glow
         for i in range(3):
             glow_rect = rarity_rect.inflate(i * 4, i * 4)
-            pygame.draw.rect(self.screen, (*bg_color, 100 - i * 30), glow_rect, border_radius=5)
+            pygame.draw.rect(surface, (*bg_color, 100 - i * 30), glow_rect, border_radius=5)
         
-        pygame.draw.rect(self.screen, bg_color, rarity_rect, border_radius=5)
-        pygame.draw.rect(self.screen, WHITE, rarity_rect, 1, border_radius=5)
+        pygame.draw.rect(surface, bg_color, rarity_rect, border_radius=5)
+        pygame.draw.rect(surface, WHITE, rarity_rect, 1, border_radius=5)
         
         rarity_text = SMALL_FONT.render(char.rarity, True, WHITE)
         rarity_text_rect = rarity_text.get_rect(center=rarity_rect.center)
-        self.screen.blit(rarity_text, rarity_text_rect)
+        surface.blit(rarity_text, rarity_text_rect)
         
         # Draw character sprite with glow effect
-        sprite_rect = pygame.Rect(x + 10, y + 10, 80, 80)
-        if char.sprite:
-            self.screen.blit(char.sprite, sprite_rect)
+        sprite_rect = pygame.Rect(x + 10, y + 10, *CARD_SPRITE_SIZE)
+        sprite = self.character_art(char, CARD_SPRITE_SIZE)
+        if sprite:
+            surface.blit(sprite, sprite_rect)
         else:
             # Draw placeholder with glow
             for i in range(3):
                 glow_rect = sprite_rect.inflate(i * 4, i * 4)
-                pygame.draw.rect(self.screen, (*bg_color, 100 - i * 30), glow_rect)
-            pygame.draw.rect(self.screen, bg_color, sprite_rect)
+                pygame.draw.rect(surface, (*bg_color, 100 - i * 30), glow_rect)
+            pygame.draw.rect(surface, bg_color, sprite_rect)
         
         # Draw character info with enhanced styling
         name_text = NORMAL_FONT.render(char.name, True, WHITE)
@@ -645,8 +1170,8 @@ class GachaGame:
         
         for text_surface, pos_y, font, text_str in texts:
             shadow = font.render(text_str, True, BLACK)
-            self.screen.blit(shadow, (x + 102, pos_y + 2))
-            self.screen.blit(text_surface, (x + 100, pos_y))
+            surface.blit(shadow, (x + 102, pos_y + 2))
+            surface.blit(text_surface, (x + 100, pos_y))
         
         # Draw exp bar with enhanced styling
         exp_bar_rect = pygame.Rect(x + 100, y + 140, 200, 20)
@@ -660,7 +1185,7 @@ class GachaGame:
                 max(30 - i, 0)
             )
             pygame.draw.line(exp_bg_surface, color, (0, i), (exp_bar_rect.width, i))
-        self.screen.blit(exp_bg_surface, exp_bar_rect)
+        surface.blit(exp_bg_surface, exp_bar_rect)
         
         # Draw exp fill with gradient and glow
         exp_ratio = char.exp / char.exp_to_level
@@ -681,19 +1206,19 @@ class GachaGame:
                     int(bg_color[2] * (1 - progress * 0.3))
                 )
                 pygame.draw.line(exp_fill_surface, color, (0, i), (exp_fill_rect.width, i))
-            self.screen.blit(exp_fill_surface, exp_fill_rect)
+            surface.blit(exp_fill_surface, exp_fill_rect)
             
             # Add glow to filled portion
             glow_surf = pygame.Surface((exp_fill_rect.width, exp_fill_rect.height), pygame.SRCALPHA)
             pygame.draw.rect(glow_surf, (*bg_color, 100), (0, 0, exp_fill_rect.width, exp_fill_rect.height))
-            self.screen.blit(glow_surf, exp_fill_rect, special_flags=pygame.BLEND_ADD)
+            surface.blit(glow_surf, exp_fill_rect, special_flags=pygame.BLEND_ADD)
         
         # Draw exp bar border
-        pygame.draw.rect(self.screen, WHITE, exp_bar_rect, 1)
+        pygame.draw.rect(surface, WHITE, exp_bar_rect, 1)
 
     def draw_battle(self):
         # Draw background
-        self.screen.blit(self.backgrounds["battle"], (0, 0))
+        self.screen.blit(self.background("battle"), (0, 0))
         
         if not self.selected_character or not self.current_boss:
             return
@@ -708,6 +1233,10 @@ class GachaGame:
         boss_y = 100
         self.draw_battle_character(self.current_boss, boss_x, boss_y, False)
         
+        # Boss lore from the content pack, if it has been generated
+        for i, line in enumerate(lore_lines("boss", self.current_boss.name)):
+            self.screen.blit(line, (150, 30 + i * 22))
+        
         # Draw battle message
         if self.battle_message and self.battle_message_timer > 0:
             msg_text = HEADER_FONT.render(self.battle_message, True, WHITE)
@@ -718,18 +1247,24 @@ class GachaGame:
         if self.skill_active:
             self.draw_skill_animation(char_x, char_y, boss_x, boss_y)
         
-        # Draw buttons (disabled if battle ended)
-        mouse_pos = pygame.mouse.get_pos()
+        # Draw buttons (disabled if battle ended or while the last turn is still playing out)
+        mouse_pos = self.mouse_pos
+        manual = not self.battle_queue and not self.auto_battle
         for button in self.battle_buttons:
             if self.battle_ended:
                 button.enabled = button.text == "Retreat"
+            elif button.action == self.toggle_auto_battle:
+                button.enabled = True
             elif button.text == "Skill":
-                button.enabled = self.skill_cooldown == 0
+                button.enabled = manual and self.battle_state is not None and combat.skill_ready(self.battle_state)
+            elif button.text != "Retreat":
+                button.enabled = manual
             button.draw(self.screen, mouse_pos)
         
         # Draw skill cooldown if applicable
         if self.skill_cooldown > 0:
-            cooldown_text = SMALL_FONT.render(f"Skill CD: {self.skill_cooldown}", True, WHITE)
+            turns = "turn" if self.skill_cooldown == 1 else "turns"
+            cooldown_text = SMALL_FONT.render(f"Skill CD: {self.skill_cooldown} {turns}", True, WHITE)
             self.screen.blit(cooldown_text, (130, WINDOW_HEIGHT - 90))
 
         # Draw battle results if ended
@@ -738,16 +1273,17 @@ class GachaGame:
 
     def draw_battle_character(self, char, x: int, y: int, is_player: bool):
         # Draw character sprite with enhanced effects
-        sprite_rect = pygame.Rect(x, y, 100, 100)
+        sprite_rect = pygame.Rect(x, y, *BATTLE_SPRITE_SIZE)
         sprite_color = RED if is_player else PURPLE
+        sprite = self.character_art(char, BATTLE_SPRITE_SIZE)
         
         # Draw sprite glow
         for i in range(3):
             glow_rect = sprite_rect.inflate(i * 6, i * 6)
             pygame.draw.rect(self.screen, (*sprite_color, 80 - i * 20), glow_rect)
         
-        if char.sprite:
-            self.screen.blit(char.sprite, sprite_rect)
+        if sprite:
+            self.screen.blit(sprite, sprite_rect)
         else:
             pygame.draw.rect(self.screen, sprite_color, sprite_rect)
         
@@ -808,192 +1344,245 @@ class GachaGame:
 
     def handle_character_select_input(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            mouse_pos = pygame.mouse.get_pos()
-            
-            # Handle navigation buttons
-            for button in self.character_nav_buttons:
-                if button.enabled and button.rect.collidepoint(mouse_pos):
-                    button.action()
-                    return
-            
-            # Handle character selection
-            start_idx = self.current_page * self.chars_per_page
-            end_idx = min(start_idx + self.chars_per_page, len(self.characters))
-            
-            for i, char in enumerate(self.characters[start_idx:end_idx]):
-                x = (WINDOW_WIDTH // 2) - 400 + (i % 2) * 400
-                y = 150 + (i // 2) * 250
-                card_rect = pygame.Rect(x, y, 350, 200)
-                
-                if card_rect.collidepoint(mouse_pos):
-                    self.selected_character = char
-                    return
+            # Navigation buttons and character cards
+            self.click_layout(event.pos)
+        elif event.type == pygame.MOUSEWHEEL:
+            self.scroll_roster(-event.y * GRID_ROW_HEIGHT / 2)
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_PAGEDOWN:
+                self.scroll_roster(GRID_VIEWPORT.height)
+            elif event.key == pygame.K_PAGEUP:
+                self.scroll_roster(-GRID_VIEWPORT.height)
+            elif event.key == pygame.K_HOME:
+                self.jump_to_index(0)
+            elif event.key == pygame.K_END:
+                self.jump_to_index(len(self.roster_view()) - 1)
 
     def handle_battle_input(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            mouse_pos = pygame.mouse.get_pos()
-            for button in self.battle_buttons:
-                if button.enabled and button.rect.collidepoint(mouse_pos):
-                    if self.battle_ended and button.text != "Retreat":
-                        return
-                    button.action()
+            node = self.get_layout().hit(event.pos)
+            if node is None or (self.battle_ended and node.name != "Retreat"):
+                return
+            node.action()
 
     def perform_attack(self):
-        if not self.selected_character or not self.current_boss:
+        self.queue_turn(combat.ATTACK)
+
+    def use_skill(self):
+        self.queue_turn(combat.SKILL)
+
+    def queue_turn(self, action: str):
+        """Resolve a whole turn in the combat core and queue its events for playback."""
+        if not self.selected_character or not self.current_boss or self.battle_state is None:
             return
-        
-        if self.battle_ended:
+        if self.battle_ended or self.battle_queue:
             return
         
-        # Calculate damage
-        damage = random.randint(
-            self.selected_character.attack - 5,
-            self.selected_character.attack + 12
-        )
-        
-        # Apply damage and show message
-        self.current_boss.health -= damage
-        self.battle_message = f"Dealt {damage} damage!"
-        self.battle_message_timer = 60
-
-        # Check if boss is defeated
-        if self.current_boss.health <= 0:
-            self.end_battle("victory")
-        else:
-            # Boss counter-attack
-            self.boss_attack()
+        self.battle_state, events = combat.resolve_turn(self.battle_state, action, self.battle_rng)
+        self.skill_cooldown = self.battle_state.skill_cooldown
+        self.battle_queue.extend(events)
+        self.play_next_battle_event()
 
-    def boss_attack(self):
-        if self.battle_ended:
+    def play_next_battle_event(self):
+        # Apply one combat event to the characters on screen and show it
+        event = self.battle_queue.popleft()
+        player, boss = self.selected_character, self.current_boss
+        
+        if event.kind == "attack":
+            boss.take_damage(event.amount)
+            self.battle_message = f"Dealt {event.amount} damage!"
+        elif event.kind == "skill":
+            boss.take_damage(event.amount)
+            self.battle_message = f"Used {event.name}! Dealt {event.amount} damage!"
+            self.start_skill_animation()
+        elif event.kind == "heal":
+            player.heal(event.amount)
+            self.battle_message = f"Used {event.name}! Healed for {event.amount} HP!"
+            self.start_skill_animation()
+        elif event.kind == "buff":
+            self.battle_message = f"{event.name}! Defense up for {event.amount} turns!"
+        elif event.kind == "boss_attack":
+            player.take_damage(event.amount)
+            self.battle_message = f"Boss dealt {event.amount} damage!"
+        elif event.kind == "cooldown":
+            self.battle_message = "Skill is on cooldown!"
+        elif event.kind == "no_skill":
+            self.battle_message = "No skill available!"
+        elif event.kind in ("victory", "defeat"):
+            self.battle_queue.clear()
+            self.end_battle(event.kind)
             return
-            
-        # Calculate boss damage
-        boss_damage = random.randint(
-            self.current_boss.attack - 3,
-            self.current_boss.attack + 8
-        )
         
-        # Apply damage
-        self.selected_character.health -= boss_damage
-        self.battle_message = f"Boss dealt {boss_damage} damage!"
-        self.battle_message_timer = 60
+        self.battle_message_timer = MESSAGE_DURATION
+        self.battle_event_timer = BATTLE_EVENT_DURATION
 
-        # Check if player is defeated
-        if self.selected_character.health <= 0:
-            self.end_battle("defeat")
+    def toggle_auto_battle(self):
+        self.auto_battle = not self.auto_battle
+        for button in self.battle_buttons:
+            if button.action == self.toggle_auto_battle:
+                button.text = f"Auto: {'On' if self.auto_battle else 'Off'}"
 
-    def use_skill(self):
-        if not self.selected_character or not self.current_boss or self.battle_ended:
-            return
-            
-        if self.skill_cooldown > 0:
-            self.battle_message = "Skill is on cooldown!"
-            self.battle_message_timer = 60
+    def sweep_boss(self, boss: dict):
+        """Resolve SWEEP_COUNT battles against a cleared boss headlessly and apply the rewards once."""
+        char = self.selected_character
+        if not char or boss["name"] not in self.cleared_bosses:
             return
         
-        # Get character class from name
-        char_class = None
-        for class_name in self.skill_effects.keys():
-            if class_name in self.selected_character.name:
-                char_class = class_name
-                break
+        # Every sweep battle starts at full health and leaves the character's HP untouched
+        state = combat.start(char.max_health, char.max_health, char.attack,
+                             boss["health"], boss["attack"], char.skill)
+        results = combat.simulate_batch(state, SWEEP_COUNT, rng=self.battle_rng)
         
-        if not char_class:
-            self.battle_message = "No skill available!"
-            self.battle_message_timer = 60
-            return
+        rewards = combat.victory_rewards(boss["level"])
+        wins, losses = results["victory"], results["defeat"]
+        exp = rewards["exp"] * wins + combat.defeat_exp(boss["level"]) * losses
+        coins = rewards["coins"] * wins
+        gems = rewards["gems"] * wins
         
-        skill = self.skill_effects[char_class]
+        char.gain_exp(exp)
+        self.on_character_changed(char)
+        self.ledger.transact(self.account, {"coins": coins, "gems": gems}, reason="sweep")
         
-        # Start skill animation
-        self.skill_active = True
-        self.skill_animation_frame = 0
-        
-        # Apply skill effect
-        if "heal" in skill:
-            # Healing skill
-            heal_amount = int(self.selected_character.max_health * skill["heal"])
-            self.selected_character.health = min(
-                self.selected_character.health + heal_amount,
-                self.selected_character.max_health
-            )
-            self.battle_message = f"Used {skill['name']}! Healed for {heal_amount} HP!"
-        else:
-            # Damage skill
-            base_damage = random.randint(
-                self.selected_character.attack - 5,
-                self.selected_character.attack + 12
-            )
-            skill_damage = int(base_damage * skill["damage"])
-            
-            # Apply special effects
-            if char_class == "Archer":  # Guaranteed crit
-                skill_damage = int(skill_damage * 1.5)
-            elif char_class == "Knight":  # Defense buff
-                self.selected_character.defense_buff = 2  # Lasts 2 turns
-            
-            self.current_boss.health -= skill_damage
-            self.battle_message = f"Used {skill['name']}! Dealt {skill_damage} damage!"
-        
-        self.battle_message_timer = 60
+        self.battle_message = (f"Swept {boss['name']} x{SWEEP_COUNT}: {wins} won, "
+                               f"+{exp} EXP, +{coins} coins, +{gems} gems")
+        self.battle_message_timer = RESULT_MESSAGE_DURATION * 2
 
-        # Check battle end after skill use
-        if self.current_boss.health <= 0:
-            self.end_battle("victory")
-        else:
-            # Boss counter-attack
-            self.boss_attack()
+    def start_skill_animation(self):
+        self.skill_active = True
+        self.skill_animation_time = 0.0
 
     def use_item(self):
         # Implement item usage
         pass
 
-    def change_page(self, delta: int):
-        new_page = self.current_page + delta
-        if 0 <= new_page * self.chars_per_page < len(self.characters):
-            self.current_page = new_page
-
-    def update(self):
-        if self.state == "battle":
+    def update(self, dt: float = SIM_DT):
+        """Advance game logic by dt seconds. Called at a fixed rate by run()."""
+        # Adopt art finished by the loader threads (a few per step, so big sets never stall a frame)
+        self.assets.pump()
+        
+        if self.state == "main_menu":
+            for particle in self.particles:
+                particle.update(dt)
+            
+            # Animate title glow: ramps up and down between 0 and TITLE_GLOW_LAYERS
+            self.title_glow_time += dt
+            period = 2 * TITLE_GLOW_LAYERS / TITLE_GLOW_SPEED
+            phase = (self.title_glow_time % period) * TITLE_GLOW_SPEED
+            self.title_glow = phase if phase <= TITLE_GLOW_LAYERS else 2 * TITLE_GLOW_LAYERS - phase
+        
+        elif self.state == "character_select":
+            # Ease the grid toward the scroll target
+            if self.roster_scroll != self.roster_scroll_target:
+                distance = self.roster_scroll_target - self.roster_scroll
+                if abs(distance) < 0.5:
+                    self.roster_scroll = self.roster_scroll_target
+                else:
+                    self.roster_scroll += distance * min(1.0, SCROLL_SMOOTHING * dt)
+        
+        elif self.state == "summon" and self.summon_animation["active"]:
+            self.update_summon_animation(dt)
+        
+        elif self.state == "battle_prep":
+            if self.battle_message_timer > 0:
+                self.battle_message_timer = max(self.battle_message_timer - dt, 0.0)
+        
+        elif self.state == "battle":
             if self.battle_message_timer > 0:
-                self.battle_message_timer -= 1
+                self.battle_message_timer = max(self.battle_message_timer - dt, 0.0)
+            
+            # Play queued combat events one after another (faster under auto-battle)
+            speed = AUTO_BATTLE_SPEED if self.auto_battle else 1.0
+            if self.battle_event_timer > 0:
+                self.battle_event_timer = max(self.battle_event_timer - dt * speed, 0.0)
+            if self.battle_event_timer == 0:
+                if self.battle_queue:
+                    self.play_next_battle_event()
+                elif self.auto_battle and not self.battle_ended and self.battle_state is not None:
+                    self.queue_turn(combat.greedy_policy(self.battle_state))
+            
+            for char in (self.selected_character, self.current_boss):
+                if char:
+                    char.current_frame += CHARACTER_ANIMATION_FPS * dt
             
-            # Update skill cooldown on turn end
-            if self.skill_cooldown > 0 and self.battle_message_timer == 0:
-                self.skill_cooldown -= 1
+            if self.skill_active:
+                self.skill_animation_time += dt * speed
+                if self.skill_animation_time >= SKILL_ANIMATION_DURATION:
+                    self.skill_active = False
+                    self.skill_animation_time = 0.0
+
+    def run_headless(self, seconds: float) -> int:
+        """Step game logic for `seconds` of game time without rendering. Returns the step count."""
+        steps = int(round(seconds * SIM_HZ))
+        for _ in range(steps):
+            self.update(SIM_DT)
+        return steps
 
     def draw(self):
         # Clear screen
         self.screen.fill(BLACK)
         
+        # Resolve hover once per frame through the layout's spatial index
+        layout = self.get_layout()
+        self.hovered_node = layout.hit(self.mouse_pos) if layout else None
+        
         # Draw current state
-        if self.state == "main_menu":
-            self.draw_main_menu()
-        elif self.state == "character_select":
-            self.draw_character_select()
-        elif self.state == "battle":
-            self.draw_battle()
-        elif self.state == "summon":
-            self.draw_summon()
-        elif self.state == "battle_prep":
-            self.draw_battle_prep()
-        elif self.state == "shop":
-            self.draw_shop()
-        # Add more states here
+        draw_state = self.draw_handlers.get(self.state)
+        if draw_state:
+            draw_state()
 
     def handle_input(self, event):
-        if self.state == "main_menu":
-            self.handle_main_menu_input(event)
-        elif self.state == "character_select":
-            self.handle_character_select_input(event)
-        elif self.state == "battle":
-            self.handle_battle_input(event)
-        elif self.state == "summon":
-            self.handle_summon_input(event)
-        elif self.state == "battle_prep":
-            self.handle_battle_prep_input(event)
-        elif self.state == "shop":
-            self.handle_shop_input(event)
+        handle_state = self.input_handlers.get(self.state)
+        if handle_state:
+            handle_state(event)
+
+    def process_events(self) -> bool:
+        """Drain the event queue and dispatch it. Returns False when the window is closed or Quit is chosen."""
+        events = pygame.event.get()
+        drained_at = time.perf_counter()
+        
+        # Hover only cares about the latest position, so each run of motion events
+        # collapses into the last one of the run
+        motion = None
+        for event in events:
+            if event.type == pygame.QUIT:
+                return False
+            if event.type == pygame.MOUSEMOTION:
+                motion = event
+                continue
+            if motion is not None:
+                self.dispatch_motion(motion)
+                motion = None
+            if hasattr(event, "pos"):
+                self.mouse_pos = event.pos
+            
+            self.handle_input(event)
+            if event.type in ACTION_EVENTS:
+                # The event arrived some time after the previous drain, so this is an upper bound
+                self.input_latencies.append((time.perf_counter() - self.last_event_drain) * 1000)
+            if not self.running:
+                return False  # Quit from the menu
+        
+        if motion is not None:
+            self.dispatch_motion(motion)
+        
+        self.last_event_drain = drained_at
+        return True
+
+    def dispatch_motion(self, event):
+        self.mouse_pos = event.pos
+        self.handle_input(event)
+
+    def input_latency_stats(self) -> Dict[str, float]:
+        """Input-to-action latency in ms over the most recent clicks and key presses."""
+        if not self.input_latencies:
+            return {"count": 0, "avg": 0.0, "p95": 0.0, "max": 0.0}
+        latencies = sorted(self.input_latencies)
+        return {
+            "count": len(latencies),
+            "avg": sum(latencies) / len(latencies),
+            "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            "max": latencies[-1]
+        }
 
     def draw_summon(self):
         if self.summon_animation["active"]:
@@ -1002,7 +1591,7 @@ class GachaGame:
             
         # Original summon screen drawing code...
         # Draw background
-        self.screen.blit(self.backgrounds["summon"], (0, 0))
+        self.screen.blit(self.background("summon"), (0, 0))
         
         # Draw title
         title = TITLE_FONT.render("Summon Characters", True, GOLD)
@@ -1028,25 +1617,31 @@ class GachaGame:
             self.screen.blit(rate_surface, (WINDOW_WIDTH - 200, 100 + i * 30))
         
         # Draw buttons
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = self.mouse_pos
         for button in self.summon_buttons:
             button.draw(self.screen, mouse_pos)
 
     def handle_summon_input(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            mouse_pos = pygame.mouse.get_pos()
-            for button in self.summon_buttons:
-                if button.enabled and button.rect.collidepoint(mouse_pos):
-                    button.action()
+            node = self.click_layout(event.pos)
+            # Clicking anywhere else during the animation skips ahead
+            if node is None and self.summon_animation["active"]:
+                self.skip_summon_animation()
+        elif event.type == pygame.KEYDOWN and self.summon_animation["active"]:
+            if event.key in (pygame.K_SPACE, pygame.K_RETURN, pygame.K_ESCAPE):
+                self.skip_summon_animation()
+            elif event.key == pygame.K_f:
+                self.toggle_summon_fast_forward()
+            elif event.key == pygame.K_g:
+                self.toggle_summon_show_all()
 
     def perform_summon(self, is_multi: bool):
         cost = 1000 if is_multi else 100
-        if self.gems < cost:
+        if not self.ledger.debit(self.account, "gems", cost, reason="multi_summon" if is_multi else "summon"):
             self.battle_message = "Not enough gems!"
-            self.battle_message_timer = 60
+            self.battle_message_timer = MESSAGE_DURATION
             return
         
-        self.gems -= cost
         summons = 10 if is_multi else 1
         results = []
         
@@ -1074,11 +1669,7 @@ class GachaGame:
                 base_health = random.randint(80, 100)
             
             # Generate random character name
-            prefixes = ["Dark", "Light", "Fire", "Water", "Earth", "Wind", "Thunder", "Ice", 
-                       "Shadow", "Holy", "Chaos", "Order", "Storm", "Nature", "Cosmic"]
-            classes = ["Warrior", "Mage", "Archer", "Knight", "Assassin", "Healer", 
-                      "Paladin", "Berserker", "Summoner", "Necromancer", "Druid", "Monk"]
-            name = f"{random.choice(prefixes)} {random.choice(classes)}"
+            name = f"{random.choice(skills.NAME_PREFIXES)} {random.choice(skills.CLASSES)}"
             
             # Create character with enhanced stats
             character = Character(name, rarity, base_attack, base_health)
@@ -1098,69 +1689,118 @@ class GachaGame:
             
             results.append(character)
         
+        # Results belong to the roster right away; the animation below is only presentation
+        self.characters.extend(results)
+        
         # Start summon animation
-        self.summon_animation["active"] = True
-        self.summon_animation["frame"] = 0
-        self.summon_animation["is_multi"] = is_multi
-        self.summon_animation["results"] = results
-        self.summon_animation["current_multi_index"] = 0
-        self.summon_animation["particles"] = self.create_particles()
-
-    def create_particles(self, num_particles=50):
-        particles = []
-        for _ in range(num_particles):
-            angle = random.uniform(0, 2 * 3.14159)
-            speed = random.uniform(2, 8)
-            size = random.randint(2, 6)
-            
-            # Use rarity colors for particles
-            if self.summon_animation["results"]:
-                char = self.summon_animation["results"][0]
-                color = self.rarity_colors.get(char.rarity, WHITE)
-            else:
-                color = random.choice([GOLD, WHITE, PURPLE])
-                
-            particle = {
-                "x": WINDOW_WIDTH // 2,
-                "y": WINDOW_HEIGHT // 2,
-                "dx": math.cos(angle) * speed,
-                "dy": math.sin(angle) * speed,
-                "size": size,
-                "color": color,
-                "life": 255
-            }
-            particles.append(particle)
-        return particles
-
-    def update_particles(self):
-        for particle in self.summon_animation["particles"]:
-            particle["x"] += particle["dx"]
-            particle["y"] += particle["dy"]
-            particle["life"] -= 5
-            if particle["life"] <= 0:
-                self.summon_animation["particles"].remove(particle)
+        anim = self.summon_animation
+        anim["active"] = True
+        anim["time"] = 0.0
+        anim["is_multi"] = is_multi
+        anim["results"] = results
+        anim["current_multi_index"] = 0
+        self.create_particles()
+        anim["speed"] = 1.0
+        self.summon_animation_buttons[1].text = "Speed x1"
+        self.set_summon_grid(is_multi and self.summon_show_all)
+
+    def set_summon_grid(self, grid: bool):
+        # Lay out the result phase of the timeline: one result at a time, or all of them in a grid
+        anim = self.summon_animation
+        count = len(anim["results"])
+        anim["grid"] = grid
+        if grid:
+            anim["hold_start"] = SUMMON_FLASH_END + count * SUMMON_GRID_STAGGER
+            anim["end"] = anim["hold_start"] + SUMMON_GRID_HOLD
+        else:
+            anim["hold_start"] = SUMMON_FLASH_END + (count - 1) * SUMMON_MULTI_STEP
+            anim["end"] = anim["hold_start"] + SUMMON_RESULT_HOLD
+
+    def skip_summon_animation(self):
+        """Jump straight to the final results; skipping again closes them."""
+        anim = self.summon_animation
+        if not anim["active"]:
+            return
+        if anim["time"] >= anim["hold_start"]:
+            self.finish_summon_animation()
+            return
+        if anim["is_multi"] and not anim["grid"]:
+            self.set_summon_grid(True)
+        anim["time"] = anim["hold_start"]
+        anim["current_multi_index"] = len(anim["results"]) - 1
+
+    def toggle_summon_fast_forward(self):
+        anim = self.summon_animation
+        anim["speed"] = 1.0 if anim["speed"] > 1.0 else SUMMON_FAST_FORWARD
+        self.summon_animation_buttons[1].text = f"Speed x{anim['speed']:g}"
+
+    def toggle_summon_show_all(self):
+        self.summon_show_all = not self.summon_show_all
+        self.summon_animation_buttons[0].text = f"Show All: {'On' if self.summon_show_all else 'Off'}"
+        anim = self.summon_animation
+        if anim["active"] and anim["is_multi"] and anim["time"] < anim["hold_start"]:
+            self.set_summon_grid(self.summon_show_all)
+
+    def finish_summon_animation(self):
+        anim = self.summon_animation
+        anim["active"] = False
+        anim["time"] = 0.0
+        anim["results"] = []
+        anim["current_multi_index"] = 0
+        anim["speed"] = 1.0
+
+    def create_particles(self, num_particles=SUMMON_PARTICLES):
+        # Reuse the preallocated pool instead of building new particle dicts
+        particles = self.summon_animation["particles"]
+        particles.clear()
+        
+        # Use rarity colors for particles
+        if self.summon_animation["results"]:
+            char = self.summon_animation["results"][0]
+            colors = [self.rarity_colors.get(char.rarity, WHITE)]
+        else:
+            colors = [GOLD, WHITE, PURPLE]
+        particles.burst(num_particles, WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2, colors)
+
+    def update_particles(self, dt: float):
+        # Particle speeds are in pixels per 60 Hz tick
+        self.summon_animation["particles"].update(dt * SIM_HZ)
+
+    def update_summon_animation(self, dt: float):
+        anim = self.summon_animation
+        dt *= anim["speed"]
+        anim["time"] += dt
+        t = anim["time"]
+        
+        if t < SUMMON_CONVERGE_END:
+            self.update_particles(dt)
+        elif t >= SUMMON_FLASH_END and not anim["grid"]:
+            # Results are revealed one every SUMMON_MULTI_STEP seconds
+            step = int((t - SUMMON_FLASH_END) / SUMMON_MULTI_STEP)
+            anim["current_multi_index"] = min(step, len(anim["results"]) - 1)
+        
+        if t >= anim["end"]:
+            self.finish_summon_animation()
 
     def draw_summon_animation(self):
         # Clear screen with dark background
         self.screen.fill((20, 10, 40))
         
-        # Update animation frame
-        self.summon_animation["frame"] += 1
-        frame = self.summon_animation["frame"]
+        t = self.summon_animation["time"]
+        frame = t * SIM_HZ  # Effects below are tuned in 60 Hz ticks
         
-        if frame < 60:  # First second: particle convergence
+        if t < SUMMON_CONVERGE_END:  # First second: particle convergence
             # Draw particles moving toward center
-            self.update_particles()
-            for particle in self.summon_animation["particles"]:
-                alpha = particle["life"]
-                color = particle["color"]
-                if isinstance(color, tuple) and len(color) == 3:
-                    color = (*color, alpha)
+            alpha_step = self.render_alpha
+            pool = self.summon_animation["particles"]
+            for slot in pool.live_slots():
+                x = pool.px[slot] + (pool.x[slot] - pool.px[slot]) * alpha_step
+                y = pool.py[slot] + (pool.y[slot] - pool.py[slot]) * alpha_step
                 pygame.draw.circle(
                     self.screen,
-                    color,
-                    (int(particle["x"]), int(particle["y"])),
-                    particle["size"]
+                    pool.color[slot],
+                    (int(x), int(y)),
+                    pool.size[slot]
                 )
             
             # Draw growing circle
@@ -1172,45 +1812,55 @@ class GachaGame:
                 circle_size
             )
             
-        elif frame < 90:  # Flash
-            flash_alpha = min(255, (90 - frame) * 8)
+        elif t < SUMMON_FLASH_END:  # Flash
+            flash_alpha = min(255, int((90 - frame) * 8))
             flash_surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
             flash_surface.fill(WHITE)
             flash_surface.set_alpha(flash_alpha)
             self.screen.blit(flash_surface, (0, 0))
             
-        elif frame < 150:  # Show result
-            if not self.summon_animation["is_multi"]:
-                character = self.summon_animation["results"][0]
-                self.draw_summon_result(character)
-            else:
-                current_index = min(
-                    self.summon_animation["current_multi_index"],
-                    len(self.summon_animation["results"]) - 1
-                )
-                character = self.summon_animation["results"][current_index]
-                self.draw_summon_result(character)
-                
-                if frame % 30 == 0 and self.summon_animation["current_multi_index"] < 9:
-                    self.summon_animation["current_multi_index"] += 1
-                    self.summon_animation["frame"] = 90  # Reset to show next result
-                    self.summon_animation["particles"] = self.create_particles()
-        
-        else:  # End animation
-            if self.summon_animation["is_multi"]:
-                if self.summon_animation["current_multi_index"] < 9:
-                    self.summon_animation["frame"] = 89
-                    return
+        elif self.summon_animation["grid"]:  # Show all results at once
+            self.draw_summon_grid()
             
-            # Add characters to roster
-            for character in self.summon_animation["results"]:
-                self.characters.append(character)
+        elif self.summon_animation["results"]:  # Show result
+            current_index = min(
+                self.summon_animation["current_multi_index"],
+                len(self.summon_animation["results"]) - 1
+            )
+            character = self.summon_animation["results"][current_index]
+            self.draw_summon_result(character)
+        
+        # Draw skip / speed / show all controls
+        for button in self.summon_animation_buttons:
+            button.draw(self.screen, self.mouse_pos)
+
+    def draw_summon_grid(self):
+        results = self.summon_animation["results"]
+        columns = 5
+        tile_width, tile_height = 220, 150
+        spacing = 20
+        left = (WINDOW_WIDTH - (columns * tile_width + (columns - 1) * spacing)) // 2
+        top = 150
+        
+        title = HEADER_FONT.render("Summon Results", True, GOLD)
+        self.screen.blit(title, title.get_rect(center=(WINDOW_WIDTH // 2, 90)))
+        
+        # Tiles appear one after another, SUMMON_GRID_STAGGER seconds apart
+        shown = int((self.summon_animation["time"] - SUMMON_FLASH_END) / SUMMON_GRID_STAGGER) + 1
+        for i, character in enumerate(results[:shown]):
+            row, col = divmod(i, columns)
+            tile = pygame.Rect(left + col * (tile_width + spacing), top + row * (tile_height + spacing),
+                               tile_width, tile_height)
+            main_color = self.rarity_colors.get(character.rarity, WHITE)
+            pygame.draw.rect(self.screen, (30, 20, 50), tile, border_radius=12)
+            pygame.draw.rect(self.screen, main_color, tile, 3, border_radius=12)
             
-            # Reset animation state
-            self.summon_animation["active"] = False
-            self.summon_animation["frame"] = 0
-            self.summon_animation["results"] = []
-            self.summon_animation["current_multi_index"] = 0
+            rarity_text = HEADER_FONT.render(character.rarity, True, main_color)
+            name_text = SMALL_FONT.render(character.name, True, WHITE)
+            stats_text = SMALL_FONT.render(f"ATK: {character.attack} | HP: {character.health}", True, WHITE)
+            self.screen.blit(rarity_text, rarity_text.get_rect(center=(tile.centerx, tile.y + 35)))
+            self.screen.blit(name_text, name_text.get_rect(center=(tile.centerx, tile.y + 85)))
+            self.screen.blit(stats_text, stats_text.get_rect(center=(tile.centerx, tile.y + 115)))
 
     def draw_summon_result(self, character):
         # Get rarity-specific colors
@@ -1221,7 +1871,7 @@ class GachaGame:
         if character.rarity in ["6★", "5★"]:  # Special effects for highest rarities
             # Draw multiple rotating circles
             for i in range(4):
-                angle = (self.summon_animation["frame"] * 2 + i * 45) % 360
+                angle = (self.summon_animation["time"] * SIM_HZ * 2 + i * 45) % 360
                 radius = 100 + i * 30
                 x = WINDOW_WIDTH // 2 + radius * math.cos(math.radians(angle))
                 y = WINDOW_HEIGHT // 2 + radius * math.sin(math.radians(angle))
@@ -1230,7 +1880,7 @@ class GachaGame:
         
         # Draw expanding circles with rarity color
         for i in range(3):
-            size = (self.summon_animation["frame"] % 30) * (i + 1) * 2
+            size = int((self.summon_animation["time"] * SIM_HZ) % 30) * (i + 1) * 2
             pygame.draw.circle(
                 self.screen,
                 glow_color,
@@ -1264,10 +1914,14 @@ class GachaGame:
         self.screen.blit(name_text, name_rect)
         self.screen.blit(rarity_text, rarity_rect)
         self.screen.blit(stats_text, stats_rect)
+        
+        # Lore from the content pack, if it has been generated
+        for i, line in enumerate(lore_lines("character", character.name)):
+            self.screen.blit(line, line.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 90 + i * 22)))
 
     def draw_battle_prep(self):
         # Draw background
-        self.screen.blit(self.backgrounds["battle"], (0, 0))
+        self.screen.blit(self.background("battle"), (0, 0))
         
         # Draw title with background panel
         title_panel = pygame.Surface((WINDOW_WIDTH, 100))
@@ -1285,15 +1939,7 @@ class GachaGame:
             self.screen.blit(msg, msg_rect)
             
             # Back button
-            back_button = Button(
-                pygame.Rect(20, 20, 100, 40),
-                "Back",
-                RED,
-                PURPLE,
-                NORMAL_FONT,
-                lambda: self.set_state("main_menu")
-            )
-            back_button.draw(self.screen, pygame.mouse.get_pos())
+            self.battle_prep_back_button.draw(self.screen, self.mouse_pos)
             return
         
         # Draw character selection section
@@ -1309,13 +1955,10 @@ class GachaGame:
         self.screen.blit(section_title, section_rect)
         
         # Draw available characters in a grid
-        start_idx = self.current_page * self.chars_per_page
-        end_idx = min(start_idx + self.chars_per_page, len(self.characters))
-        
-        for i, char in enumerate(self.characters[start_idx:end_idx]):
-            x = 50 + (i % 2) * 400
-            y = 180 + (i // 2) * 250
-            self.draw_character_card(char, x, y, char == self.selected_character)
+        layout = self.get_layout()
+        for node in layout.nodes("card"):
+            char = node.payload
+            self.draw_character_card(char, node.rect.x, node.rect.y, char == self.selected_character)
         
         # Draw boss selection section
         boss_title = HEADER_FONT.render("Select Your Opponent", True, WHITE)
@@ -1330,13 +1973,9 @@ class GachaGame:
         self.screen.blit(boss_title, boss_rect)
         
         # Draw boss options with enhanced styling
-        boss_spacing = 20
-        total_boss_width = sum(250 for _ in self.boss_data) + boss_spacing * (len(self.boss_data) - 1)
-        start_x = (WINDOW_WIDTH - total_boss_width) // 2
-        
-        for i, boss in enumerate(self.boss_data):
-            x = start_x + i * (250 + boss_spacing)
-            y = 550
+        for node in layout.nodes("boss"):
+            boss = node.payload
+            x, y = node.rect.topleft
             
             # Draw boss card background
             boss_card = pygame.Surface((230, 100))
@@ -1370,16 +2009,19 @@ class GachaGame:
             else:
                 pygame.draw.rect(self.screen, (100, 100, 100), (x, y, 230, 100), 2, border_radius=5)
         
+        # Draw sweep buttons for bosses that have already been beaten
+        for boss, button in zip(self.boss_data, self.sweep_buttons):
+            button.enabled = self.selected_character is not None and boss["name"] in self.cleared_bosses
+            if button.enabled:
+                button.draw(self.screen, self.mouse_pos)
+        
+        # Draw sweep results
+        if self.battle_message and self.battle_message_timer > 0:
+            msg = NORMAL_FONT.render(self.battle_message, True, GOLD)
+            self.screen.blit(msg, msg.get_rect(center=(WINDOW_WIDTH // 2, 155)))
+        
         # Draw back button with enhanced styling
-        back_button = Button(
-            pygame.Rect(20, 20, 100, 40),
-            "Back",
-            RED,
-            PURPLE,
-            NORMAL_FONT,
-            lambda: self.set_state("main_menu")
-        )
-        back_button.draw(self.screen, pygame.mouse.get_pos())
+        self.battle_prep_back_button.draw(self.screen, self.mouse_pos)
         
         # Draw help text if no character selected
         if not self.selected_character:
@@ -1393,54 +2035,13 @@ class GachaGame:
 
     def handle_battle_prep_input(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            mouse_pos = pygame.mouse.get_pos()
-            
-            # Handle back button
-            back_button = Button(
-                pygame.Rect(20, 20, 100, 40),
-                "Back",
-                RED,
-                PURPLE,
-                NORMAL_FONT,
-                lambda: self.set_state("main_menu")
-            )
-            if back_button.rect.collidepoint(mouse_pos):
-                back_button.action()
-                return
-            
-            # Handle character selection
-            start_idx = self.current_page * self.chars_per_page
-            end_idx = min(start_idx + self.chars_per_page, len(self.characters))
-            
-            for i, char in enumerate(self.characters[start_idx:end_idx]):
-                x = 50 + (i % 2) * 400
-                y = 180 + (i // 2) * 250
-                card_rect = pygame.Rect(x, y, 350, 200)
-                
-                if card_rect.collidepoint(mouse_pos):
-                    self.selected_character = char
-                    # Play selection sound or effect here
-                    return
-            
-            # Handle boss selection
-            if self.selected_character:
-                boss_spacing = 20
-                total_boss_width = sum(250 for _ in self.boss_data) + boss_spacing * (len(self.boss_data) - 1)
-                start_x = (WINDOW_WIDTH - total_boss_width) // 2
-                
-                for i, boss in enumerate(self.boss_data):
-                    x = start_x + i * (250 + boss_spacing)
-                    y = 550
-                    boss_rect = pygame.Rect(x, y, 230, 100)
-                    
-                    if boss_rect.collidepoint(mouse_pos):
-                        self.start_battle(boss)
-                        return
+            # Back button, character selection and boss selection
+            self.click_layout(event.pos)
 
     def start_battle(self, boss_data: dict):
         if not self.selected_character:
             self.battle_message = "Select a character first!"
-            self.battle_message_timer = 60
+            self.battle_message_timer = MESSAGE_DURATION
             return
         
         # Create boss character
@@ -1452,14 +2053,24 @@ class GachaGame:
         )
         self.current_boss.level = boss_data["level"]
         
+        char = self.selected_character
+        self.battle_state = combat.start(
+            char.health, char.max_health, char.attack,
+            self.current_boss.health, self.current_boss.attack,
+            char.skill
+        )
+        self.battle_queue.clear()
+        self.battle_event_timer = 0.0
+        self.skill_cooldown = 0
+        
         # Switch to battle state
         self.state = "battle"
         self.battle_message = "Battle Start!"
-        self.battle_message_timer = 60
+        self.battle_message_timer = MESSAGE_DURATION
 
     def draw_shop(self):
         # Draw background
-        self.screen.blit(self.backgrounds["main_menu"], (0, 0))
+        self.screen.blit(self.background("main_menu"), (0, 0))
         
         # Draw title
         title = TITLE_FONT.render("Shop", True, GOLD)
@@ -1473,23 +2084,16 @@ class GachaGame:
         self.screen.blit(coins_text, (200, 20))
         
         # Draw shop items
-        items_per_row = 4
-        item_width = 250
-        item_height = 150
-        spacing = 30
-        start_y = 120
-        
-        for i, item in enumerate(self.shop_items):
-            row = i // items_per_row
-            col = i % items_per_row
-            
-            x = (WINDOW_WIDTH - (items_per_row * item_width + (items_per_row - 1) * spacing)) // 2 + col * (item_width + spacing)
-            y = start_y + row * (item_height + spacing)
+        for node in self.get_layout().nodes("item"):
+            item = node.payload
+            item_rect = node.rect
+            x, y = item_rect.topleft
+            item_width, item_height = item_rect.size
             
-            # Draw item box
-            item_rect = pygame.Rect(x, y, item_width, item_height)
+            # Draw item box, highlighting the hovered item
+            border_color = GOLD if node is self.hovered_node else WHITE
             pygame.draw.rect(self.screen, BLUE, item_rect, border_radius=10)
-            pygame.draw.rect(self.screen, WHITE, item_rect, 2, border_radius=10)
+            pygame.draw.rect(self.screen, border_color, item_rect, 2, border_radius=10)
             
             # Draw item name
             name_text = NORMAL_FONT.render(item["name"], True, WHITE)
@@ -1512,195 +2116,160 @@ class GachaGame:
             self.screen.blit(cost_text, cost_rect)
         
         # Back button
-        back_button = Button(
-            pygame.Rect(20, WINDOW_HEIGHT - 60, 100, 40),
-            "Back",
-            RED,
-            PURPLE,
-            NORMAL_FONT,
-            lambda: self.set_state("main_menu")
-        )
-        back_button.draw(self.screen, pygame.mouse.get_pos())
+        self.shop_back_button.draw(self.screen, self.mouse_pos)
 
     def handle_shop_input(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            mouse_pos = pygame.mouse.get_pos()
-            
-            # Handle back button
-            back_button = Button(
-                pygame.Rect(20, WINDOW_HEIGHT - 60, 100, 40),
-                "Back",
-                RED,
-                PURPLE,
-                NORMAL_FONT,
-                lambda: self.set_state("main_menu")
-            )
-            if back_button.rect.collidepoint(mouse_pos):
-                back_button.action()
-                return
-            
-            # Handle item purchase
-            items_per_row = 4
-            item_width = 250
-            item_height = 150
-            spacing = 30
-            start_y = 120
-            
-            for i, item in enumerate(self.shop_items):
-                row = i // items_per_row
-                col = i % items_per_row
-                
-                x = (WINDOW_WIDTH - (items_per_row * item_width + (items_per_row - 1) * spacing)) // 2 + col * (item_width + spacing)
-                y = start_y + row * (item_height + spacing)
-                
-                item_rect = pygame.Rect(x, y, item_width, item_height)
-                if item_rect.collidepoint(mouse_pos):
-                    self.purchase_item(item)
-                    return
+            # Back button and item purchase
+            self.click_layout(event.pos)
 
     def purchase_item(self, item: dict):
-        # Check if player has enough currency
-        if item["cost_type"] == "gems" and self.gems < item["cost"]:
-            self.battle_message = "Not enough gems!"
-            self.battle_message_timer = 60
+        # Potions need a character to use them on; don't charge for nothing
+        if item["type"] in ("exp", "health") and not self.selected_character:
+            self.battle_message = "Select a character first!"
+            self.battle_message_timer = MESSAGE_DURATION
             return
-        elif item["cost_type"] == "coins" and self.coins < item["cost"]:
-            self.battle_message = "Not enough coins!"
-            self.battle_message_timer = 60
+        if item["type"] == "health" and self.selected_character.health >= self.selected_character.max_health:
+            self.battle_message = f"{self.selected_character.name} is already at full health!"
+            self.battle_message_timer = MESSAGE_DURATION
             return
         
-        # Apply the purchase
-        if item["cost_type"] == "gems":
-            self.gems -= item["cost"]
-        else:  # coins
-            self.coins -= item["cost"]
+        # Payment and any gems bought are one ledger transaction
+        changes = {item["cost_type"]: -item["cost"]}
+        if item["type"] == "gems":
+            changes["gems"] = changes.get("gems", 0) + item["amount"]
+        if not self.ledger.transact(self.account, changes, reason=f"buy {item['name']}"):
+            self.battle_message = f"Not enough {item['cost_type']}!"
+            self.battle_message_timer = MESSAGE_DURATION
+            return
         
         # Apply the effect
         if item["type"] == "gems":
-            self.gems += item["amount"]
             self.battle_message = f"Purchased {item['amount']} gems!"
-        elif item["type"] == "exp" and self.selected_character:
+        elif item["type"] == "exp":
             self.selected_character.gain_exp(item["amount"])
+            self.on_character_changed(self.selected_character)
             self.battle_message = f"Gained {item['amount']} EXP!"
-        elif item["type"] == "health" and self.selected_character:
-            self.selected_character.health = min(
-                self.selected_character.health + item["amount"],
-                self.selected_character.max_health
-            )
-            self.battle_message = f"Healed for {item['amount']} HP!"
-        else:
-            self.battle_message = "Select a character first!"
+        elif item["type"] == "health":
+            healed = self.selected_character.heal(item["amount"])
+            self.battle_message = f"Healed for {healed} HP!"
         
-        self.battle_message_timer = 60
+        self.battle_message_timer = MESSAGE_DURATION
 
     def draw_skill_animation(self, char_x, char_y, boss_x, boss_y):
-        self.skill_animation_frame += 1
-        frame = self.skill_animation_frame
-        
-        # Get character class
-        char_class = None
-        for class_name in self.skill_effects.keys():
-            if class_name in self.selected_character.name:
-                char_class = class_name
-                break
+        frame = self.skill_animation_time * SIM_HZ  # Effects below are tuned in 60 Hz ticks
         
-        if not char_class:
+        skill = self.selected_character.skill
+        if not skill:
             return
         
-        # Draw skill-specific animations
-        if char_class == "Warrior" or char_class == "Knight":
-            # Slash effect
-            start_x = char_x + 100
-            start_y = char_y + 50
-            end_x = boss_x
-            end_y = boss_y + 50
-            progress = min(frame / 30, 1.0)
-            
-            current_x = start_x + (end_x - start_x) * progress
-            current_y = start_y + (end_y - start_y) * progress
-            
-            pygame.draw.line(self.screen, WHITE, (start_x, start_y), (current_x, current_y), 3)
-            
-        elif char_class == "Mage":
-            # Magic circle effect
-            center_x = boss_x + 50
-            center_y = boss_y + 50
-            radius = frame * 2
-            pygame.draw.circle(self.screen, (255, 0, 255), (center_x, center_y), radius, 2)
-            
-        elif char_class == "Archer":
-            # Arrow effect
-            start_x = char_x + 100
-            start_y = char_y + 50
-            end_x = boss_x
-            end_y = boss_y + 50
-            progress = min(frame / 20, 1.0)
-            
-            current_x = start_x + (end_x - start_x) * progress
-            current_y = start_y + (end_y - start_y) * progress
-            
-            pygame.draw.line(self.screen, (0, 255, 0), (start_x, start_y), (current_x, current_y), 2)
-            
-        elif char_class == "Assassin":
-            # Shadow effect
-            alpha = max(255 - frame * 8, 0)
-            shadow = pygame.Surface((100, 100))
-            shadow.fill((128, 0, 128))
-            shadow.set_alpha(alpha)
-            self.screen.blit(shadow, (boss_x - 25, boss_y - 25))
-            
-        elif char_class == "Healer":
-            # Healing effect
-            radius = frame * 2
-            for i in range(3):
-                pygame.draw.circle(
-                    self.screen,
-                    (0, 255, 0),
-                    (char_x + 50, char_y + 50),
-                    radius - i * 10,
-                    2
-                )
-        
-        # End animation after certain frames
-        if frame >= 45:
-            self.skill_active = False
-            self.skill_animation_frame = 0
+        draw_effect = self.skill_animations.get(skill.animation)
+        if draw_effect:
+            draw_effect(frame, char_x, char_y, boss_x, boss_y)
+
+    def draw_projectile(self, frame, char_x, char_y, boss_x, boss_y, color, width, ticks):
+        # Line growing from the character to the boss over `ticks` frames
+        start_x = char_x + 100
+        start_y = char_y + 50
+        end_x = boss_x
+        end_y = boss_y + 50
+        progress = min(frame / ticks, 1.0)
+        
+        current_x = start_x + (end_x - start_x) * progress
+        current_y = start_y + (end_y - start_y) * progress
+        
+        pygame.draw.line(self.screen, color, (start_x, start_y), (current_x, current_y), width)
+
+    def draw_slash_skill(self, frame, char_x, char_y, boss_x, boss_y):
+        self.draw_projectile(frame, char_x, char_y, boss_x, boss_y, WHITE, 3, 30)
+
+    def draw_magic_circle_skill(self, frame, char_x, char_y, boss_x, boss_y):
+        radius = int(frame * 2)
+        pygame.draw.circle(self.screen, (255, 0, 255), (boss_x + 50, boss_y + 50), radius, 2)
+
+    def draw_arrow_skill(self, frame, char_x, char_y, boss_x, boss_y):
+        self.draw_projectile(frame, char_x, char_y, boss_x, boss_y, (0, 255, 0), 2, 20)
+
+    def draw_shadow_skill(self, frame, char_x, char_y, boss_x, boss_y):
+        alpha = max(255 - int(frame * 8), 0)
+        shadow = pygame.Surface((100, 100))
+        shadow.fill((128, 0, 128))
+        shadow.set_alpha(alpha)
+        self.screen.blit(shadow, (boss_x - 25, boss_y - 25))
+
+    def draw_heal_skill(self, frame, char_x, char_y, boss_x, boss_y):
+        radius = int(frame * 2)
+        for i in range(3):
+            if radius - i * 10 > 0:
+                pygame.draw.circle(self.screen, (0, 255, 0), (char_x + 50, char_y + 50), radius - i * 10, 2)
+
+    def draw_holy_skill(self, frame, char_x, char_y, boss_x, boss_y):
+        # Beam of light falling onto the boss, then a small heal
+        beam_height = int(min(frame / 15, 1.0) * (boss_y + 100))
+        pygame.draw.rect(self.screen, GOLD, (boss_x + 40, 0, 20, beam_height))
+        pygame.draw.circle(self.screen, GOLD, (char_x + 50, char_y + 50), int(frame), 2)
+
+    def draw_rage_skill(self, frame, char_x, char_y, boss_x, boss_y):
+        for i in range(3):
+            radius = int(frame * 3) - i * 15
+            if radius > 0:
+                pygame.draw.circle(self.screen, RED, (char_x + 50, char_y + 50), radius, 3)
+        self.draw_projectile(frame, char_x, char_y, boss_x, boss_y, RED, 5, 25)
+
+    def draw_spirits_skill(self, frame, char_x, char_y, boss_x, boss_y):
+        # Three spirits circling on their way to the boss
+        progress = min(frame / 30, 1.0)
+        for i in range(3):
+            angle = math.radians(frame * 12 + i * 120)
+            x = char_x + 50 + (boss_x - char_x) * progress + 25 * math.cos(angle)
+            y = char_y + 50 + (boss_y - char_y) * progress + 25 * math.sin(angle)
+            pygame.draw.circle(self.screen, (135, 206, 250), (int(x), int(y)), 8)
+
+    def draw_drain_skill(self, frame, char_x, char_y, boss_x, boss_y):
+        # Life flows from the boss back to the caster
+        progress = min(frame / 30, 1.0)
+        start = (boss_x + 50, boss_y + 50)
+        end = (char_x + 50, char_y + 50)
+        current = (start[0] + (end[0] - start[0]) * progress, start[1] + (end[1] - start[1]) * progress)
+        pygame.draw.line(self.screen, (128, 0, 128), start, current, 4)
+
+    def draw_vines_skill(self, frame, char_x, char_y, boss_x, boss_y):
+        height = int(min(frame / 20, 1.0) * 100)
+        for i in range(4):
+            x = boss_x + 10 + i * 25
+            pygame.draw.line(self.screen, (34, 139, 34), (x, boss_y + 100), (x, boss_y + 100 - height), 4)
+
+    def draw_flurry_skill(self, frame, char_x, char_y, boss_x, boss_y):
+        # Quick strikes landing around the boss
+        for i in range(min(int(frame / 6) + 1, 6)):
+            x = boss_x + 50 + 35 * math.cos(i * 2.1)
+            y = boss_y + 50 + 35 * math.sin(i * 2.1)
+            pygame.draw.line(self.screen, WHITE, (x - 12, y - 12), (x + 12, y + 12), 3)
 
     def end_battle(self, result: str):
         self.battle_ended = True
         self.battle_result = result
         
         if result == "victory":
-            # Calculate rewards based on boss level
-            base_exp = self.current_boss.level * 50
-            base_coins = self.current_boss.level * 30
-            base_gems = max(1, self.current_boss.level // 5)  # 1 gem per 5 boss levels, minimum 1
-            
-            # Bonus rewards for higher level bosses
-            if self.current_boss.level >= 20:
-                base_exp *= 1.5
-                base_coins *= 1.5
-                base_gems *= 2
-            
-            self.battle_rewards = {
-                "exp": int(base_exp),
-                "coins": int(base_coins),
-                "gems": int(base_gems)
-            }
+            # Rewards are a function of boss level
+            self.battle_rewards = combat.victory_rewards(self.current_boss.level)
+            self.cleared_bosses.add(self.current_boss.name)
             
             # Apply rewards
             self.selected_character.gain_exp(self.battle_rewards["exp"])
-            self.coins += self.battle_rewards["coins"]
-            self.gems += self.battle_rewards["gems"]
+            self.on_character_changed(self.selected_character)
+            self.ledger.transact(self.account, {"coins": self.battle_rewards["coins"],
+                                                "gems": self.battle_rewards["gems"]}, reason="battle")
             
             self.battle_message = "Victory!"
         else:
             # Give some consolation exp for trying
-            consolation_exp = max(10, self.current_boss.level * 10)
+            consolation_exp = combat.defeat_exp(self.current_boss.level)
             self.selected_character.gain_exp(consolation_exp)
+            self.on_character_changed(self.selected_character)
             self.battle_message = "Defeat..."
         
-        self.battle_message_timer = 120  # Show result longer
+        self.battle_message_timer = RESULT_MESSAGE_DURATION  # Show result longer
 
     def draw_battle_results(self):
         # Create semi-transparent overlay
@@ -1745,37 +2314,54 @@ class GachaGame:
             )
             self.screen.blit(consolation, consolation_rect)
 
-    def run(self):
-        running = True
-        while running:
-            # Handle single event at a time
-            event = pygame.event.poll()
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type != pygame.NOEVENT:
-                self.handle_input(event)
+    def run(self, fps: int = FPS):
+        """Fixed-timestep loop: logic steps at SIM_HZ, rendering at up to `fps` frames per second."""
+        self.running = True
+        accumulator = 0.0
+        previous = time.perf_counter()
+        while self.running:
+            now = time.perf_counter()
+            accumulator += min(now - previous, MAX_FRAME_TIME)
+            previous = now
             
-            # Handle mouse state
-            mouse_pos = pygame.mouse.get_pos()
-            mouse_pressed = pygame.mouse.get_pressed()
+            # Handle every queued event before simulating the frame
+            if not self.process_events():
+                self.running = False
             
-            # Update game state
-            self.update()
+            # Update game state; when rendering falls behind this runs several steps per frame
+            while accumulator >= SIM_DT:
+                self.update(SIM_DT)
+                accumulator -= SIM_DT
+            self.render_alpha = accumulator / SIM_DT
             
             # Draw current state
             self.draw()
             
             # Update display
             pygame.display.flip()
-            self.clock.tick(FPS)
+            self.clock.tick(fps)
         
+        stats = self.input_latency_stats()
+        if stats["count"]:
+            print(f"Input latency over {stats['count']} actions: "
+                  f"avg {stats['avg']:.1f} ms, p95 {stats['p95']:.1f} ms, max {stats['max']:.1f} ms")
+        self.assets.shutdown()
         pygame.quit()
         sys.exit()
 
 if __name__ == "__main__":
-    # Set up display mode
-    pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    import argparse
+    parser = argparse.ArgumentParser(description="Gacha Fantasy World")
+    parser.add_argument("--fps", type=int, default=FPS, help="render rate cap (game speed is unaffected)")
+    parser.add_argument("--headless", type=float, metavar="SECONDS", default=None,
+                        help="simulate SECONDS of game time without a window and exit")
+    args = parser.parse_args()
     
-    # Create and run game
-    game = GachaGame()
-    game.run() 
\ No newline at end of file
+    if args.headless is not None:
+        game = GachaGame(headless=True)
+        steps = game.run_headless(args.headless)
+        print(f"Simulated {steps} steps ({args.headless:.1f}s of game time)")
+    else:
+        # Create and run game (the window is opened by GachaGame)
+        game = GachaGame()
+        game.run(args.fps) 
\ No newline at end of file
@@ -0,0 +1,459 @@
+"""Multiplayer server hosting many gacha_game.GachaGame sessions in one process.
+
+Clients speak newline-delimited JSON over TCP. Every request is an object with
+an "action" (and optionally an "id", echoed back); every response has "ok"
+plus either the result fields or an "error" message:
+
+    {"id": 1, "action": "login", "player": "alice"}
+    {"id": 2, "action": "summon", "count": 10}
+    {"id": 3, "action": "battle"}
+    {"id": 4, "action": "train", "coins": 50, "key": "b7f3-4"}
+
+Everything runs on one asyncio event loop. Game actions are short and never
+block, so a single core serves thousands of connections. Several connections
+may log in as the same player; each session's lock keeps their actions from
+interleaving.
+
+Gems and coins are kept in a ledger (ledger.py) shared by all sessions, one
+account per player. An action that moves currency is answered only after its
+transaction is on disk; transactions from all sessions waiting at the same time
+share one group commit. A request may carry an idempotency "key": resending a
+key gets the original response (or an error if it's no longer cached) instead
+of running the action again.
+
+Rosters, the selected character, pity counters and a snapshot of each
+player's balances are kept in SQLite (storage.py), so players find their
+characters again after the server restarts. Each request's database writes
+sit in their own savepoint, and all requests handled in one pass of the event
+loop share a single commit.
+
+    python game_server.py --port 8770
+    python load_gen.py --port 8770 --sessions 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+
+import gacha_game
+import hello_world
+from ledger import LEDGER_PATH, Ledger
+from storage import DB_PATH, CharacterRow, Storage
+
+MAX_LINE = 64 * 1024       # Longest request accepted, in bytes
+INVENTORY_PAGE = 50
+SESSION_TTL = 30 * 60      # Seconds an idle, disconnected session is kept
+RECENT_KEYS = 4            # Responses kept per session for requests resent with the same key
+KEY_USED = "This key was already used for an earlier request"
+BANNER = "standard"        # Pity counters are kept per banner; the server has one
+
+
+def rss_kb() -> int:
+    """Current resident memory of this process in KB (peak RSS where /proc isn't available)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class ProtocolError(Exception):
+    """A request the server can't act on; reported to the client as {"ok": false, "error": ...}."""
+
+
+def character_info(character: gacha_game.Character) -> dict:
+    stats = character.get_stats()
+    return {
+        "name": character.name,
+        "rarity": character.rarity,
+        "level": character.level,
+        "exp": character.exp,
+        "attack": stats["attack"],
+        "hp": stats["hp"]
+    }
+
+
+def character_row(slot: int, character: gacha_game.Character) -> CharacterRow:
+    return CharacterRow(slot, character.name, character.rarity, character.level, character.exp,
+                        character.base_attack, character.base_hp,
+                        {"exp_to_next_level": character.exp_to_next_level})
+
+
+def restore_character(row: CharacterRow) -> gacha_game.Character:
+    character = gacha_game.Character(row.name, row.rarity, verbose=False)
+    character.level, character.exp = row.level, row.exp
+    character.base_attack, character.base_hp = row.attack, row.health
+    character.exp_to_next_level = row.extra.get("exp_to_next_level", 100)
+    return character
+
+
+class Session:
+    def __init__(self, player: str, ledger: Ledger, storage: Optional[Storage] = None):
+        self.player = player
+        self.game = gacha_game.GachaGame(verbose=False, ledger=ledger, account=player)
+        self.lock = asyncio.Lock()
+        self.responses: OrderedDict = OrderedDict()  # Idempotency key -> response
+        self.connections = 0
+        self.last_active = time.monotonic()
+        self.storage = storage
+        self.player_id = None
+        if storage is not None:
+            self.player_id = storage.player_id("gacha_game", player)
+            self.restore()
+
+    def restore(self):
+        # A returning player gets their saved roster; a new one has the starter character saved
+        game = self.game
+        rows = self.storage.roster(self.player_id, limit=-1)
+        if not rows:
+            self.save_new_characters(game.inventory, banner=None)
+            self.storage.set_selected(self.player_id, 0)
+            return
+        game.inventory = [restore_character(row) for row in rows]
+        selected = self.storage.selected(self.player_id)
+        game.selected_character = game.inventory[selected] if selected is not None else None
+
+    def save_new_characters(self, characters: List[gacha_game.Character], banner: Optional[str] = BANNER):
+        if self.storage is None:
+            return
+        start = len(self.game.inventory) - len(characters)
+        self.storage.add_characters(self.player_id, [character_row(start + i, character)
+                                                     for i, character in enumerate(characters)], banner)
+
+    def save_character(self, character: gacha_game.Character):
+        if self.storage is not None:
+            slot = self.game.inventory.index(character)
+            self.storage.update_characters(self.player_id, [character_row(slot, character)])
+
+    def save_currencies(self, ledger: Ledger):
+        if self.storage is not None:
+            self.storage.save_currencies(self.player_id, ledger.balances.get(self.game.account, {}), ledger.seq)
+
+    def state(self) -> dict:
+        game = self.game
+        selected = game.selected_character
+        state = {
+            "player": self.player,
+            "gems": game.player_gems,
+            "coins": game.player_coins,
+            "characters": len(game.inventory),
+            "selected": character_info(selected) if selected else None
+        }
+        if self.storage is not None:
+            state["pity"] = self.storage.pity(self.player_id, BANNER)
+        return state
+
+
+def tx_key(session: Session, request: dict) -> Optional[str]:
+    """The ledger key for a request's idempotency key; keys are per player."""
+    key = request.get("key")
+    return f"{session.player}:{key}" if key is not None else None
+
+
+def int_field(request: dict, name: str, default: int) -> int:
+    value = request.get(name, default)
+    if type(value) is not int:
+        raise ProtocolError(f"{name} must be an integer")
+    return value
+
+
+class GameServer:
+    def __init__(self, session_ttl: float = SESSION_TTL, ledger: Optional[Ledger] = None,
+                 storage: Optional[Storage] = None):
+        """Without a storage, players' rosters live only as long as their sessions."""
+        self.sessions: Dict[str, Session] = {}
+        self.session_ttl = session_ttl
+        self.ledger = ledger if ledger is not None else Ledger(LEDGER_PATH)
+        self.storage = storage
+        self.storage_commits = 0
+        self.commit_scheduled = False
+        self.connections = 0
+        self.requests = 0
+        self.errors = 0
+        self.started = time.monotonic()
+
+        # Actions that need a logged-in session; login and stats are handled separately
+        self.handlers = {
+            "state": self.handle_state,
+            "summon": self.handle_summon,
+            "inventory": self.handle_inventory,
+            "select": self.handle_select,
+            "battle": self.handle_battle,
+            "train": self.handle_train,
+            "shop": self.handle_shop,
+            "buy": self.handle_buy
+        }
+
+    # Actions
+    def handle_state(self, session: Session, request: dict) -> dict:
+        return session.state()
+
+    def handle_summon(self, session: Session, request: dict) -> dict:
+        game = session.game
+        count = request.get("count", 1)
+        key = tx_key(session, request)
+        if count == 1:
+            character = game.summon(key)
+            results = [character] if character else []
+        elif count == 10:
+            results = game.multi_summon(key=key)
+        else:
+            raise ProtocolError("count must be 1 or 10")
+        if not results:
+            # A summon refused for lack of gems leaves its key unused; a replayed one was paid for earlier
+            if key is not None and self.ledger.applied(key) is not None:
+                raise ProtocolError(KEY_USED)
+            raise ProtocolError("Not enough gems")
+        session.save_new_characters(results)
+        return {"results": [character_info(c) for c in results], "gems": game.player_gems}
+
+    def handle_inventory(self, session: Session, request: dict) -> dict:
+        inventory = session.game.inventory
+        offset = max(int_field(request, "offset", 0), 0)
+        limit = min(max(int_field(request, "limit", INVENTORY_PAGE), 1), INVENTORY_PAGE)
+        page = inventory[offset:offset + limit]
+        return {"total": len(inventory), "offset": offset, "characters": [character_info(c) for c in page]}
+
+    def handle_select(self, session: Session, request: dict) -> dict:
+        inventory = session.game.inventory
+        index = request.get("index")
+        if not isinstance(index, int) or not 0 <= index < len(inventory):
+            raise ProtocolError("index out of range")
+        session.game.selected_character = inventory[index]
+        if session.storage is not None:
+            session.storage.set_selected(session.player_id, index)
+        return {"selected": character_info(inventory[index])}
+
+    def handle_battle(self, session: Session, request: dict) -> dict:
+        result = session.game.fight(tx_key(session, request))
+        if result is None:
+            raise ProtocolError("No character selected")
+        if result["replayed"]:
+            if "enemy" not in result:
+                raise ProtocolError(KEY_USED)
+        else:
+            session.save_character(session.game.selected_character)
+        enemy = result["enemy"]
+        return {
+            "replayed": result["replayed"],
+            "victory": result["victory"],
+            "enemy": {"name": enemy.name, "level": enemy.level},
+            "turns": len(result["turns"]),
+            "rewards": {"exp": result["exp"], "gems": result["gems"], "coins": result["coins"]},
+            "character": character_info(session.game.selected_character)
+        }
+
+    def handle_train(self, session: Session, request: dict) -> dict:
+        game = session.game
+        coins = int_field(request, "coins", 100)
+        if coins <= 0:
+            raise ProtocolError("coins must be positive")
+        if game.selected_character is None:
+            raise ProtocolError("No character selected")
+        if not self.ledger.debit(game.account, "coins", coins, tx_key(session, request), "train"):
+            raise ProtocolError("Not enough coins")
+        # train_character only needs gain_exp, which gacha_game characters have too
+        exp = hello_world.train_character(game.selected_character, coins, verbose=False)
+        session.save_character(game.selected_character)
+        return {"exp": exp, "coins": game.player_coins, "character": character_info(game.selected_character)}
+
+    def handle_shop(self, session: Session, request: dict) -> dict:
+        return {"coins": session.game.player_coins, "items": gacha_game.SHOP_ITEMS}
+
+    def handle_buy(self, session: Session, request: dict) -> dict:
+        game = session.game
+        item = game.purchase(request.get("item"), tx_key(session, request))
+        if item is None:
+            raise ProtocolError("Unknown item, not enough coins or no character selected")
+        if item["type"] == "exp":
+            session.save_character(game.selected_character)
+        return {"item": item["name"], "coins": game.player_coins, "gems": game.player_gems}
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self.sessions),
+            "connections": self.connections,
+            "requests": self.requests,
+            "errors": self.errors,
+            "transactions": self.ledger.seq,
+            "ledger_flushes": self.ledger.flushes,
+            "db_commits": self.storage_commits,
+            "rss_kb": rss_kb(),
+            "uptime": round(time.monotonic() - self.started, 1)
+        }
+
+    # Storage
+    def savepoint(self):
+        if self.storage is None:
+            return nullcontext()
+        if not self.commit_scheduled:
+            # Requests handled in the same pass of the event loop share one SQLite commit
+            self.commit_scheduled = True
+            asyncio.get_running_loop().call_soon(self.commit_storage)
+        return self.storage.savepoint()
+
+    def commit_storage(self):
+        self.commit_scheduled = False
+        self.storage.commit()
+        self.storage_commits += 1
+
+    # Protocol
+    def login(self, request: dict) -> Session:
+        player = request.get("player")
+        if not isinstance(player, str) or not player:
+            raise ProtocolError("login needs a player name")
+        session = self.sessions.get(player)
+        if session is None:
+            session = self.sessions[player] = Session(player, self.ledger, self.storage)
+        return session
+
+    async def dispatch(self, session: Optional[Session], request: dict) -> tuple:
+        """Run one request; returns (response, session the connection is logged in as)."""
+        action = request.get("action")
+        if action == "login":
+            new_session = self.login(request)
+            if session is not new_session:
+                if session is not None:
+                    session.connections -= 1
+                new_session.connections += 1
+            session = new_session
+            async with session.lock:
+                return session.state(), session
+        if action == "stats":
+            return self.stats(), session
+
+        handler = self.handlers.get(action)
+        if handler is None:
+            raise ProtocolError(f"Unknown action {action!r}")
+        if session is None:
+            raise ProtocolError("Log in first")
+        async with session.lock:
+            session.last_active = time.monotonic()
+            key = request.get("key")
+            if key is not None:
+                if not isinstance(key, str):
+                    raise ProtocolError("key must be a string")
+                if key in session.responses:
+                    return session.responses[key], session
+                if self.ledger.applied(tx_key(session, request)) is not None:
+                    raise ProtocolError(KEY_USED)
+
+            seq = self.ledger.seq
+            with self.savepoint():
+                result = handler(session, request)
+                if self.ledger.seq != seq:
+                    session.save_currencies(self.ledger)
+            if self.ledger.seq != seq:
+                # Don't report gems or coins moved until the move is durable
+                await self.ledger.commit()
+            if key is not None:
+                session.responses[key] = result
+                if len(session.responses) > RECENT_KEYS:
+                    session.responses.popitem(last=False)
+            return result, session
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        session = None
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    break  # Request line too long; drop the connection
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+
+                self.requests += 1
+                request = {}
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ProtocolError("Requests must be JSON objects")
+                    result, session = await self.dispatch(session, request)
+                    response = {"ok": True, **result}
+                except (ProtocolError, ValueError) as e:
+                    self.errors += 1
+                    response = {"ok": False, "error": str(e)}
+                except Exception as e:
+                    # A bug in one action shouldn't cost the player their connection
+                    self.errors += 1
+                    response = {"ok": False, "error": f"Internal error: {type(e).__name__}"}
+                if "id" in request:
+                    response["id"] = request["id"]
+
+                writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            if session is not None:
+                session.connections -= 1
+                session.last_active = time.monotonic()
+            writer.close()
+
+    async def reap_sessions(self, interval: float = 60.0):
+        # Drop sessions nobody has been connected to for session_ttl seconds
+        while True:
+            await asyncio.sleep(interval)
+            cutoff = time.monotonic() - self.session_ttl
+            for player, session in list(self.sessions.items()):
+                if session.connections == 0 and session.last_active < cutoff:
+                    del self.sessions[player]
+
+    async def report(self, interval: float):
+        last_requests = self.requests
+        while True:
+            await asyncio.sleep(interval)
+            rate = (self.requests - last_requests) / interval
+            last_requests = self.requests
+            print(f"[{len(self.sessions)} sessions | {self.connections} connections | {rate:.0f} req/s]")
+
+    async def serve(self, host: str, port: int, stats_interval: float = 0.0):
+        server = await asyncio.start_server(self.handle_client, host, port, limit=MAX_LINE, backlog=1024)
+        print(f"Game server listening on {host}:{server.sockets[0].getsockname()[1]}")
+        tasks = [asyncio.create_task(self.reap_sessions())]
+        if stats_interval > 0:
+            tasks.append(asyncio.create_task(self.report(stats_interval)))
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.ledger.close()
+            if self.storage is not None:
+                self.storage.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Multiplayer gacha game server (JSON lines over TCP)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8770)
+    parser.add_argument("--session-ttl", type=float, default=SESSION_TTL,
+                        help="seconds an idle, disconnected session is kept")
+    parser.add_argument("--stats-interval", type=float, default=0.0,
+                        help="print sessions and request rate every N seconds (0 = off)")
+    parser.add_argument("--ledger", default=LEDGER_PATH, help="gem/coin ledger log")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database for rosters (\"\" = don't persist)")
+    args = parser.parse_args(argv)
+
+    server = GameServer(args.session_ttl, Ledger(args.ledger), Storage(args.db) if args.db else None)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.stats_interval))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
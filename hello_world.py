@@ -4,6 +4,10 @@ from colorama import init, Fore, Back, Style
 import json
 from typing import List, Dict
 
+import content_pack
+from ledger import get_ledger
+from storage import CharacterRow, Storage, get_storage
+
 # Initialize colorama for Windows color support
 init()
 
@@ -118,6 +122,28 @@ class Character:
         char.exp_to_level = data.get("exp_to_level", 100)
         return char
 
+def character_row(slot: int, character: Character) -> CharacterRow:
+    return CharacterRow(slot, character.name, character.rarity, character.level, character.exp,
+                        character.attack, character.max_health,
+                        {"health": character.health, "exp_to_level": character.exp_to_level})
+
+def load_characters(storage: Storage, player_id: int) -> List[Character]:
+    """A player's saved roster, materials included, in the order it was obtained."""
+    materials = storage.materials(player_id)
+    characters = []
+    for row in storage.roster(player_id, limit=-1):
+        char = Character(row.name, row.rarity, row.attack, row.extra.get("health", row.health))
+        char.max_health, char.level, char.exp = row.health, row.level, row.exp
+        char.exp_to_level = row.extra.get("exp_to_level", 100)
+        char.materials_inventory = materials.get(row.slot, {})
+        characters.append(char)
+    return characters
+
+def save_character(storage: Storage, player_id: int, slot: int, character: Character):
+    with storage.transaction():
+        storage.update_characters(player_id, [character_row(slot, character)])
+        storage.save_materials(player_id, slot, character.materials_inventory)
+
 class GachaGame:
     def __init__(self):
         self.characters_pool = {
@@ -174,7 +200,7 @@ def display_title():
     '''
     print(Fore.CYAN + title + Style.RESET_ALL)
 
-def display_character(character: Character):
+def display_character(character: Character, show_lore: bool = False):
     rarity_colors = {
         "6★": Fore.RED + Style.BRIGHT,
         "5★": Fore.YELLOW,
@@ -187,17 +213,24 @@ def display_character(character: Character):
     print(f"EXP: {character.exp}/{character.exp_to_level}")
     print(f"Attack: {character.attack}")
     print(f"Health: {character.health}/{character.max_health}")
+    lore = content_pack.lore("character", character.name) if show_lore else ""
+    if lore:
+        print(f"{Style.DIM}{lore}{Style.RESET_ALL}")
+
+def train_character(character: Character, coins_spent: int, verbose: bool = True) -> int:
+    """Train a character using coins. Returns exp gained.
 
-def train_character(character: Character, coins_spent: int) -> int:
-    """Train a character using coins. Returns exp gained."""
+    verbose=False skips the narration and pauses, for simulations and servers.
+    """
     exp_per_coin = 10
     exp_gained = coins_spent * exp_per_coin
     
-    print_slow(f"\n{Fore.CYAN}Training {character.name}...{Style.RESET_ALL}")
-    time.sleep(1)
+    if verbose:
+        print_slow(f"\n{Fore.CYAN}Training {character.name}...{Style.RESET_ALL}")
+        time.sleep(1)
     
     leveled_up = character.gain_exp(exp_gained)
-    if leveled_up:
+    if leveled_up and verbose:
         print_slow(f"\n{Fore.YELLOW}Level Up! {character.name} is now level {character.level}!{Style.RESET_ALL}")
         print_slow(f"Attack increased to {character.attack}")
         print_slow(f"Health increased to {character.max_health}")
@@ -436,6 +469,9 @@ def select_boss_menu(player_level: int) -> Boss:
                     for i, boss in enumerate(domain_bosses, 1):
                         print(f"\n{i}. {boss.name}")
                         print(f"   {boss.description}")
+                        lore = content_pack.lore("boss", boss.name)
+                        if lore:
+                            print(f"   {Style.DIM}{lore}{Style.RESET_ALL}")
                         print(f"   Level: {boss.level}")
                         print(f"   Attack: {boss.attack}")
                         print(f"   Health: {boss.health}")
@@ -562,9 +598,18 @@ def play_game():
     print_slow(f"\nWelcome, {Fore.CYAN}{player_name}{Style.RESET_ALL}! Your gacha adventure begins...")
     
     game = GachaGame()
-    gems = 1000
-    coins = 2000  # Starting coins for training
-    characters: List[Character] = []
+    # Gems and coins are kept in the ledger and characters in the database, both per player name,
+    # so a returning summoner picks up where they left off
+    ledger = get_ledger()
+    account = f"hello_world:{player_name}"
+    ledger.transact(account, {"gems": 1000, "coins": 2000}, key=f"{account}:start", reason="starting balance")
+    storage = get_storage()
+    player_id = storage.player_id("hello_world", player_name)
+    characters = load_characters(storage, player_id)
+    if characters:
+        print_slow(f"\n{Fore.YELLOW}Welcome back! Your {len(characters)} characters are waiting.{Style.RESET_ALL}")
+        play_rounds(game, ledger, account, storage, player_id, characters, player_name)
+        return
     
     # Let player choose their 5★ or 6★ starter character
     print_slow(f"\n{Fore.YELLOW}Choose your starter character:{Style.RESET_ALL}")
@@ -601,10 +646,16 @@ def play_game():
     
     starter = Character(starter_char[0], rarity, starter_char[1], starter_char[2])
     characters.append(starter)
+    storage.add_characters(player_id, [character_row(0, starter)])
     print_slow(f"\n{Fore.YELLOW}Excellent choice! You received your chosen character:{Style.RESET_ALL}")
-    display_character(starter)
-    
+    display_character(starter, show_lore=True)
+    play_rounds(game, ledger, account, storage, player_id, characters, player_name)
+
+def play_rounds(game: GachaGame, ledger, account: str, storage: Storage, player_id: int,
+                characters: List[Character], player_name: str):
     while True:
+        gems, coins = ledger.balance(account, "gems"), ledger.balance(account, "coins")
+        storage.save_currencies(player_id, {"gems": gems, "coins": coins}, ledger.seq)
         print(f"\n{Fore.CYAN}Gems: {gems} | Coins: {coins}{Style.RESET_ALL}")
         print(Fore.MAGENTA + """
 1. Summon Character (100 gems)
@@ -620,14 +671,14 @@ def play_game():
         choice = input("Enter your choice (1-8): ")
         
         if choice == '1':
-            if gems >= 100:
-                gems -= 100
+            if ledger.debit(account, "gems", 100, reason="summon"):
                 new_char = game.summon()
                 characters.append(new_char)
+                storage.add_characters(player_id, [character_row(len(characters) - 1, new_char)], banner="standard")
                 print_slow(f"\n{Fore.YELLOW}✨ Summoning... ✨{Style.RESET_ALL}")
                 time.sleep(1)
                 print_slow(f"\n{Fore.GREEN}You got:{Style.RESET_ALL}")
-                display_character(new_char)
+                display_character(new_char, show_lore=True)
             else:
                 print_slow(f"\n{Fore.RED}Not enough gems!{Style.RESET_ALL}")
                 
@@ -657,14 +708,14 @@ def play_game():
                     if won:
                         gem_reward = random.randint(50, 150)
                         coin_reward = random.randint(100, 300)  # Add coin rewards
-                        gems += gem_reward
-                        coins += coin_reward
+                        ledger.transact(account, {"gems": gem_reward, "coins": coin_reward}, reason="battle")
                         print_slow(f"\n{Fore.GREEN}Victory! You earned {gem_reward} gems and {coin_reward} coins!{Style.RESET_ALL}")
                         # Level up character
                         characters[char_choice].level += 1
                         characters[char_choice].attack += 2
                         characters[char_choice].max_health += 5
                         characters[char_choice].health = characters[char_choice].max_health
+                        save_character(storage, player_id, char_choice, characters[char_choice])
                     else:
                         print_slow(f"\n{Fore.RED}Defeat! Better luck next time!{Style.RESET_ALL}")
                 else:
@@ -689,9 +740,9 @@ def play_game():
                     print("Training costs: 50 coins = 500 EXP")
                     coins_to_spend = int(input("How many coins do you want to spend on training? "))
                     
-                    if coins_to_spend <= coins and coins_to_spend >= 0:
-                        coins -= coins_to_spend
+                    if coins_to_spend >= 0 and ledger.debit(account, "coins", coins_to_spend, reason="train"):
                         exp_gained = train_character(characters[char_choice], coins_to_spend)
+                        save_character(storage, player_id, char_choice, characters[char_choice])
                         print_slow(f"\n{Fore.GREEN}Training complete! Gained {exp_gained} EXP!{Style.RESET_ALL}")
                     else:
                         print_slow(f"\n{Fore.RED}Not enough coins or invalid amount!{Style.RESET_ALL}")
@@ -704,8 +755,7 @@ def play_game():
             # Daily quest - simple battle with guaranteed reward
             gem_reward = random.randint(80, 120)
             coin_reward = random.randint(150, 250)  # Add coin rewards to daily quest
-            gems += gem_reward
-            coins += coin_reward
+            ledger.transact(account, {"gems": gem_reward, "coins": coin_reward}, reason="daily quest")
             print_slow(f"\n{Fore.GREEN}Daily Quest completed! You earned {gem_reward} gems and {coin_reward} coins!{Style.RESET_ALL}")
             
         elif choice == '6':
@@ -739,12 +789,12 @@ def play_game():
                         for material in awarded_materials:
                             characters[char_choice].add_material(material)
                             print(f"• {material}")
+                        save_character(storage, player_id, char_choice, characters[char_choice])
                         
                         # Award extra rewards
                         gem_reward = random.randint(100, 300)
                         coin_reward = random.randint(200, 500)
-                        gems += gem_reward
-                        coins += coin_reward
+                        ledger.transact(account, {"gems": gem_reward, "coins": coin_reward}, reason="boss battle")
                         print_slow(f"\n{Fore.GREEN}Also received {gem_reward} gems and {coin_reward} coins!{Style.RESET_ALL}")
                     else:
                         print_slow(f"\n{Fore.RED}Defeated by {boss.name}! Better luck next time!{Style.RESET_ALL}")
@@ -776,6 +826,7 @@ def play_game():
                         display_materials(characters[char_choice])
                     elif mat_choice == '2':
                         use_material_menu(characters[char_choice])
+                        save_character(storage, player_id, char_choice, characters[char_choice])
                     else:
                         print_slow(f"\n{Fore.RED}Invalid choice!{Style.RESET_ALL}")
                 else:
@@ -0,0 +1,387 @@
+"""Transactional ledger for the games' gems and coins.
+
+Every change to a player's currencies is a transaction: signed amounts for one
+account, e.g. {"coins": -1000, "gems": 100} for a shop purchase, applied all or
+nothing. The overdraft check and the update happen under one lock, so two
+sessions spending the same balance can never both succeed. Each transaction
+carries an idempotency key naming the action; repeating a key returns the
+original transaction (marked replayed) instead of applying it again.
+
+Transactions are appended to a JSON-lines log with group commit: instead of
+writing and fsyncing each one, flush() writes everything pending with a single
+write and fsync. Callers that need durability wait in sync() (threads) or
+commit() (asyncio), and every transaction queued while one flush is on disk
+goes out with the next. Buffered writes are flushed every flush_interval
+seconds and on exit. Opening a ledger replays its log.
+
+    python ledger.py                      # replay the log and check it reconciles
+    python ledger.py --account alice      # plus one account's balances and history
+"""
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+LEDGER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".ledger.jsonl")
+BATCH_SIZE = 512         # Pending transactions that trigger a flush
+FLUSH_INTERVAL = 0.05    # Seconds a buffered transaction may wait for its flush
+COMMIT_DELAY = 0.0002    # Seconds sync() waits for other writers to join its flush
+
+_encode = json.JSONEncoder(separators=(",", ":")).encode  # json.dumps(separators=...) rebuilds this per call
+
+
+class LedgerError(Exception):
+    """The log can't be trusted, e.g. an unreadable entry in the middle of it."""
+
+
+class Transaction(NamedTuple):
+    seq: int
+    key: str
+    account: str
+    changes: Dict[str, int]   # Currency -> signed amount
+    reason: str
+    time: float
+    replayed: bool = False    # The key was already used; only seq refers to that earlier transaction
+
+    def entry(self) -> dict:
+        return {"seq": self.seq, "key": self.key, "account": self.account,
+                "changes": self.changes, "reason": self.reason, "time": self.time}
+
+
+def read_entries(path: str) -> Iterator[Tuple[int, Optional[dict], bytes]]:
+    """Yield (line number, entry or None if unreadable, raw line) for every line of a log."""
+    with open(path, "rb") as f:
+        for line_no, raw in enumerate(f, 1):
+            try:
+                entry = json.loads(raw) if raw.endswith(b"\n") else None
+            except ValueError:
+                entry = None
+            yield line_no, entry, raw
+
+
+class Ledger:
+    def __init__(self, path: Optional[str] = LEDGER_PATH, batch_size: int = BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL, commit_delay: float = COMMIT_DELAY, fsync: bool = True):
+        """`path=None` keeps the ledger in memory only (for games that save nothing, and benchmarks)."""
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.commit_delay = commit_delay
+        self.fsync = fsync
+
+        self.balances: Dict[str, Dict[str, int]] = {}
+        self.keys: Dict[str, int] = {}   # Idempotency key -> seq (ints keep this out of the GC's way)
+        self.seq = 0              # Last transaction applied
+        self.committed = 0        # Last transaction on disk
+        self.flushes = 0
+        self.syncing = 0          # Threads waiting in sync()
+
+        self.lock = threading.Lock()         # Guards balances, keys and the pending queue
+        self.flush_lock = threading.Lock()   # One writer at a time; not held while transacting
+        self.pending: List[str] = []
+        self.file = None
+        self.closed = threading.Event()
+        self._waiters: List[Tuple[int, asyncio.Future]] = []
+        self._flushing: Optional[asyncio.Task] = None
+
+        if path is not None:
+            self.replay()
+            self.file = open(path, "ab", buffering=0)  # Unbuffered, so a failed flush leaves nothing queued behind
+            threading.Thread(target=self.flush_periodically, name="ledger-flush", daemon=True).start()
+            atexit.register(self.close)
+
+    def replay(self):
+        if not os.path.exists(self.path):
+            return
+        good = 0
+        for line_no, entry, raw in read_entries(self.path):
+            if entry is None:
+                if not raw.endswith(b"\n"):
+                    break  # The last flush was cut short by a crash; drop the partial line
+                raise LedgerError(f"{self.path}:{line_no}: unreadable entry (run ledger.py to reconcile)")
+            self.keys[entry["key"]] = entry["seq"]
+            self.apply_changes(entry["account"], entry["changes"])
+            self.seq = entry["seq"]
+            good += len(raw)
+        self.committed = self.seq
+        if good < os.path.getsize(self.path):
+            os.truncate(self.path, good)
+
+    # Balances
+    def balance(self, account: str, currency: str) -> int:
+        return self.balances.get(account, {}).get(currency, 0)
+
+    def applied(self, key: str) -> Optional[int]:
+        """Seq of the transaction already applied under `key`, if any."""
+        return self.keys.get(key)
+
+    def apply_changes(self, account: str, changes: Dict[str, int]):
+        wallet = self.balances.setdefault(account, {})
+        for currency, amount in changes.items():
+            wallet[currency] = wallet.get(currency, 0) + amount
+
+    def transact(self, account: str, changes: Dict[str, int], key: Optional[str] = None,
+                 reason: str = "") -> Optional[Transaction]:
+        """Apply all of `changes` to `account` atomically.
+
+        Returns the transaction, one marked replayed if `key` was already used (nothing is
+        applied again), or None if any balance would go negative. The transaction is durable
+        once sync() or commit() has returned for its seq.
+        """
+        changes = dict(changes)
+        for amount in changes.values():
+            if type(amount) is not int:
+                raise ValueError(f"amounts must be integers, got {amount!r}")
+        if key is None:
+            key = uuid.uuid4().hex
+
+        with self.lock:
+            done = self.keys.get(key)
+            if done is not None:
+                return Transaction(done, key, account, changes, reason, time.time(), replayed=True)
+            wallet = self.balances.get(account, {})
+            for currency, amount in changes.items():
+                if amount < 0 and wallet.get(currency, 0) + amount < 0:
+                    return None
+
+            self.seq += 1
+            tx = Transaction(self.seq, key, account, changes, reason, time.time())
+            self.keys[key] = self.seq
+            self.apply_changes(account, changes)
+            if self.path is None:
+                self.committed = self.seq
+                return tx
+            self.pending.append(_encode(tx.entry()) + "\n")
+            full = len(self.pending) >= self.batch_size
+        if full:
+            self.flush()
+        return tx
+
+    def debit(self, account: str, currency: str, amount: int, key: Optional[str] = None,
+              reason: str = "") -> Optional[Transaction]:
+        return self.transact(account, {currency: -amount}, key, reason)
+
+    def credit(self, account: str, currency: str, amount: int, key: Optional[str] = None,
+               reason: str = "") -> Optional[Transaction]:
+        return self.transact(account, {currency: amount}, key, reason)
+
+    # Group commit
+    def flush(self):
+        """Write and fsync every pending transaction in one go.
+
+        If the write or fsync fails (disk full, I/O error), the file is cut back to where it was,
+        the transactions are queued again ahead of newer ones and the error is raised; nothing
+        of the batch counts as committed, and a later flush retries it.
+        """
+        with self.flush_lock:
+            with self.lock:
+                lines, self.pending = self.pending, []
+                last = self.seq
+            if lines and self.file is not None:
+                data = memoryview("".join(lines).encode("utf-8"))
+                start = self.file.tell()
+                try:
+                    while data:
+                        data = data[self.file.write(data):]
+                    if self.fsync:
+                        os.fsync(self.file.fileno())
+                except OSError:
+                    try:
+                        self.file.truncate(start)
+                        self.file.seek(start)
+                    except OSError:
+                        pass  # replay() drops a partial last line; reconcile reports anything worse
+                    with self.lock:
+                        self.pending[:0] = lines
+                    raise
+                self.flushes += 1
+            self.committed = max(self.committed, last)
+
+    def sync(self, seq: Optional[int] = None):
+        """Block until transaction `seq` (default: the latest) is on disk.
+
+        Threads waiting at the same time queue on the flush lock; whichever gets it first
+        writes everyone's transactions, and the rest find theirs already committed. With other
+        threads syncing too, the first one waits commit_delay so they can join its flush.
+        """
+        seq = self.seq if seq is None else seq
+        if self.committed >= seq:
+            return
+        with self.lock:
+            self.syncing += 1
+        try:
+            while self.committed < seq:
+                if self.syncing > 1 and self.commit_delay:
+                    time.sleep(self.commit_delay)
+                    if self.committed >= seq:
+                        break
+                self.flush()
+        finally:
+            with self.lock:
+                self.syncing -= 1
+
+    async def commit(self, seq: Optional[int] = None):
+        """Wait for transaction `seq` to be on disk without blocking the event loop.
+
+        All coroutines waiting at the same time share one flush, run on the default executor.
+        """
+        seq = self.seq if seq is None else seq
+        if self.committed >= seq:
+            return
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._waiters.append((seq, future))
+        if self._flushing is None:
+            self._flushing = loop.create_task(self.flush_waiters())
+        await future
+
+    async def flush_waiters(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while self._waiters:
+                await loop.run_in_executor(None, self.flush)
+                waiting, self._waiters = self._waiters, []
+                for seq, future in waiting:
+                    if seq > self.committed:
+                        self._waiters.append((seq, future))  # Arrived during the flush
+                    elif not future.done():
+                        future.set_result(None)
+        except Exception as e:
+            waiting, self._waiters = self._waiters, []
+            for seq, future in waiting:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._flushing = None
+
+    def flush_periodically(self):
+        while not self.closed.wait(self.flush_interval):
+            if self.pending:
+                try:
+                    self.flush()
+                except OSError:
+                    pass  # Still pending: retried next time, and sync()/commit() callers get the error
+
+    def close(self):
+        if self.closed.is_set():
+            return
+        self.closed.set()
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+
+_ledger: Optional[Ledger] = None
+
+
+def get_ledger() -> Ledger:
+    """The shared ledger backed by LEDGER_PATH, opened on first use."""
+    global _ledger
+    if _ledger is None:
+        _ledger = Ledger()
+    return _ledger
+
+
+def reconcile(path: str = LEDGER_PATH, expected: Optional[Dict[str, Dict[str, int]]] = None) -> dict:
+    """Replay a log from scratch and check it: sequence numbers without gaps, no key applied
+    twice, no balance ever negative and, if given, final balances equal to `expected`
+    (e.g. a live Ledger's balances).
+    """
+    balances: Dict[str, Dict[str, int]] = {}
+    totals: Dict[str, Dict[str, int]] = {}
+    keys = set()
+    problems = []
+    last_seq = 0
+    truncated = False
+
+    for line_no, entry, raw in read_entries(path):
+        if entry is None:
+            if not raw.endswith(b"\n"):
+                truncated = True
+            else:
+                problems.append(f"line {line_no}: unreadable entry")
+            continue
+        if entry["seq"] != last_seq + 1:
+            problems.append(f"line {line_no}: seq {entry['seq']} follows {last_seq}")
+        last_seq = entry["seq"]
+        if entry["key"] in keys:
+            problems.append(f"line {line_no}: key {entry['key']!r} applied twice")
+        keys.add(entry["key"])
+
+        wallet = balances.setdefault(entry["account"], {})
+        for currency, amount in entry["changes"].items():
+            wallet[currency] = wallet.get(currency, 0) + amount
+            total = totals.setdefault(currency, {"credited": 0, "debited": 0})
+            total["credited" if amount > 0 else "debited"] += abs(amount)
+            if wallet[currency] < 0:
+                problems.append(f"line {line_no}: {entry['account']} {currency} overdrawn to {wallet[currency]}")
+
+    if expected is not None:
+        for account in sorted(set(balances) | set(expected)):
+            for currency in sorted(set(balances.get(account, {})) | set(expected.get(account, {}))):
+                logged = balances.get(account, {}).get(currency, 0)
+                live = expected.get(account, {}).get(currency, 0)
+                if logged != live:
+                    problems.append(f"{account} {currency}: log says {logged}, ledger says {live}")
+
+    for currency, total in totals.items():
+        total["outstanding"] = total["credited"] - total["debited"]
+    return {
+        "entries": len(keys),
+        "accounts": len(balances),
+        "totals": totals,
+        "truncated_tail": truncated,
+        "problems": problems,
+        "balances": balances
+    }
+
+
+def account_history(path: str, account: str) -> List[dict]:
+    return [entry for _, entry, _ in read_entries(path) if entry and entry["account"] == account]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Reconcile the gem/coin ledger log")
+    parser.add_argument("--log", default=LEDGER_PATH)
+    parser.add_argument("--account", default=None, help="also show this account's balances and history")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        report = reconcile(args.log)
+    except FileNotFoundError:
+        print(f"No ledger log at {args.log}")
+        return 1
+
+    if args.json:
+        print(json.dumps({k: v for k, v in report.items() if k != "balances"}, indent=2))
+    else:
+        print(f"{report['entries']} transactions over {report['accounts']} accounts")
+        for currency, total in sorted(report["totals"].items()):
+            print(f"  {currency}: {total['credited']:,} credited, {total['debited']:,} spent, "
+                  f"{total['outstanding']:,} outstanding")
+        if report["truncated_tail"]:
+            print("The last entry was cut short by a crash and is ignored")
+        for problem in report["problems"]:
+            print(f"PROBLEM {problem}")
+        if not report["problems"]:
+            print("Log reconciles: no gaps, no replayed keys, no overdrafts")
+
+    if args.account:
+        print(f"\n{args.account}: {report['balances'].get(args.account, {})}")
+        for entry in account_history(args.log, args.account):
+            changes = ", ".join(f"{amount:+} {currency}" for currency, amount in entry["changes"].items())
+            print(f"  #{entry['seq']} {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['time']))} "
+                  f"{entry['reason'] or '-'}: {changes}")
+    return 1 if report["problems"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""Load generator for the multiplayer summon/battle workload.
+
+Creates N virtual players, logs them all in, then has every player run the
+same weighted action mix at once: single and multi summons, battles, coin
+training, shop purchases and inventory pages. Reports throughput, latency
+percentiles per action, memory growth per player and how many ledger
+transactions each group commit carried.
+
+Players either talk to game_server.py over real TCP connections, or, with
+--in-process, call the same game server handlers directly. Comparing the two
+separates the cost of the game logic from the cost of the network and protocol.
+
+    python load_gen.py --in-process --sessions 5000
+    python game_server.py --port 8770 &
+    python load_gen.py --port 8770 --sessions 2000 --requests 20
+    python load_gen.py --spawn-server --sessions 2000   # start a server subprocess for the run
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from game_server import GameServer, ProtocolError, rss_kb
+from ledger import Ledger
+from storage import Storage
+
+# Weighted mix of what a player does once logged in
+ACTIONS = [
+    ({"action": "summon", "count": 1}, 25),
+    ({"action": "summon", "count": 10}, 5),
+    ({"action": "battle"}, 30),
+    ({"action": "train", "coins": 50}, 15),
+    ({"action": "buy", "item": "EXP Potion"}, 10),
+    ({"action": "inventory", "offset": 0, "limit": 20}, 10),
+    ({"action": "state"}, 5),
+]
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    return values[max(math.ceil(p / 100 * len(values)), 1) - 1]
+
+
+def action_label(payload: dict) -> str:
+    if payload["action"] == "summon":
+        return "multi_summon" if payload.get("count") == 10 else "summon"
+    return payload["action"]
+
+
+class Player:
+    """A virtual player with its own connection to a game server."""
+
+    def __init__(self, name: str, rng: random.Random, host: str = "127.0.0.1", port: int = 8770):
+        self.name = name
+        self.rng = rng
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.next_id = 0
+        self.run_id = uuid.uuid4().hex[:8]  # Makes idempotency keys unique across runs
+        self.latencies: Dict[str, List[float]] = {}
+        self.rejected = 0  # Requests the game refused, e.g. not enough gems
+
+    async def send(self, payload: dict) -> dict:
+        self.next_id += 1
+        request = dict(payload, id=self.next_id, key=f"{self.run_id}-{self.next_id}")
+        self.writer.write(json.dumps(request).encode("utf-8") + b"\n")
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        return json.loads(line)
+
+    async def request(self, payload: dict) -> dict:
+        start = time.perf_counter()
+        response = await self.send(payload)
+        self.latencies.setdefault(action_label(payload), []).append(time.perf_counter() - start)
+        if not response["ok"]:
+            self.rejected += 1
+        return response
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        await self.send({"action": "login", "player": self.name})
+
+    async def play(self, requests: int):
+        actions, weights = zip(*ACTIONS)
+        for _ in range(requests):
+            await self.request(self.rng.choices(actions, weights)[0])
+            await asyncio.sleep(0)  # Let other players in between, as a network round trip would
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+class LocalPlayer(Player):
+    """A virtual player calling an in-process GameServer directly, without sockets or JSON."""
+
+    def __init__(self, name: str, rng: random.Random, server: GameServer):
+        super().__init__(name, rng)
+        self.server = server
+        self.session = None
+
+    async def send(self, payload: dict) -> dict:
+        self.next_id += 1
+        request = dict(payload, key=f"{self.run_id}-{self.next_id}")
+        try:
+            result, self.session = await self.server.dispatch(self.session, request)
+        except ProtocolError as e:
+            return {"ok": False, "error": str(e)}
+        return {"ok": True, **result}
+
+    async def connect(self):
+        await self.send({"action": "login", "player": self.name})
+
+    async def close(self):
+        pass
+
+
+async def run(sessions: int, requests: int, seed: int, host: str = "127.0.0.1", port: int = 8770,
+              in_process: bool = False, connect_batch: int = 200) -> dict:
+    rng = random.Random(seed)
+    server = None
+    if in_process:
+        # A throwaway on-disk ledger and database, so commits cost what they cost in the real server
+        data_dir = tempfile.TemporaryDirectory()
+        server = GameServer(ledger=Ledger(os.path.join(data_dir.name, "ledger.jsonl")),
+                            storage=Storage(os.path.join(data_dir.name, "game.sqlite")))
+
+    def make_player(i: int) -> Player:
+        player_rng = random.Random(rng.random())
+        if in_process:
+            return LocalPlayer(f"player{i}", player_rng, server)
+        return Player(f"player{i}", player_rng, host, port)
+
+    async def server_stats() -> dict:
+        if in_process:
+            return server.stats()
+        return await players[0].send({"action": "stats"})
+
+    async def server_rss() -> int:
+        if in_process:
+            return rss_kb()
+        return (await server_stats())["rss_kb"]
+
+    players = [make_player(i) for i in range(sessions)]
+    await players[0].connect()
+    rss_start = await server_rss()
+    ledger_start = await server_stats()
+
+    # Connect in batches so the server's accept backlog isn't flooded, then play all at once
+    start = time.perf_counter()
+    for i in range(1, sessions, connect_batch):
+        await asyncio.gather(*(p.connect() for p in players[i:i + connect_batch]))
+    connect_time = time.perf_counter() - start
+    rss_logged_in = await server_rss()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(p.play(requests) for p in players))
+    elapsed = time.perf_counter() - start
+    rss_end = await server_rss()
+    ledger_end = await server_stats()
+    await asyncio.gather(*(p.close() for p in players))
+    if in_process:
+        server.ledger.close()
+        server.storage.close()
+        data_dir.cleanup()
+    transactions = ledger_end["transactions"] - ledger_start["transactions"]
+    flushes = ledger_end["ledger_flushes"] - ledger_start["ledger_flushes"]
+
+    by_action: Dict[str, List[float]] = {}
+    for p in players:
+        for label, values in p.latencies.items():
+            by_action.setdefault(label, []).extend(values)
+    everything = sorted(value for values in by_action.values() for value in values)
+
+    def summary(values: List[float]) -> dict:
+        values = sorted(values)
+        return {"count": len(values), **{f"p{p}": percentile(values, p) * 1000 for p in (50, 95, 99)}}
+
+    return {
+        "mode": "in-process" if in_process else f"server {host}:{port}",
+        "sessions": sessions,
+        "connect_time": connect_time,
+        "requests": len(everything),
+        "rejected": sum(p.rejected for p in players),
+        "elapsed": elapsed,
+        "throughput": len(everything) / elapsed if elapsed else 0.0,
+        "latency_ms": summary(everything),
+        "actions_ms": {label: summary(values) for label, values in sorted(by_action.items())},
+        # Currency transactions committed, and how many shared each write + fsync
+        "ledger": {
+            "transactions": transactions,
+            "flushes": flushes,
+            "per_flush": transactions / flushes if flushes else 0.0
+        },
+        # Resident memory of the process hosting the games
+        "memory_kb": {
+            "start": rss_start,
+            "per_player_login": (rss_logged_in - rss_start) / max(sessions - 1, 1),
+            "per_player_play": (rss_end - rss_logged_in) / sessions
+        }
+    }
+
+
+def print_report(report: dict):
+    print(f"{report['sessions']} concurrent players ({report['mode']}), logged in in {report['connect_time']:.2f} s")
+    print(f"{report['requests']} requests in {report['elapsed']:.2f} s = {report['throughput']:.0f} req/s "
+          f"({report['rejected']} refused by the game rules)")
+    print(f"\n{'latency (ms)':<16}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}")
+    rows = list(report["actions_ms"].items()) + [("all", report["latency_ms"])]
+    for label, values in rows:
+        print(f"{label:<16}{values['count']:>8}{values['p50']:>10.2f}{values['p95']:>10.2f}{values['p99']:>10.2f}")
+    ledger = report["ledger"]
+    print(f"\nledger: {ledger['transactions']} transactions in {ledger['flushes']} group commits "
+          f"({ledger['per_flush']:.1f} per fsync)")
+    memory = report["memory_kb"]
+    print(f"\nmemory: {memory['start'] / 1024:.1f} MB at start, +{memory['per_player_login']:.1f} KB per player "
+          f"to log in, +{memory['per_player_play']:.1f} KB per player while playing")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load generator for the multiplayer summon/battle workload")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8770)
+    parser.add_argument("--sessions", type=int, default=1000, help="concurrent virtual players")
+    parser.add_argument("--requests", type=int, default=20, help="requests per player after login")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--in-process", action="store_true", help="call the game handlers directly, no server")
+    parser.add_argument("--spawn-server", action="store_true", help="run game_server.py as a subprocess")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    server: Optional[subprocess.Popen] = None
+    data_dir: Optional[tempfile.TemporaryDirectory] = None
+    if args.spawn_server and not args.in_process:
+        # A fresh ledger and database, so runs don't restore each other's players
+        data_dir = tempfile.TemporaryDirectory()
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "game_server.py")
+        server = subprocess.Popen([sys.executable, script, "--host", args.host, "--port", str(args.port),
+                                   "--ledger", os.path.join(data_dir.name, "ledger.jsonl"),
+                                   "--db", os.path.join(data_dir.name, "game.sqlite")],
+                                  stdout=subprocess.PIPE, text=True)
+        server.stdout.readline()  # Wait for "listening"
+    try:
+        report = asyncio.run(run(args.sessions, args.requests, args.seed, args.host, args.port, args.in_process))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if data_dir is not None:
+            data_dir.cleanup()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,31 +1,473 @@
-from openai import OpenAI
+from openai import APIConnectionError, APIStatusError, APITimeoutError, AsyncOpenAI, OpenAI, RateLimitError
+import argparse
+import asyncio
+import json
 import os
+import random
+import sys
+import time
 from dotenv import load_dotenv
+import request_metrics
+from response_cache import DEFAULT_TTL, ResponseCache, cache_key
 
-print("Loading environment variables...")
-load_dotenv()
-
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    print("Error: No OPENAI_API_KEY found in .env file")
-    exit(1)
-
-print("Setting up OpenAI client...")
-client = OpenAI(api_key=api_key)
-
-print("\nWhat would you like to ask the AI? (Type your question and press Enter)")
-user_input = input("> ")
-
-try:
-    print("\nSending request to OpenAI...")
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant."},
-            {"role": "user", "content": user_input}
-        ]
-    )
-    print("\nAI Response:")
-    print(response.choices[0].message.content)
-except Exception as e:
-    print(f"An error occurred: {str(e)}")
\ No newline at end of file
+DEFAULT_MODEL = "gpt-3.5-turbo"
+SYSTEM_PROMPT = "You are a helpful assistant."
+DEFAULT_CONCURRENCY = 8
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = 0.5   # Seconds; doubled after each failed attempt
+BACKOFF_MAX = 20.0
+HISTORY_TOKENS = 3000  # Context budget for REPL conversation history
+
+
+def load_settings(base_url=None) -> tuple:
+    print("Loading environment variables...")
+    load_dotenv()
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    base_url = base_url or os.getenv("OPENAI_BASE_URL")
+    if not api_key:
+        if not base_url:
+            print("Error: No OPENAI_API_KEY found in .env file")
+            sys.exit(1)
+        api_key = "local"  # Local/stub servers don't check the key
+    return api_key, base_url
+
+
+def make_client(base_url=None) -> OpenAI:
+    api_key, base_url = load_settings(base_url)
+    print("Setting up OpenAI client...")
+    return OpenAI(api_key=api_key, base_url=base_url, http_client=request_metrics.traced_client())
+
+
+def make_async_client(base_url=None) -> AsyncOpenAI:
+    api_key, base_url = load_settings(base_url)
+    print("Setting up OpenAI client...")
+    # Retries are handled by ask_with_retry so they can respect the concurrency limit
+    return AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0,
+                       http_client=request_metrics.traced_async_client())
+
+
+def build_messages(user_input: str, system_prompt: str = SYSTEM_PROMPT) -> list:
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_input}
+    ]
+
+
+def ask(client: OpenAI, messages: list, model: str = DEFAULT_MODEL) -> dict:
+    """Non-streaming request. Returns the answer text plus timing/usage stats."""
+    with request_metrics.track("request", model) as record:
+        start = time.perf_counter()
+        response = client.chat.completions.create(model=model, messages=messages)
+        total = time.perf_counter() - start
+        usage = response.usage
+        record["ttft"] = total  # Nothing arrives before the whole answer
+        record["prompt_tokens"] = usage.prompt_tokens if usage else None
+        record["completion_tokens"] = usage.completion_tokens if usage else None
+        return {
+            "text": response.choices[0].message.content,
+            "ttft": total,
+            "total": total,
+            "connect": record["connect"],
+            "completion_tokens": record["completion_tokens"],
+            "prompt_tokens": record["prompt_tokens"],
+            "streamed": False
+        }
+
+
+def print_token(text: str):
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def ask_streaming(client: OpenAI, messages: list, model: str = DEFAULT_MODEL, on_token=print_token) -> dict:
+    """Streaming request: passes each piece of text to `on_token` as it arrives. Returns the same stats as ask()."""
+    with request_metrics.track("stream", model) as record:
+        start = time.perf_counter()
+        stream = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+
+        parts = []
+        chunks = 0
+        ttft = None
+        usage = None
+        for chunk in stream:
+            if chunk.usage:
+                usage = chunk.usage  # Final chunk when include_usage is honoured
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            chunks += 1
+            parts.append(delta)
+            on_token(delta)
+        total = time.perf_counter() - start
+
+        record["ttft"] = ttft if ttft is not None else total
+        # Servers that ignore include_usage still send roughly one token per chunk
+        record["completion_tokens"] = usage.completion_tokens if usage else chunks
+        record["prompt_tokens"] = usage.prompt_tokens if usage else None
+        return {
+            "text": "".join(parts),
+            "ttft": record["ttft"],
+            "total": total,
+            "connect": record["connect"],
+            "completion_tokens": record["completion_tokens"],
+            "prompt_tokens": record["prompt_tokens"],
+            "streamed": True
+        }
+
+
+def tokens_per_second(stats: dict) -> float:
+    # Generation rate after the first token arrived (whole request when not streamed)
+    generation_time = stats["total"] - stats["ttft"] or stats["total"]
+    if not stats["completion_tokens"] or generation_time <= 0 or stats.get("cached"):
+        return 0.0
+    return stats["completion_tokens"] / generation_time
+
+
+def answer(client: OpenAI, messages: list, model: str = DEFAULT_MODEL, stream: bool = True) -> dict:
+    """Stream the answer when possible; fall back to a plain request if streaming fails before any output."""
+    if stream:
+        print("\nAI Response:")
+        received = []
+
+        def on_token(text: str):
+            received.append(text)
+            print_token(text)
+
+        try:
+            stats = ask_streaming(client, messages, model, on_token)
+            print()
+            return stats
+        except Exception as e:
+            if received:
+                raise  # Part of the answer is already on screen; don't print it twice
+            print(f"(streaming unavailable: {e}; retrying without streaming)")
+
+    stats = ask(client, messages, model)
+    if not stream:
+        print("\nAI Response:")
+    print(stats["text"])
+    return stats
+
+
+def cached_stats(cache: ResponseCache, key: str, model: str) -> dict:
+    """Look up a cached answer, logging the hit as a request that never reached the API. None on a miss."""
+    start = time.perf_counter()
+    stats = cache.get(key)
+    if stats is None:
+        return None
+    with request_metrics.track("cache", model) as record:
+        record["cached"] = True
+        stats["ttft"] = stats["total"] = time.perf_counter() - start
+        stats["cached"] = True
+    return stats
+
+
+def cached_answer(client: OpenAI, messages: list, model: str = DEFAULT_MODEL, stream: bool = True,
+                  cache: ResponseCache = None, refresh: bool = False) -> dict:
+    """answer() behind the response cache. `refresh` skips the lookup but still stores the fresh answer."""
+    if cache is None:
+        return answer(client, messages, model, stream)
+
+    key = cache_key(model, messages)
+    if not refresh:
+        stats = cached_stats(cache, key, model)
+        if stats is not None:
+            print("\nAI Response (cached):")
+            print(stats["text"])
+            return stats
+
+    stats = answer(client, messages, model, stream)
+    cache.put(key, {"text": stats["text"], "completion_tokens": stats["completion_tokens"],
+                    "prompt_tokens": stats["prompt_tokens"], "streamed": False})
+    return stats
+
+
+def print_cache_stats(cache: ResponseCache):
+    stats = cache.stats()
+    print(f"[cache: {stats['hits']} hits / {stats['misses']} misses ({stats['hit_ratio']:.0%} hit rate), "
+          f"{stats['entries']} entries, {stats['bytes'] / 1024:.1f} KB]")
+
+
+def read_prompts(path: str) -> list:
+    """Prompts from a JSONL file: each line is a string or an object with "prompt" (or "body") and optional "id"."""
+    prompts = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"prompt": item}
+            prompt = item.get("prompt") or item.get("body")
+            if not prompt:
+                print(f"Skipping line {line_number}: no prompt")
+                continue
+            item_id = item.get("id", item.get("request_id", line_number))
+            prompts.append({"id": item_id, "prompt": prompt, "system": item.get("system", SYSTEM_PROMPT)})
+    return prompts
+
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    # Exponential backoff with jitter, never sooner than the server's Retry-After
+    delay = min(BACKOFF_BASE * 2 ** attempt, BACKOFF_MAX) * random.uniform(0.5, 1.0)
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            delay = max(delay, min(float(response.headers.get("retry-after")), BACKOFF_MAX))
+        except (TypeError, ValueError):
+            pass
+    return delay
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (RateLimitError, APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+async def ask_with_retry(client: AsyncOpenAI, messages: list, model: str, limit: asyncio.Semaphore) -> dict:
+    """One request under the concurrency limit, retried on rate limits and transient errors."""
+    with request_metrics.track("request", model) as record:
+        for attempt in range(MAX_ATTEMPTS):
+            async with limit:
+                start = time.perf_counter()
+                try:
+                    response = await client.chat.completions.create(model=model, messages=messages)
+                except Exception as e:
+                    if not is_retryable(e) or attempt == MAX_ATTEMPTS - 1:
+                        e.attempts = attempt + 1
+                        raise
+                    delay = retry_delay(e, attempt)
+                else:
+                    total = time.perf_counter() - start
+                    usage = response.usage
+                    record["ttft"] = total  # Latency of the successful attempt, without backoff
+                    record["prompt_tokens"] = usage.prompt_tokens if usage else None
+                    record["completion_tokens"] = usage.completion_tokens if usage else None
+                    return {
+                        "text": response.choices[0].message.content,
+                        "total": total,
+                        "completion_tokens": record["completion_tokens"],
+                        "prompt_tokens": record["prompt_tokens"],
+                        "attempts": attempt + 1
+                    }
+            # Back off outside the semaphore so other prompts keep the slot busy
+            await asyncio.sleep(delay)
+
+
+async def run_batch(client: AsyncOpenAI, prompts: list, output, model: str = DEFAULT_MODEL,
+                    concurrency: int = DEFAULT_CONCURRENCY, cache: ResponseCache = None,
+                    refresh: bool = False) -> dict:
+    """Answer every prompt concurrently, writing one JSON line per prompt to `output` in input order."""
+    limit = asyncio.Semaphore(concurrency)
+    finished = {}
+    next_index = 0
+    totals = {"answered": 0, "failed": 0, "cached": 0, "attempts": 0, "tokens": 0}
+
+    async def answer_one(index: int, item: dict):
+        messages = build_messages(item["prompt"], item["system"])
+        key = cache_key(model, messages)
+        record = {"id": item["id"], "prompt": item["prompt"]}
+        stats = cached_stats(cache, key, model) if cache is not None and not refresh else None
+        if stats is not None:
+            record.update(answer=stats["text"], cached=True, usage=None, latency=0.0, attempts=0)
+            totals["cached"] += 1
+        else:
+            try:
+                stats = await ask_with_retry(client, messages, model, limit)
+            except Exception as e:
+                record.update(answer=None, error=f"{type(e).__name__}: {e}", attempts=getattr(e, "attempts", 1))
+                totals["failed"] += 1
+                totals["attempts"] += record["attempts"]
+            else:
+                record.update(answer=stats["text"], cached=False, latency=round(stats["total"], 4),
+                              attempts=stats["attempts"],
+                              usage={"prompt_tokens": stats["prompt_tokens"],
+                                     "completion_tokens": stats["completion_tokens"]})
+                totals["attempts"] += stats["attempts"]
+                totals["tokens"] += (stats["prompt_tokens"] or 0) + (stats["completion_tokens"] or 0)
+                if cache is not None:
+                    cache.put(key, {"text": stats["text"], "completion_tokens": stats["completion_tokens"],
+                                    "prompt_tokens": stats["prompt_tokens"], "streamed": False})
+        if record.get("answer") is not None:
+            totals["answered"] += 1
+        finished[index] = record
+
+        # Flush every record that is now next in line, keeping the output in input order
+        nonlocal next_index
+        while next_index in finished:
+            output.write(json.dumps(finished.pop(next_index), ensure_ascii=False) + "\n")
+            next_index += 1
+        output.flush()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(answer_one(i, item) for i, item in enumerate(prompts)))
+    totals["elapsed"] = time.perf_counter() - start
+    return totals
+
+
+def batch_main(args) -> int:
+    prompts = read_prompts(args.batch)
+    client = make_async_client(args.base_url)
+    cache = ResponseCache(ttl=args.cache_ttl)
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    print(f"\nAnswering {len(prompts)} prompts, {args.concurrency} at a time...", file=sys.stderr)
+
+    async def run():
+        try:
+            return await run_batch(client, prompts, output, args.model, args.concurrency,
+                                   cache=cache, refresh=args.no_cache)
+        finally:
+            await client.close()
+
+    try:
+        totals = asyncio.run(run())
+    finally:
+        cache.close()
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = totals["elapsed"]
+    print(f"[{totals['answered']}/{len(prompts)} answered ({totals['cached']} cached, {totals['failed']} failed) "
+          f"in {elapsed:.2f} s | {len(prompts) / elapsed if elapsed else 0:.1f} prompts/s | "
+          f"{totals['attempts']} API calls | {totals['tokens']} tokens]", file=sys.stderr)
+    return 1 if totals["failed"] else 0
+
+
+def estimate_tokens(messages: list) -> int:
+    # About 4 characters per token for English, plus a few tokens of per-message overhead
+    return sum(len(m["content"]) // 4 + 4 for m in messages)
+
+
+def trim_history(messages: list, budget: int = HISTORY_TOKENS) -> tuple:
+    """Drop the oldest exchanges until the conversation fits the token budget.
+
+    The system prompt and the newest message are always kept. Returns (messages, number dropped).
+    """
+    head = messages[:1] if messages and messages[0]["role"] == "system" else []
+    turns = messages[len(head):]
+    dropped = 0
+    while len(turns) > 1 and estimate_tokens(head + turns) > budget:
+        # Drop a whole user/assistant exchange so the history never starts with an answer
+        count = 2 if len(turns) > 2 and turns[1]["role"] == "assistant" else 1
+        turns = turns[count:]
+        dropped += count
+    return head + turns, dropped
+
+
+def repl_main(args) -> int:
+    """Multi-turn chat reusing one client (and its connection pool) for every turn."""
+    client = make_client(args.base_url)
+    cache = ResponseCache(ttl=args.cache_ttl)
+    history = [{"role": "system", "content": SYSTEM_PROMPT}]
+    turn = 0
+
+    print("\nChat with the AI. Commands: /reset clears the conversation, /exit quits.")
+    try:
+        while True:
+            try:
+                user_input = input("\n> ").strip()
+            except (EOFError, KeyboardInterrupt):
+                print()
+                break
+            if not user_input:
+                continue
+            if user_input in ("/exit", "/quit"):
+                break
+            if user_input == "/reset":
+                history = history[:1]
+                print("(conversation cleared)")
+                continue
+
+            history, dropped = trim_history(history + [{"role": "user", "content": user_input}],
+                                            args.history_tokens)
+            if dropped:
+                print(f"(dropped {dropped} oldest messages to stay within {args.history_tokens} tokens)")
+
+            turn += 1
+            try:
+                stats = cached_answer(client, history, args.model, stream=not args.no_stream,
+                                      cache=cache, refresh=args.no_cache)
+            except Exception as e:
+                history.pop()  # Let the user retry the question
+                print(f"An error occurred: {str(e)}")
+                continue
+            history.append({"role": "assistant", "content": stats["text"]})
+            print_stats(stats)
+            print(f"[turn {turn} | {len(history) - 1} messages, ~{estimate_tokens(history)} tokens of context]")
+    finally:
+        print_cache_stats(cache)
+        cache.close()
+        client.close()
+    return 0
+
+
+def print_stats(stats: dict):
+    tokens = stats["completion_tokens"]
+    connect = f"connect {stats['connect'] * 1000:.0f} ms | " if stats.get("connect") else ""
+    print(f"\n[{connect}time to first token {stats['ttft'] * 1000:.0f} ms | total {stats['total'] * 1000:.0f} ms | "
+          f"{tokens if tokens is not None else '?'} tokens | {tokens_per_second(stats):.1f} tokens/s]")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Ask the AI a question")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--base-url", default=None,
+                        help="API base URL, e.g. http://127.0.0.1:8765/v1 for stub_openai_server.py")
+    parser.add_argument("--no-stream", action="store_true", help="wait for the full answer instead of streaming it")
+    parser.add_argument("--no-cache", action="store_true", help="ask the API even if the answer is cached")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL, help="seconds a cached answer stays valid")
+    parser.add_argument("--batch", metavar="PROMPTS_JSONL",
+                        help="answer every prompt in a JSONL file instead of asking interactively")
+    parser.add_argument("--output", help="where --batch writes its JSONL answers (default: stdout)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="requests in flight at once in --batch mode")
+    parser.add_argument("--metrics-log", default=request_metrics.LOG_PATH,
+                        help="JSON lines file each request is logged to (summarize with request_metrics.py)")
+    parser.add_argument("--no-metrics", action="store_true", help="don't log requests")
+    parser.add_argument("--repl", action="store_true", help="keep chatting, with conversation history")
+    parser.add_argument("--history-tokens", type=int, default=HISTORY_TOKENS,
+                        help="token budget for the conversation history in --repl mode")
+    args = parser.parse_args(argv)
+
+    request_metrics.log_path = None if args.no_metrics else args.metrics_log
+    if args.batch:
+        request_metrics.source = "batch"
+        return batch_main(args)
+    if args.repl:
+        request_metrics.source = "repl"
+        return repl_main(args)
+
+    client = make_client(args.base_url)
+    cache = ResponseCache(ttl=args.cache_ttl)
+
+    print("\nWhat would you like to ask the AI? (Type your question and press Enter)")
+    user_input = input("> ")
+
+    try:
+        print("\nSending request to OpenAI...")
+        stats = cached_answer(client, build_messages(user_input), args.model, stream=not args.no_stream,
+                              cache=cache, refresh=args.no_cache)
+        print_stats(stats)
+        print_cache_stats(cache)
+    except Exception as e:
+        print(f"An error occurred: {str(e)}")
+        return 1
+    finally:
+        cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
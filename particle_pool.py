@@ -0,0 +1,85 @@
+"""Fixed-capacity particle store for gacha_game_gui's summon bursts.
+
+Particle state lives in preallocated parallel lists indexed by slot. `order`
+is a permutation of all slots: the first `count` entries are the live
+particles and the rest form the free list, so spawning takes the next free slot
+and killing swaps the dead slot to the end of the live range, both in O(1). No
+per-particle objects are created, and updating a burst does not grow or shrink
+any list.
+"""
+import math
+import random
+from typing import Iterator, List, Tuple
+
+DEFAULT_CAPACITY = 256
+
+
+class ParticlePool:
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.x: List[float] = [0.0] * capacity
+        self.y: List[float] = [0.0] * capacity
+        self.px: List[float] = [0.0] * capacity  # Position at the previous step, for interpolation
+        self.py: List[float] = [0.0] * capacity
+        self.dx: List[float] = [0.0] * capacity
+        self.dy: List[float] = [0.0] * capacity
+        self.size: List[int] = [0] * capacity
+        self.life: List[float] = [0.0] * capacity
+        self.color: List[Tuple[int, int, int]] = [(255, 255, 255)] * capacity
+        self.order: List[int] = list(range(capacity))
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def spawn(self, x: float, y: float, dx: float, dy: float, size: int,
+              color: Tuple[int, int, int], life: float = 255.0) -> bool:
+        """Take a free slot; returns False when the pool is full."""
+        if self.count == self.capacity:
+            return False
+        slot = self.order[self.count]
+        self.count += 1
+        self.x[slot] = self.px[slot] = x
+        self.y[slot] = self.py[slot] = y
+        self.dx[slot] = dx
+        self.dy[slot] = dy
+        self.size[slot] = size
+        self.color[slot] = color
+        self.life[slot] = life
+        return True
+
+    def burst(self, count: int, x: float, y: float, colors: List[Tuple[int, int, int]],
+              min_speed: float = 2.0, max_speed: float = 8.0):
+        for _ in range(count):
+            angle = random.uniform(0, 2 * math.pi)
+            speed = random.uniform(min_speed, max_speed)
+            self.spawn(x, y, math.cos(angle) * speed, math.sin(angle) * speed,
+                       random.randint(2, 6), random.choice(colors))
+
+    def kill(self, index: int):
+        """Free the particle at position `index` of the live range."""
+        last = self.count - 1
+        order = self.order
+        order[index], order[last] = order[last], order[index]
+        self.count = last
+
+    def update(self, ticks: float, fade: float = 5.0):
+        x, y, px, py, dx, dy, life, order = self.x, self.y, self.px, self.py, self.dx, self.dy, self.life, self.order
+        # Walk backwards so a kill only swaps in particles that were already updated
+        for i in range(self.count - 1, -1, -1):
+            slot = order[i]
+            px[slot] = x[slot]
+            py[slot] = y[slot]
+            x[slot] += dx[slot] * ticks
+            y[slot] += dy[slot] * ticks
+            life[slot] -= fade * ticks
+            if life[slot] <= 0:
+                self.kill(i)
+
+    def live_slots(self) -> Iterator[int]:
+        order = self.order
+        for i in range(self.count):
+            yield order[i]
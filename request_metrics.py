@@ -0,0 +1,216 @@
+"""Per-request instrumentation for the OpenAI client scripts.
+
+Every chat request made through openai_script.py is recorded as one JSON line:
+connection setup time, time to first token, total time, token usage, how many
+HTTP attempts it took and, for failures, an error class. Connection timings
+come from the HTTP client's trace hooks (see traced_client), which attach to
+whichever record is active in the current context, so concurrent asyncio
+requests each get their own numbers.
+
+    python request_metrics.py                  # p50/p95/p99 latency and token totals
+    python request_metrics.py --log other.jsonl
+"""
+import argparse
+import contextvars
+import json
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import openai
+
+LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".openai_metrics.jsonl")
+
+_current: contextvars.ContextVar = contextvars.ContextVar("request_metrics_record", default=None)
+_write_lock = threading.Lock()
+
+log_path: Optional[str] = LOG_PATH  # None disables logging
+source = "openai_script"            # Which tool made the requests, e.g. "batch" or "content_pipeline"
+
+
+def classify_error(error: BaseException) -> str:
+    if isinstance(error, openai.RateLimitError):
+        return "rate_limit"
+    if isinstance(error, openai.APITimeoutError):
+        return "timeout"
+    if isinstance(error, openai.APIConnectionError):
+        return "connection"
+    if isinstance(error, (openai.AuthenticationError, openai.PermissionDeniedError)):
+        return "auth"
+    if isinstance(error, openai.APIStatusError):
+        return "server" if error.status_code >= 500 else "bad_request"
+    return "other"
+
+
+def on_trace(record: dict, name: str, started: Dict[str, float]):
+    # Connection setup is TCP connect plus TLS handshake; reused connections skip both
+    step, _, phase = name.rpartition(".")
+    if step not in ("connection.connect_tcp", "connection.start_tls"):
+        return
+    if phase == "started":
+        started[step] = time.perf_counter()
+    elif phase == "complete" and step in started:
+        record["connect"] += time.perf_counter() - started.pop(step)
+
+
+def on_request(request):
+    record = _current.get()
+    if record is None:
+        return
+    record["attempts"] += 1
+    started: Dict[str, float] = {}
+    request.extensions["trace"] = lambda name, info: on_trace(record, name, started)
+
+
+async def on_request_async(request):
+    record = _current.get()
+    if record is None:
+        return
+    record["attempts"] += 1
+    started: Dict[str, float] = {}
+
+    async def trace(name, info):
+        on_trace(record, name, started)
+    request.extensions["trace"] = trace
+
+
+def traced_client() -> openai.DefaultHttpxClient:
+    """HTTP client for OpenAI(http_client=...) that reports attempts and connect time to the active record."""
+    return openai.DefaultHttpxClient(event_hooks={"request": [on_request]})
+
+
+def traced_async_client() -> openai.DefaultAsyncHttpxClient:
+    return openai.DefaultAsyncHttpxClient(event_hooks={"request": [on_request_async]})
+
+
+def write(record: dict):
+    if log_path is None:
+        return
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with _write_lock:
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+@contextmanager
+def track(kind: str, model: str) -> Iterator[dict]:
+    """Time one logical request (including any retries) and log it when the block exits.
+
+    `kind` is "request", "stream" or "cache". The block may fill in "ttft", "prompt_tokens",
+    "completion_tokens" and "cached".
+    """
+    record = {
+        "time": time.time(),
+        "source": source,
+        "kind": kind,
+        "model": model,
+        "ok": True,
+        "error": None,
+        "error_type": None,
+        "attempts": 0,
+        "connect": 0.0,
+        "ttft": None,
+        "total": None,
+        "prompt_tokens": None,
+        "completion_tokens": None,
+        "cached": False
+    }
+    token = _current.set(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record.update(ok=False, error=classify_error(e), error_type=type(e).__name__)
+        raise
+    finally:
+        _current.reset(token)
+        record["total"] = time.perf_counter() - start
+        for key in ("connect", "ttft", "total"):
+            if record[key] is not None:
+                record[key] = round(record[key] * 1000, 2)  # Logged in milliseconds
+        write(record)
+
+
+def read_log(path: str = LOG_PATH) -> List[dict]:
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # Skip a line cut short by a crash
+    return records
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    rank = max(math.ceil(p / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def summarize(records: List[dict]) -> dict:
+    api = [r for r in records if not r.get("cached")]
+    ok = [r for r in api if r["ok"]]
+    errors: Dict[str, int] = {}
+    for r in api:
+        if not r["ok"]:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+
+    latency = {}
+    for key in ("connect", "ttft", "total"):
+        values = sorted(r[key] for r in ok if r.get(key) is not None)
+        latency[key] = {f"p{p}": percentile(values, p) for p in (50, 95, 99)}
+
+    return {
+        "requests": len(api),
+        "cached": len(records) - len(api),
+        "ok": len(ok),
+        "errors": errors,
+        "retries": sum(max(r["attempts"] - 1, 0) for r in api),
+        "latency_ms": latency,
+        "prompt_tokens": sum(r.get("prompt_tokens") or 0 for r in ok),
+        "completion_tokens": sum(r.get("completion_tokens") or 0 for r in ok)
+    }
+
+
+def print_summary(summary: dict):
+    print(f"Requests: {summary['requests']} ({summary['ok']} ok, {summary['requests'] - summary['ok']} failed), "
+          f"{summary['cached']} answered from cache, {summary['retries']} retries")
+    for error, count in sorted(summary["errors"].items(), key=lambda item: -item[1]):
+        print(f"  {error}: {count}")
+    print(f"\n{'latency (ms)':<16}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for key, label in (("connect", "connect"), ("ttft", "first token"), ("total", "total")):
+        values = summary["latency_ms"][key]
+        print(f"{label:<16}{values['p50']:>10.1f}{values['p95']:>10.1f}{values['p99']:>10.1f}")
+    total = summary["prompt_tokens"] + summary["completion_tokens"]
+    print(f"\nTokens: {total} ({summary['prompt_tokens']} prompt + {summary['completion_tokens']} completion)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Summarize the OpenAI request log")
+    parser.add_argument("--log", default=LOG_PATH)
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        records = read_log(args.log)
+    except FileNotFoundError:
+        print(f"No request log at {args.log}")
+        return 1
+
+    summary = summarize(records)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
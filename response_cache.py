@@ -0,0 +1,112 @@
+"""On-disk cache of chat completion answers, so repeated prompts skip the API.
+
+Entries live in a small SQLite file keyed by a hash of everything that shapes
+the answer (model, messages including the system prompt, and request
+parameters). Entries expire after a TTL and the least recently used ones are
+evicted once the cache grows past its size limit. Hit and miss counts are kept
+in the same file so the ratio covers every run, not just the current one.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Optional
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".response_cache.sqlite")
+DEFAULT_TTL = 7 * 24 * 3600         # Seconds
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def cache_key(model: str, messages: list) -> str:
+    """Stable hash of a request: the model and messages (system prompt included) are all that is sent."""
+    payload = json.dumps({"model": model, "messages": messages},
+                         sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path: str = CACHE_PATH, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        row = self.db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is not None and now - row[1] > self.ttl:
+            self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            row = None
+
+        if row is None:
+            self.count("misses")
+            self.db.commit()
+            return None
+
+        self.db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        self.count("hits")
+        self.db.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, value: dict):
+        data = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        self.db.execute("INSERT OR REPLACE INTO responses (key, value, size, created, last_used) "
+                        "VALUES (?, ?, ?, ?, ?)", (key, data, len(data), now, now))
+        self.evict()
+        self.db.commit()
+
+    def evict(self):
+        # Drop expired entries, then least recently used ones until under the size limit
+        self.db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.db.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def count(self, name: str):
+        self.db.execute("INSERT INTO counters (name, value) VALUES (?, 1) "
+                        "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+
+    def stats(self) -> dict:
+        counters = dict(self.db.execute("SELECT name, value FROM counters").fetchall())
+        entries, size = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size
+        }
+
+    def clear(self):
+        self.db.execute("DELETE FROM responses")
+        self.db.execute("DELETE FROM counters")
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
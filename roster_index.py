@@ -0,0 +1,129 @@
+"""Sorted and filtered views over a character roster, maintained incrementally.
+
+The roster only ever grows at the end, so new characters are inserted into each
+sorted list with a binary search instead of re-sorting. When a character levels
+up, only that character's entries are moved.
+"""
+from bisect import bisect_left, insort
+from collections.abc import Sequence
+from typing import Dict, List, Optional, Tuple
+
+RARITY_RANK = {"6★": 5, "5★": 4, "4★": 3, "3★": 2, "2★": 1}
+RARITIES = list(RARITY_RANK)
+SORTS = ["obtained", "level", "rarity"]
+
+
+def sort_key(char, sort: str, seq: int) -> Tuple[int, int, int]:
+    rank = RARITY_RANK.get(char.rarity, 0)
+    if sort == "level":
+        return (-char.level, -rank, seq)
+    return (-rank, -char.level, seq)
+
+
+class RosterView(Sequence):
+    """Read-only sequence of characters backed by one of the index lists (no copying)."""
+
+    def __init__(self, chars: List, entries: List, keyed: bool):
+        self.chars = chars
+        self.entries = entries
+        self.keyed = keyed
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        entry = self.entries[i]
+        return self.chars[entry[-1] if self.keyed else entry]
+
+
+class RosterIndex:
+    def __init__(self):
+        self.source: Optional[list] = None
+        self.chars: List = []            # seq -> character, in the order they were obtained
+        self.seq_of: Dict[int, int] = {}  # character uid -> seq
+        self.keys: Dict[int, Dict[str, tuple]] = {}
+        self.lists: Dict[Tuple[str, Optional[str]], list] = {}
+        self.version = 0  # Bumped whenever any view changes
+        self.clear()
+
+    def clear(self):
+        self.chars = []
+        self.seq_of = {}
+        self.keys = {}
+        self.lists = {(sort, rarity): [] for sort in SORTS for rarity in [None] + RARITIES}
+        self.version += 1
+
+    def sync(self, characters: list):
+        """Bring the index up to date with an append-only roster list."""
+        if characters is not self.source or len(characters) < len(self.chars):
+            self.rebuild(characters)
+        elif len(characters) > len(self.chars):
+            for char in characters[len(self.chars):]:
+                self.add(char)
+
+    def rebuild(self, characters: list):
+        self.clear()
+        self.source = characters
+        for seq, char in enumerate(characters):
+            self.chars.append(char)
+            self.seq_of[char.uid] = seq
+            self.keys[seq] = {sort: sort_key(char, sort, seq) for sort in SORTS[1:]}
+            self.lists[("obtained", None)].append(seq)
+            self.lists.setdefault(("obtained", char.rarity), []).append(seq)
+
+        # Bulk sort once instead of inserting one by one
+        rarities = [rarity for (sort, rarity) in self.lists if sort == "obtained"]
+        for sort in SORTS[1:]:
+            for rarity in rarities:
+                entries = [self.keys[seq][sort] for seq in self.lists[("obtained", rarity)]]
+                entries.sort()
+                self.lists[(sort, rarity)] = entries
+
+    def add(self, char):
+        seq = len(self.chars)
+        self.chars.append(char)
+        self.seq_of[char.uid] = seq
+        self.keys[seq] = {}
+        self.lists[("obtained", None)].append(seq)
+        self.lists.setdefault(("obtained", char.rarity), []).append(seq)
+        for sort in SORTS[1:]:
+            key = sort_key(char, sort, seq)
+            self.keys[seq][sort] = key
+            insort(self.lists[(sort, None)], key)
+            insort(self.lists.setdefault((sort, char.rarity), []), key)
+        self.version += 1
+
+    def update(self, char):
+        """Re-position a character whose level changed."""
+        seq = self.seq_of.get(char.uid)
+        if seq is None:
+            return
+        changed = False
+        for sort in SORTS[1:]:
+            old_key = self.keys[seq][sort]
+            new_key = sort_key(char, sort, seq)
+            if new_key == old_key:
+                continue
+            for entries in (self.lists[(sort, None)], self.lists[(sort, char.rarity)]):
+                del entries[bisect_left(entries, old_key)]
+                insort(entries, new_key)
+            self.keys[seq][sort] = new_key
+            changed = True
+        if changed:
+            self.version += 1
+
+    def view(self, sort: str = "obtained", rarity: Optional[str] = None) -> RosterView:
+        entries = self.lists.setdefault((sort, rarity), [])
+        return RosterView(self.chars, entries, keyed=sort != "obtained")
+
+    def position(self, char, sort: str = "obtained", rarity: Optional[str] = None) -> Optional[int]:
+        """Index of `char` within view(sort, rarity), or None if it is filtered out."""
+        seq = self.seq_of.get(char.uid)
+        if seq is None or (rarity is not None and char.rarity != rarity):
+            return None
+        entries = self.lists[(sort, rarity)]
+        target = seq if sort == "obtained" else self.keys[seq][sort]
+        i = bisect_left(entries, target)
+        return i if i < len(entries) and entries[i] == target else None
@@ -0,0 +1,53 @@
+"""Skill registry: every summonable class and the skill it uses in battle.
+
+A character's class is looked up from its name once, when the character is
+created (see gacha_game_gui.Character), so battles never scan names again.
+"""
+from typing import Dict, Optional
+
+from combat import Skill
+
+CLASS_SKILLS: Dict[str, Skill] = {
+    "Warrior": Skill("Mighty Slash", "Powerful attack dealing 200% damage",
+                     damage=2.0, animation="slash"),
+    "Mage": Skill("Arcane Burst", "Magical burst dealing 250% damage",
+                  damage=2.5, animation="magic_circle"),
+    "Archer": Skill("Precise Shot", "Guaranteed critical hit dealing 180% damage",
+                    damage=1.8, crit=True, animation="arrow"),
+    "Knight": Skill("Shield Bash", "Attack and gain 30% defense for 2 turns",
+                    damage=1.5, defense=0.3, defense_turns=2, animation="slash"),
+    "Assassin": Skill("Shadow Strike", "Strike from shadows dealing 220% damage",
+                      damage=2.2, animation="shadow"),
+    "Healer": Skill("Healing Light", "Restore 30% of max HP",
+                    heal=0.3, animation="heal"),
+    "Paladin": Skill("Holy Smite", "Smite for 160% damage and restore 10% of max HP",
+                     damage=1.6, heal=0.1, animation="holy"),
+    "Berserker": Skill("Bloodrage", "Reckless blow dealing 280% damage (4 turn cooldown)",
+                       damage=2.8, cooldown=4, animation="rage"),
+    "Summoner": Skill("Spirit Guard", "Spirits strike for 140% damage and block 20% damage for 3 turns",
+                      damage=1.4, defense=0.2, defense_turns=3, animation="spirits"),
+    "Necromancer": Skill("Life Drain", "Drain 180% damage and restore 15% of max HP",
+                         damage=1.8, heal=0.15, animation="drain"),
+    "Druid": Skill("Nature's Wrath", "Vines deal 120% damage and restore 20% of max HP",
+                   damage=1.2, heal=0.2, animation="vines"),
+    "Monk": Skill("Flowing Palm", "Flurry dealing 200% damage and gain 15% defense for 2 turns",
+                  damage=2.0, defense=0.15, defense_turns=2, animation="flurry"),
+}
+
+CLASSES = list(CLASS_SKILLS)
+
+# Summoned characters are named "<prefix> <class>", e.g. "Fire Necromancer"
+NAME_PREFIXES = ["Dark", "Light", "Fire", "Water", "Earth", "Wind", "Thunder", "Ice",
+                 "Shadow", "Holy", "Chaos", "Order", "Storm", "Nature", "Cosmic"]
+
+
+def class_of(name: str) -> Optional[str]:
+    """The class named in a character name such as "Fire Necromancer", or None."""
+    for word in reversed(name.split()):
+        if word in CLASS_SKILLS:
+            return word
+    return None
+
+
+def skill_of(char_class: Optional[str]) -> Optional[Skill]:
+    return CLASS_SKILLS.get(char_class) if char_class else None
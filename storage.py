@@ -0,0 +1,336 @@
+"""SQLite persistence for players' rosters, materials, currencies and pity counters.
+
+One database holds the players of every game. It runs in WAL mode, so roster
+menus keep reading while a summon is being written, and with synchronous=NORMAL
+a commit costs no fsync: a power cut can lose the last few commits but never
+corrupts the file, and gems and coins are durable in the ledger regardless
+(the currencies table is a snapshot of it, tagged with the ledger seq).
+
+Characters are keyed by (player, slot), slot being the position in the
+player's roster, which only ever grows at the end. SQL lives in module
+constants so sqlite3's statement cache prepares each statement once, and a
+multi-summon's results go in with a single executemany. The indexes match the
+roster menus: obtained order (the primary key), by level, by rarity, and a
+rarity filter with any of those orders.
+
+    python storage.py                 # tables, row counts and query plans of the menu queries
+    python storage.py --db other.sqlite
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "game.sqlite")
+SCHEMA_VERSION = 1
+PAGE_SIZE = 50
+STATEMENT_CACHE = 256
+
+# Rarity scales of all three games on one ladder, so "rarity" sorts and filters work for each
+RARITY_RANK = {
+    "N": 1, "R": 2, "SR": 3, "SSR": 4, "LR": 5, "MYTHIC": 6,
+    "2★": 1, "3★": 2, "4★": 3, "5★": 4, "6★": 5
+}
+TOP_RANK = 4  # Pulls at or above this rank reset the pity counter
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    game TEXT NOT NULL,
+    name TEXT NOT NULL,
+    selected INTEGER,
+    created REAL NOT NULL,
+    UNIQUE (game, name)
+);
+CREATE TABLE IF NOT EXISTS characters (
+    player_id INTEGER NOT NULL,
+    slot INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    rarity TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    exp INTEGER NOT NULL,
+    attack INTEGER NOT NULL,
+    health INTEGER NOT NULL,
+    extra TEXT NOT NULL DEFAULT '{}',
+    PRIMARY KEY (player_id, slot)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS characters_by_level ON characters (player_id, level DESC, rank DESC);
+CREATE INDEX IF NOT EXISTS characters_by_rank ON characters (player_id, rank DESC, level DESC);
+CREATE INDEX IF NOT EXISTS characters_of_rank ON characters (player_id, rank);
+CREATE TABLE IF NOT EXISTS roster_counts (
+    player_id INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (player_id, rank)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS materials (
+    player_id INTEGER NOT NULL,
+    slot INTEGER NOT NULL,
+    material TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (player_id, slot, material)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS currencies (
+    player_id INTEGER NOT NULL,
+    currency TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    ledger_seq INTEGER NOT NULL,
+    PRIMARY KEY (player_id, currency)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS pity (
+    player_id INTEGER NOT NULL,
+    banner TEXT NOT NULL,
+    pulls INTEGER NOT NULL,
+    since_top INTEGER NOT NULL,
+    PRIMARY KEY (player_id, banner)
+) WITHOUT ROWID;
+"""
+
+# Secondary indexes end with the primary key (player_id, slot), so slot breaks ties in every order
+ROSTER_ORDER = {
+    "obtained": "slot",
+    "level": "level DESC, rank DESC, slot",
+    "rarity": "rank DESC, level DESC, slot"
+}
+ROSTER_COLUMNS = "c.slot, c.name, c.rarity, c.level, c.exp, c.attack, c.health, c.extra"
+# The page's slots come from the index alone, then only those rows are read (CROSS JOIN keeps the
+# page as the outer loop). A plain OFFSET reads every skipped row, about a second deep into 1M.
+ROSTER_SQL = {
+    (sort, filtered): f"SELECT {ROSTER_COLUMNS} FROM (SELECT slot FROM characters WHERE player_id = ?"
+                      f"{' AND rank = ?' if filtered else ''} ORDER BY {order} LIMIT ? OFFSET ?) AS page "
+                      f"CROSS JOIN characters AS c WHERE c.player_id = ? AND c.slot = page.slot "
+                      f"ORDER BY {', '.join('c.' + term for term in order.split(', '))}"
+    for sort, order in ROSTER_ORDER.items() for filtered in (False, True)
+}
+INSERT_CHARACTER = ("INSERT INTO characters (player_id, slot, name, rarity, rank, level, exp, attack, health, extra) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+UPSERT_COUNT = ("INSERT INTO roster_counts (player_id, rank, count) VALUES (?, ?, ?) "
+                "ON CONFLICT (player_id, rank) DO UPDATE SET count = count + excluded.count")
+UPDATE_CHARACTER = ("UPDATE characters SET level = ?, exp = ?, attack = ?, health = ?, extra = ? "
+                    "WHERE player_id = ? AND slot = ?")
+UPSERT_MATERIAL = ("INSERT INTO materials (player_id, slot, material, count) VALUES (?, ?, ?, ?) "
+                   "ON CONFLICT (player_id, slot, material) DO UPDATE SET count = excluded.count")
+DELETE_MATERIAL = "DELETE FROM materials WHERE player_id = ? AND slot = ? AND material = ?"
+UPSERT_CURRENCY = ("INSERT INTO currencies (player_id, currency, amount, ledger_seq) VALUES (?, ?, ?, ?) "
+                   "ON CONFLICT (player_id, currency) DO UPDATE SET amount = excluded.amount, "
+                   "ledger_seq = excluded.ledger_seq")
+UPSERT_PITY = ("INSERT INTO pity (player_id, banner, pulls, since_top) VALUES (?, ?, ?, ?) "
+               "ON CONFLICT (player_id, banner) DO UPDATE SET pulls = pulls + excluded.pulls, "
+               "since_top = CASE WHEN ? THEN excluded.since_top ELSE since_top + excluded.since_top END")
+
+
+class CharacterRow(NamedTuple):
+    slot: int
+    name: str
+    rarity: str
+    level: int
+    exp: int
+    attack: int
+    health: int
+    extra: dict   # Game-specific fields, e.g. exp_to_next_level
+
+
+def connect(path: str = DB_PATH) -> sqlite3.Connection:
+    db = sqlite3.connect(path, cached_statements=STATEMENT_CACHE)
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute("PRAGMA synchronous = NORMAL")
+    db.execute("PRAGMA cache_size = -32000")  # 32 MB page cache
+    db.execute("PRAGMA temp_store = MEMORY")
+    return db
+
+
+class Storage:
+    def __init__(self, path: str = DB_PATH, indexes: bool = True):
+        """`indexes=False` leaves out the roster indexes (for comparing query plans in bench_storage.py)."""
+        self.path = path
+        self.db = connect(path)
+        self.depth = 0
+        with self.transaction():
+            schema = SCHEMA if indexes else "\n".join(
+                line for line in SCHEMA.splitlines() if not line.startswith("CREATE INDEX"))
+            for statement in schema.split(";"):
+                if statement.strip():
+                    self.db.execute(statement)
+            self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Group writes into one commit; nested blocks join the outermost one."""
+        self.depth += 1
+        try:
+            yield self.db
+        except BaseException:
+            if self.depth == 1:
+                self.db.rollback()
+            raise
+        else:
+            if self.depth == 1:
+                self.db.commit()
+        finally:
+            self.depth -= 1
+
+    @contextmanager
+    def savepoint(self) -> Iterator[sqlite3.Connection]:
+        """Like transaction(), but the commit is left to a later commit() call, so callers can group
+        many blocks into one; a failing block only undoes its own writes."""
+        if not self.db.in_transaction:
+            self.db.execute("BEGIN")
+        self.depth += 1
+        self.db.execute("SAVEPOINT block")
+        try:
+            yield self.db
+        except BaseException:
+            self.db.execute("ROLLBACK TO block")
+            raise
+        finally:
+            self.db.execute("RELEASE block")
+            self.depth -= 1
+
+    def commit(self):
+        if self.depth == 0:
+            self.db.commit()
+
+    def close(self):
+        self.commit()
+        self.db.close()
+
+    # Players
+    def player_id(self, game: str, name: str, create: bool = True) -> Optional[int]:
+        row = self.db.execute("SELECT id FROM players WHERE game = ? AND name = ?", (game, name)).fetchone()
+        if row is not None or not create:
+            return row[0] if row else None
+        with self.transaction():
+            return self.db.execute("INSERT INTO players (game, name, created) VALUES (?, ?, ?)",
+                                   (game, name, time.time())).lastrowid
+
+    def selected(self, player_id: int) -> Optional[int]:
+        row = self.db.execute("SELECT selected FROM players WHERE id = ?", (player_id,)).fetchone()
+        return row[0] if row else None
+
+    def set_selected(self, player_id: int, slot: Optional[int]):
+        with self.transaction():
+            self.db.execute("UPDATE players SET selected = ? WHERE id = ?", (slot, player_id))
+
+    # Roster
+    def add_characters(self, player_id: int, rows: Iterable[CharacterRow], banner: Optional[str] = None):
+        """Insert newly obtained characters with one prepared statement; summons also advance the
+        banner's pity counter in the same transaction."""
+        params = [(player_id, r.slot, r.name, r.rarity, RARITY_RANK.get(r.rarity, 0), r.level, r.exp,
+                   r.attack, r.health, json.dumps(r.extra)) for r in rows]
+        counts = Counter(p[4] for p in params)
+        with self.transaction():
+            self.db.executemany(INSERT_CHARACTER, params)
+            self.db.executemany(UPSERT_COUNT, [(player_id, rank, count) for rank, count in counts.items()])
+            if banner is not None and params:
+                self.record_pulls(player_id, banner, [p[4] for p in params])
+
+    def update_characters(self, player_id: int, rows: Iterable[CharacterRow]):
+        params = [(r.level, r.exp, r.attack, r.health, json.dumps(r.extra), player_id, r.slot) for r in rows]
+        with self.transaction():
+            self.db.executemany(UPDATE_CHARACTER, params)
+
+    def roster(self, player_id: int, sort: str = "obtained", rarity: Optional[str] = None,
+               offset: int = 0, limit: int = PAGE_SIZE) -> List[CharacterRow]:
+        """One page of a roster menu: sorted by "obtained", "level" or "rarity", optionally one rarity."""
+        params = [player_id]
+        if rarity is not None:
+            params.append(RARITY_RANK.get(rarity, 0))
+        cursor = self.db.execute(ROSTER_SQL[sort, rarity is not None], params + [limit, offset, player_id])
+        return [CharacterRow(*row[:7], json.loads(row[7])) for row in cursor]
+
+    def rarity_counts(self, player_id: int) -> Dict[int, int]:
+        """Characters per rarity rank, for the filter buttons (kept up to date on insert, not counted)."""
+        return dict(self.db.execute("SELECT rank, count FROM roster_counts WHERE player_id = ?", (player_id,)))
+
+    def roster_size(self, player_id: int) -> int:
+        return sum(self.rarity_counts(player_id).values())
+
+    # Materials
+    def save_materials(self, player_id: int, slot: int, materials: Dict[str, int]):
+        """Store a character's material counts; materials used up are removed."""
+        with self.transaction():
+            self.db.executemany(UPSERT_MATERIAL, [(player_id, slot, name, count)
+                                                  for name, count in materials.items() if count > 0])
+            self.db.executemany(DELETE_MATERIAL, [(player_id, slot, name)
+                                                  for name, count in materials.items() if count <= 0])
+
+    def materials(self, player_id: int) -> Dict[int, Dict[str, int]]:
+        """Slot -> {material: count} for every character of a player that has any."""
+        found: Dict[int, Dict[str, int]] = {}
+        for slot, name, count in self.db.execute(
+                "SELECT slot, material, count FROM materials WHERE player_id = ?", (player_id,)):
+            found.setdefault(slot, {})[name] = count
+        return found
+
+    # Currencies and pity
+    def save_currencies(self, player_id: int, balances: Dict[str, int], ledger_seq: int):
+        """Snapshot a player's ledger balances as of `ledger_seq`."""
+        with self.transaction():
+            self.db.executemany(UPSERT_CURRENCY, [(player_id, currency, amount, ledger_seq)
+                                                  for currency, amount in balances.items()])
+
+    def currencies(self, player_id: int) -> Dict[str, int]:
+        return dict(self.db.execute("SELECT currency, amount FROM currencies WHERE player_id = ?", (player_id,)))
+
+    def record_pulls(self, player_id: int, banner: str, ranks: List[int]):
+        # Pulls since the last top-rarity result, counted within this batch first
+        since_top = 0
+        for rank in ranks:
+            since_top = 0 if rank >= TOP_RANK else since_top + 1
+        reset = any(rank >= TOP_RANK for rank in ranks)
+        with self.transaction():
+            self.db.execute(UPSERT_PITY, (player_id, banner, len(ranks), since_top, reset))
+
+    def pity(self, player_id: int, banner: str) -> Dict[str, int]:
+        row = self.db.execute("SELECT pulls, since_top FROM pity WHERE player_id = ? AND banner = ?",
+                              (player_id, banner)).fetchone()
+        return {"pulls": row[0], "since_top": row[1]} if row else {"pulls": 0, "since_top": 0}
+
+    def query_plans(self) -> Dict[str, str]:
+        """How SQLite runs each roster menu query (index used, extra sorting) as one line each."""
+        plans = {}
+        for (sort, filtered), sql in ROSTER_SQL.items():
+            params = [1, 1, PAGE_SIZE, 0, 1] if filtered else [1, PAGE_SIZE, 0, 1]
+            steps = self.db.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+            plans[f"by {sort}{', one rarity' if filtered else ''}"] = "; ".join(step[-1] for step in steps)
+        return plans
+
+
+_storage: Optional[Storage] = None
+
+
+def get_storage() -> Storage:
+    """The shared database at DB_PATH, opened on first use."""
+    global _storage
+    if _storage is None:
+        _storage = Storage()
+    return _storage
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect the game database")
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"No database at {args.db}")
+        return 1
+    storage = Storage(args.db)
+    for table in ("players", "characters", "roster_counts", "materials", "currencies", "pity"):
+        count = storage.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        print(f"{table:<12}{count:>10,} rows")
+    print("\nRoster menu queries:")
+    for name, plan in storage.query_plans().items():
+        print(f"  {name:<24}{plan}")
+    storage.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
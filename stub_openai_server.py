@@ -0,0 +1,194 @@
+"""Local stand-in for the OpenAI chat completions API, for testing without a key.
+
+Answers POST /v1/chat/completions with a canned reply built from the last user
+message, either as one JSON response or (with "stream": true) as server-sent
+event chunks, one word per chunk, with configurable delays. With
+--max-concurrent it answers HTTP 429 (with Retry-After) to requests beyond
+that many in flight, like a rate-limited account.
+
+    python stub_openai_server.py --port 8765 --token-delay 0.02
+    python openai_script.py --base-url http://127.0.0.1:8765/v1
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+
+class StubConfig:
+    def __init__(self, first_token_delay: float = 0.2, token_delay: float = 0.02, reply_words: int = 40,
+                 no_stream: bool = False, max_concurrent: int = 0, retry_after: float = 0.5):
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.reply_words = reply_words
+        self.no_stream = no_stream  # Reject streaming requests, to exercise client fallbacks
+        self.max_concurrent = max_concurrent  # 0 = unlimited
+        self.retry_after = retry_after
+        self.requests = 0
+        self.in_flight = 0
+        self.rate_limited = 0
+        self.lock = threading.Lock()
+
+
+def reply_words(messages: List[dict], count: int) -> List[str]:
+    prompt = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    words = ["You", "asked:", *prompt.split()[:20], "--"]
+    filler = "this is a stub answer streamed one word at a time".split()
+    while len(words) < count:
+        words.append(filler[len(words) % len(filler)])
+    return words
+
+
+def count_tokens(messages: List[dict]) -> int:
+    # Rough estimate, good enough for usage accounting in tests
+    return sum(len(str(m.get("content", "")).split()) + 4 for m in messages)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config: StubConfig = StubConfig()
+
+    def log_message(self, format, *args):
+        pass  # Keep test output quiet
+
+    def send_json(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+
+        config = self.config
+        with config.lock:
+            config.requests += 1
+            limited = config.max_concurrent and config.in_flight >= config.max_concurrent
+            if limited:
+                config.rate_limited += 1
+            else:
+                config.in_flight += 1
+        if limited:
+            self.send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                           {"Retry-After": str(config.retry_after)})
+            return
+
+        try:
+            self.complete(request)
+        finally:
+            with config.lock:
+                config.in_flight -= 1
+
+    def complete(self, request: dict):
+        config = self.config
+        messages = request.get("messages", [])
+        model = request.get("model", "stub")
+        words = reply_words(messages, config.reply_words)
+        usage = {
+            "prompt_tokens": count_tokens(messages),
+            "completion_tokens": len(words),
+            "total_tokens": count_tokens(messages) + len(words)
+        }
+
+        if request.get("stream"):
+            if config.no_stream:
+                self.send_json(400, {"error": {"message": "Streaming is not supported", "type": "invalid_request_error"}})
+                return
+            include_usage = (request.get("stream_options") or {}).get("include_usage", False)
+            self.stream_reply(model, words, usage if include_usage else None)
+            return
+
+        time.sleep(config.first_token_delay + config.token_delay * len(words))
+        self.send_json(200, {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": " ".join(words)},
+                "finish_reason": "stop"
+            }],
+            "usage": usage
+        })
+
+    def stream_reply(self, model: str, words: List[str], usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def send(payload):
+            data = payload if isinstance(payload, str) else json.dumps(payload)
+            self.wfile.write(f"data: {data}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        def chunk(delta: dict, finish_reason=None) -> dict:
+            return {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }
+
+        time.sleep(self.config.first_token_delay)
+        send(chunk({"role": "assistant", "content": ""}))
+        for i, word in enumerate(words):
+            send(chunk({"content": word if i == 0 else " " + word}))
+            time.sleep(self.config.token_delay)
+        send(chunk({}, "stop"))
+        if usage is not None:
+            send({"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()),
+                  "model": model, "choices": [], "usage": usage})
+        send("[DONE]")
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # The default backlog of 5 stalls concurrent clients on connect
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8765, config: StubConfig = None) -> StubServer:
+    """Build (but don't start) a stub server; port 0 picks a free port."""
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"config": config or StubConfig()})
+    return StubServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stub of the OpenAI chat completions API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--first-token-delay", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="seconds between streamed tokens")
+    parser.add_argument("--reply-words", type=int, default=40, help="words per reply")
+    parser.add_argument("--no-stream", action="store_true", help="reject streaming requests with HTTP 400")
+    parser.add_argument("--max-concurrent", type=int, default=0,
+                        help="answer HTTP 429 beyond this many requests in flight (0 = unlimited)")
+    parser.add_argument("--retry-after", type=float, default=0.5, help="Retry-After seconds sent with 429s")
+    args = parser.parse_args(argv)
+
+    config = StubConfig(args.first_token_delay, args.token_delay, args.reply_words, args.no_stream,
+                        args.max_concurrent, args.retry_after)
+    server = make_server(args.host, args.port, config)
+    print(f"Stub OpenAI server listening on http://{args.host}:{server.server_port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
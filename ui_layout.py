@@ -0,0 +1,94 @@
+"""Retained UI layout for gacha_game_gui.
+
+Each screen's clickable elements are laid out once into a tree of UINodes with
+cached rects. The leaves are indexed in a uniform grid so that hover and click
+resolution only test the few nodes overlapping the cell under the cursor.
+"""
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import pygame
+
+DEFAULT_CELL_SIZE = 80
+
+
+class UINode:
+    def __init__(self, name: str, rect: pygame.Rect, kind: str = "panel",
+                 action: Optional[Callable] = None, payload=None, button=None,
+                 children: Optional[List["UINode"]] = None):
+        self.name = name
+        self.rect = pygame.Rect(rect)
+        self.kind = kind
+        self.action = action
+        self.payload = payload
+        self.button = button
+        self.children = children or []
+        self.enabled = True
+
+    @classmethod
+    def from_button(cls, button) -> "UINode":
+        return cls(button.text, button.rect, "button", button.action, button=button)
+
+    def is_enabled(self) -> bool:
+        # Buttons toggle their own enabled flag while drawing
+        if self.button is not None:
+            return self.button.enabled
+        return self.enabled
+
+    def walk(self) -> Iterator["UINode"]:
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+class SpatialGrid:
+    """Uniform grid of cells, each listing the nodes whose rect overlaps it."""
+
+    def __init__(self, width: int, height: int, cell_size: int = DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cols = (width + cell_size - 1) // cell_size
+        self.rows = (height + cell_size - 1) // cell_size
+        self.cells: Dict[Tuple[int, int], List[UINode]] = {}
+
+    def build(self, nodes: List[UINode]):
+        self.cells.clear()
+        for node in nodes:
+            rect = node.rect
+            first_col = max(rect.left // self.cell_size, 0)
+            last_col = min((rect.right - 1) // self.cell_size, self.cols - 1)
+            first_row = max(rect.top // self.cell_size, 0)
+            last_row = min((rect.bottom - 1) // self.cell_size, self.rows - 1)
+            for col in range(first_col, last_col + 1):
+                for row in range(first_row, last_row + 1):
+                    self.cells.setdefault((col, row), []).append(node)
+
+    def hit(self, pos: Tuple[int, int]) -> Optional[UINode]:
+        """Topmost enabled node containing pos (later nodes are drawn on top)."""
+        cell = self.cells.get((pos[0] // self.cell_size, pos[1] // self.cell_size))
+        if not cell:
+            return None
+        for node in reversed(cell):
+            if node.rect.collidepoint(pos) and node.is_enabled():
+                return node
+        return None
+
+
+class Layout:
+    """A screen's node tree plus its hit-testing index, rebuilt only when `key` changes."""
+
+    def __init__(self, root: UINode, key=None, size: Tuple[int, int] = (1280, 720),
+                 cell_size: int = DEFAULT_CELL_SIZE):
+        self.root = root
+        self.key = key
+        self.leaves = [node for node in root.walk() if not node.children and node is not root]
+        self.by_name = {node.name: node for node in self.leaves}
+        self.by_kind: Dict[str, List[UINode]] = {}
+        for node in self.leaves:
+            self.by_kind.setdefault(node.kind, []).append(node)
+        self.grid = SpatialGrid(size[0], size[1], cell_size)
+        self.grid.build(self.leaves)
+
+    def hit(self, pos: Tuple[int, int]) -> Optional[UINode]:
+        return self.grid.hit(pos)
+
+    def nodes(self, kind: str) -> List[UINode]:
+        return self.by_kind.get(kind, [])